@@ -1,11 +1,12 @@
 import socket
 import sys
 import threading
+import time
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Optional
 
-import requests
-import uvicorn
+if TYPE_CHECKING:
+    import uvicorn
 
 APP_ROOT = Path(__file__).resolve().parent
 
@@ -26,14 +27,14 @@ def _sanitize_sys_path() -> None:
 
 _sanitize_sys_path()
 
-from fastapi_app.main import app
-
 
 class BackendServer:
-    def __init__(self) -> None:
+    def __init__(self, startup_timeout: float = 30.0) -> None:
         self._thread: Optional[threading.Thread] = None
-        self._server: Optional[uvicorn.Server] = None
+        self._server: Optional["uvicorn.Server"] = None
+        self._socket: Optional[socket.socket] = None
         self._port: Optional[int] = None
+        self._startup_timeout = startup_timeout
 
     @property
     def base_url(self) -> str:
@@ -45,38 +46,41 @@ class BackendServer:
         if self._thread and self._thread.is_alive():
             return
 
-        self._port = self._pick_free_port()
-        config = uvicorn.Config(
-            app,
-            host="127.0.0.1",
-            port=self._port,
-            log_level="warning",
-        )
+        import uvicorn
+
+        from fastapi_app.main import app
+
+        self._socket = self._bind_socket()
+        self._port = int(self._socket.getsockname()[1])
+        config = uvicorn.Config(app, log_level="warning", lifespan="on")
         self._server = uvicorn.Server(config)
-        self._thread = threading.Thread(target=self._server.run, daemon=True)
+        self._thread = threading.Thread(
+            target=self._server.run, kwargs={"sockets": [self._socket]}, daemon=True
+        )
         self._thread.start()
-        self._wait_ready()
+        self._wait_ready(app.state.ready)
 
     def stop(self) -> None:
         if self._server:
             self._server.should_exit = True
         if self._thread and self._thread.is_alive():
             self._thread.join(timeout=2)
+        if self._socket:
+            self._socket.close()
+            self._socket = None
 
-    def _wait_ready(self) -> None:
-        if not self._port:
-            return
-        for _ in range(30):
-            try:
-                requests.get(f"http://127.0.0.1:{self._port}/history", timeout=1)
-                return
-            except Exception:
-                continue
+    def _wait_ready(self, ready: threading.Event) -> None:
+        deadline = time.monotonic() + self._startup_timeout
+        while not ready.wait(timeout=0.05):
+            if not (self._thread and self._thread.is_alive()):
+                raise RuntimeError("Backend failed to start")
+            if time.monotonic() >= deadline:
+                self.stop()
+                raise RuntimeError("Backend did not become ready in time")
 
     @staticmethod
-    def _pick_free_port() -> int:
+    def _bind_socket() -> socket.socket:
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.bind(("127.0.0.1", 0))
-        _, port = sock.getsockname()
-        sock.close()
-        return int(port)
+        sock.listen(128)
+        return sock
@@ -0,0 +1,414 @@
+import csv
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from PyQt6 import QtCore, QtWidgets
+
+from desktop_app.client import BackendClient
+from fastapi_app.core import cancellation, config
+from fastapi_app.core.cancellation import CancelToken
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp", ".gif"}
+PDF_EXTENSIONS = {".pdf"}
+STATUS_LABELS = {
+    "pending": "В очереди",
+    "running": "Выполняется",
+    "done": "Готово",
+    "error": "Ошибка",
+    "cancelled": "Отменено",
+}
+
+
+class TaskSignals(QtCore.QObject):
+    started = QtCore.pyqtSignal()
+    finished = QtCore.pyqtSignal(object)
+    error = QtCore.pyqtSignal(str)
+    cancelled = QtCore.pyqtSignal()
+
+
+class Task(QtCore.QRunnable):
+    # one unit of work for a QThreadPool; results come back through queued signals.
+    # The token is current while func runs, so the backend client and services see its cancellation.
+    def __init__(self, func: Callable[[], Any], token: Optional[CancelToken] = None) -> None:
+        super().__init__()
+        self.func = func
+        self.token = token or CancelToken()
+        self.signals = TaskSignals()
+        # the Python side owns the task so its signals outlive run()
+        self.setAutoDelete(False)
+
+    def run(self) -> None:
+        if self.token.cancelled:
+            self.signals.cancelled.emit()
+            return
+        self.signals.started.emit()
+        try:
+            with cancellation.scope(self.token):
+                result = self.func()
+        except Exception as exc:
+            if self.token.cancelled:
+                self.signals.cancelled.emit()
+            else:
+                self.signals.error.emit(str(exc))
+            return
+        if self.token.reason:
+            self.signals.cancelled.emit()
+        else:
+            self.signals.finished.emit(result)
+
+
+@dataclass
+class BatchItem:
+    source: str
+    kind: str
+    status: str = "pending"
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: str = ""
+
+    @property
+    def title(self) -> str:
+        return os.path.basename(self.source) if self.kind != "url" else self.source
+
+
+def scan_folder(folder: str, image_mode: str = "analyze") -> List[BatchItem]:
+    items = []
+    for path in sorted(Path(folder).rglob("*")):
+        suffix = path.suffix.lower()
+        if suffix in IMAGE_EXTENSIONS:
+            items.append(BatchItem(str(path), "image" if image_mode == "analyze" else "ocr_image"))
+        elif suffix in PDF_EXTENSIONS:
+            items.append(BatchItem(str(path), "pdf"))
+    return items
+
+
+def parse_urls(text: str) -> List[BatchItem]:
+    seen = set()
+    items = []
+    for line in text.splitlines():
+        url = line.strip()
+        if url and not url.startswith("#") and url not in seen:
+            seen.add(url)
+            items.append(BatchItem(url, "url"))
+    return items
+
+
+def run_item(client: BackendClient, item: BatchItem) -> Dict[str, Any]:
+    if item.kind == "image":
+        return client.analyze_image(item.source)
+    if item.kind == "ocr_image":
+        return client.ocr_image(item.source)
+    if item.kind == "pdf":
+        return client.ocr_pdf(item.source)
+    return client.parse_demo(item.source)
+
+
+class BatchJournal:
+    # <name>.json holds the item list, <name>.jsonl gets one line per finished item, so resume is O(1) per item
+    def __init__(self, directory: Path, name: str = "current") -> None:
+        self.items_path = directory / f"{name}.json"
+        self.log_path = directory / f"{name}.jsonl"
+        self._lock = threading.Lock()
+
+    def start(self, items: List[BatchItem]) -> None:
+        self.items_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.items_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps([{"source": item.source, "kind": item.kind} for item in items], ensure_ascii=False),
+            encoding="utf-8",
+        )
+        os.replace(tmp_path, self.items_path)
+        self.log_path.write_text("", encoding="utf-8")
+
+    def record(self, index: int, item: BatchItem) -> None:
+        entry = {"index": index, "status": item.status, "result": item.result, "error": item.error}
+        line = json.dumps(entry, ensure_ascii=False)
+        with self._lock, self.log_path.open("a", encoding="utf-8") as handle:
+            handle.write(line + "\n")
+
+    def load(self) -> List[BatchItem]:
+        if not self.items_path.exists():
+            return []
+        try:
+            entries = json.loads(self.items_path.read_text("utf-8"))
+            items = [BatchItem(entry["source"], entry["kind"]) for entry in entries]
+        except (OSError, ValueError, KeyError):
+            return []
+        if self.log_path.exists():
+            for line in self.log_path.read_text("utf-8").splitlines():
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if 0 <= entry.get("index", -1) < len(items):
+                    item = items[entry["index"]]
+                    item.status, item.result, item.error = entry["status"], entry["result"], entry["error"]
+        return items
+
+
+def export_results(path: str, items: List[BatchItem]) -> None:
+    if path.lower().endswith(".csv"):
+        with open(path, "w", encoding="utf-8-sig", newline="") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["source", "kind", "status", "error", "title", "summary", "text"])
+            for item in items:
+                analysis = item.result.get("analysis") or {}
+                summary = "; ".join(
+                    str(value)
+                    for key in ("strengths", "weaknesses", "unique_offers", "recommendations", "insights")
+                    for value in analysis.get(key) or []
+                )
+                writer.writerow(
+                    [item.source, item.kind, item.status, item.error, item.result.get("title", ""), summary,
+                     item.result.get("text", "")]
+                )
+        return
+    with open(path, "w", encoding="utf-8") as handle:
+        for item in items:
+            handle.write(json.dumps(asdict(item), ensure_ascii=False) + "\n")
+
+
+class BatchModel(QtCore.QAbstractTableModel):
+    HEADERS = ["Источник", "Тип", "Статус"]
+    KIND_LABELS = {"image": "Изображение", "ocr_image": "OCR изображения", "pdf": "OCR PDF", "url": "URL"}
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self.items: List[BatchItem] = []
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.items)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(self.HEADERS)
+
+    def headerData(
+        self, section: int, orientation: QtCore.Qt.Orientation, role: int = QtCore.Qt.ItemDataRole.DisplayRole
+    ) -> Any:
+        if role == QtCore.Qt.ItemDataRole.DisplayRole and orientation == QtCore.Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        item = self.items[index.row()]
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if index.column() == 0:
+                return item.title
+            if index.column() == 1:
+                return self.KIND_LABELS.get(item.kind, item.kind)
+            return STATUS_LABELS.get(item.status, item.status)
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole:
+            return item.error or item.source
+        return None
+
+    def set_items(self, items: List[BatchItem]) -> None:
+        self.beginResetModel()
+        self.items = items
+        self.endResetModel()
+
+    def changed(self, row: int) -> None:
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.HEADERS) - 1))
+
+
+class BatchRunner(QtCore.QObject):
+    item_started = QtCore.pyqtSignal(int)
+    item_finished = QtCore.pyqtSignal(int)
+    progress = QtCore.pyqtSignal(int, int)
+    idle = QtCore.pyqtSignal()
+
+    def __init__(self, client: BackendClient, journal: BatchJournal) -> None:
+        super().__init__()
+        self._client = client
+        # batches get their own pool, so a long queue never delays a single run from the main tab
+        self.pool = QtCore.QThreadPool(self)
+        self._journal = journal
+        self._token = CancelToken()
+        self._tasks: Dict[int, Task] = {}
+        self.items: List[BatchItem] = []
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def start(self, items: List[BatchItem], concurrency: int, fresh: bool = True) -> None:
+        self.items = items
+        if fresh:
+            # the journal is truncated, so every item runs again
+            for item in items:
+                item.status, item.result, item.error = "pending", {}, ""
+            self._journal.start(items)
+        self._token = CancelToken()
+        self.pool.setMaxThreadCount(max(1, concurrency))
+        for index, item in enumerate(items):
+            if item.status in {"pending", "cancelled", "error"}:
+                item.status, item.error = "pending", ""
+                self._submit(index, item)
+        self._report()
+        if not self._tasks:
+            self.idle.emit()
+
+    def cancel(self) -> None:
+        # queued items never start and requests in flight are aborted on the backend as well
+        self._token.cancel()
+
+    def _submit(self, index: int, item: BatchItem) -> None:
+        task = Task(lambda: run_item(self._client, item), self._token)
+        task.signals.started.connect(lambda i=index: self._mark_running(i))
+        task.signals.finished.connect(lambda result, i=index: self._done(i, "done", result, ""))
+        task.signals.error.connect(lambda message, i=index: self._done(i, "error", {}, message))
+        task.signals.cancelled.connect(lambda i=index: self._done(i, "cancelled", {}, ""))
+        self._tasks[index] = task
+        self.pool.start(task)
+
+    def _mark_running(self, index: int) -> None:
+        self.items[index].status = "running"
+        self.item_started.emit(index)
+
+    def _done(self, index: int, status: str, result: Dict[str, Any], error: str) -> None:
+        self._tasks.pop(index, None)
+        item = self.items[index]
+        item.status, item.result, item.error = status, result, error
+        if status != "cancelled":
+            self._journal.record(index, item)
+        self.item_finished.emit(index)
+        self._report()
+        if not self._tasks:
+            self.idle.emit()
+
+    def _report(self) -> None:
+        finished = sum(1 for item in self.items if item.status in {"done", "error"})
+        self.progress.emit(finished, len(self.items))
+
+
+class BatchPanel(QtWidgets.QWidget):
+    result_ready = QtCore.pyqtSignal(str, str, dict)
+
+    def __init__(self, client: BackendClient, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self._journal = BatchJournal(Path(config.DATA_DIR) / "batch")
+        self.runner = BatchRunner(client, self._journal)
+        self.model = BatchModel(self)
+
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(8)
+
+        sources = QtWidgets.QHBoxLayout()
+        self.folder_btn = QtWidgets.QPushButton("Папка…")
+        self.folder_btn.clicked.connect(self._pick_folder)
+        self.image_mode = QtWidgets.QComboBox()
+        self.image_mode.addItem("Изображения: анализ", "analyze")
+        self.image_mode.addItem("Изображения: OCR", "ocr")
+        self.urls_btn = QtWidgets.QPushButton("Список URL")
+        self.urls_btn.clicked.connect(self._load_urls)
+        sources.addWidget(self.folder_btn)
+        sources.addWidget(self.image_mode)
+        sources.addWidget(self.urls_btn)
+        sources.addStretch(1)
+        sources.addWidget(QtWidgets.QLabel("Потоков"))
+        self.concurrency = QtWidgets.QSpinBox()
+        self.concurrency.setRange(1, 32)
+        self.concurrency.setValue(config.BATCH_CONCURRENCY)
+        sources.addWidget(self.concurrency)
+        layout.addLayout(sources)
+
+        self.urls_input = QtWidgets.QPlainTextEdit()
+        self.urls_input.setPlaceholderText("URL, по одному в строке")
+        self.urls_input.setMaximumHeight(80)
+        layout.addWidget(self.urls_input)
+
+        self.table = QtWidgets.QTableView()
+        self.table.setModel(self.model)
+        self.table.verticalHeader().setVisible(False)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.horizontalHeader().setSectionResizeMode(0, QtWidgets.QHeaderView.ResizeMode.Stretch)
+        self.table.setSelectionBehavior(QtWidgets.QAbstractItemView.SelectionBehavior.SelectRows)
+        self.table.setMinimumHeight(120)
+        layout.addWidget(self.table, 1)
+
+        controls = QtWidgets.QHBoxLayout()
+        self.progress = QtWidgets.QProgressBar()
+        self.start_btn = QtWidgets.QPushButton("Запустить")
+        self.start_btn.clicked.connect(self._start)
+        self.cancel_btn = QtWidgets.QPushButton("Отменить")
+        self.cancel_btn.clicked.connect(self.runner.cancel)
+        self.resume_btn = QtWidgets.QPushButton("Продолжить")
+        self.resume_btn.clicked.connect(self._resume)
+        self.export_btn = QtWidgets.QPushButton("Экспорт…")
+        self.export_btn.clicked.connect(self._export)
+        controls.addWidget(self.progress, 1)
+        for button in (self.start_btn, self.cancel_btn, self.resume_btn, self.export_btn):
+            controls.addWidget(button)
+        layout.addLayout(controls)
+
+        self.runner.item_started.connect(self.model.changed)
+        self.runner.item_finished.connect(self._item_finished)
+        self.runner.progress.connect(self._progress)
+        self.runner.idle.connect(self._update_buttons)
+
+        # an interrupted batch from the previous session can be resumed
+        self.model.set_items(self._journal.load())
+        self.runner.items = self.model.items
+        self._progress(sum(1 for item in self.model.items if item.status in {"done", "error"}), len(self.model.items))
+        self._update_buttons()
+
+    def _pick_folder(self) -> None:
+        folder = QtWidgets.QFileDialog.getExistingDirectory(self, "Папка с изображениями и PDF")
+        if folder:
+            self._set_items(scan_folder(folder, self.image_mode.currentData()))
+
+    def _load_urls(self) -> None:
+        self._set_items(parse_urls(self.urls_input.toPlainText()))
+
+    def _set_items(self, items: List[BatchItem]) -> None:
+        if self.runner.running:
+            return
+        self.model.set_items(items)
+        self._progress(0, len(items))
+        self._update_buttons(fresh=True)
+
+    def _start(self) -> None:
+        self.runner.start(self.model.items, self.concurrency.value(), fresh=True)
+        self.model.set_items(self.model.items)
+        self._update_buttons()
+
+    def _resume(self) -> None:
+        self.runner.start(self.model.items, self.concurrency.value(), fresh=False)
+        self._update_buttons()
+
+    def _item_finished(self, index: int) -> None:
+        self.model.changed(index)
+        item = self.model.items[index]
+        if item.status == "done":
+            self.result_ready.emit(item.result.get("title") or item.title, item.kind, item.result)
+        elif item.status == "error":
+            self.result_ready.emit(item.title, "error", {"error": item.error})
+
+    def _progress(self, finished: int, total: int) -> None:
+        self.progress.setMaximum(max(total, 1))
+        self.progress.setValue(finished)
+        self.progress.setFormat(f"{finished} / {total}")
+
+    def _update_buttons(self, fresh: bool = False) -> None:
+        running = self.runner.running
+        items = self.model.items
+        unfinished = any(item.status != "done" for item in items)
+        self.start_btn.setEnabled(not running and bool(items))
+        started = any(item.status == "done" for item in items)
+        self.resume_btn.setEnabled(not running and not fresh and unfinished and started)
+        self.cancel_btn.setEnabled(running)
+        self.export_btn.setEnabled(not running and any(item.status in {"done", "error"} for item in items))
+        for widget in (self.folder_btn, self.urls_btn, self.concurrency):
+            widget.setEnabled(not running)
+
+    def _export(self) -> None:
+        path, _ = QtWidgets.QFileDialog.getSaveFileName(
+            self, "Экспорт результатов", "results.jsonl", "JSON Lines (*.jsonl);;CSV (*.csv)"
+        )
+        if path:
+            export_results(path, self.model.items)
@@ -0,0 +1 @@
+"""Benchmarks with local stand-ins for external services."""
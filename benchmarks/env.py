@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.fakes import FakeGigaChat, FakeVision
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+def configure_environment(
+    data_dir: Optional[str] = None,
+    gigachat: Optional[FakeGigaChat] = None,
+    vision: Optional[FakeVision] = None,
+) -> str:
+    if "fastapi_app.core.config" in sys.modules:
+        raise RuntimeError("configure_environment() must run before fastapi_app is imported")
+    if str(PROJECT_ROOT) not in sys.path:
+        sys.path.insert(0, str(PROJECT_ROOT))
+
+    data_dir = data_dir or tempfile.mkdtemp(prefix="cm-bench-")
+    os.environ["DATA_DIR"] = data_dir
+    if gigachat:
+        os.environ["GIGACHAT_CLIENT_ID"] = "bench"
+        os.environ["GIGACHAT_CLIENT_SECRET"] = "bench"
+        os.environ["GIGACHAT_AUTH_URL"] = gigachat.auth_url
+        os.environ["GIGACHAT_API_URL"] = gigachat.api_url
+    else:
+        os.environ["GIGACHAT_CLIENT_ID"] = ""
+        os.environ["GIGACHAT_CLIENT_SECRET"] = ""
+    if vision:
+        os.environ["YC_API_KEY"] = "bench"
+        os.environ["YC_FOLDER_ID"] = "bench"
+        os.environ["YC_VISION_URL"] = vision.url
+    else:
+        os.environ["YC_API_KEY"] = ""
+        os.environ["YC_FOLDER_ID"] = ""
+    return data_dir
@@ -0,0 +1,273 @@
+import abc
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+TEXT_ANALYSIS = {
+    "strengths": ["Бесплатная доставка от 1000 ₽", "Понятный каталог"],
+    "weaknesses": ["Нет отзывов покупателей"],
+    "unique_offers": ["Скидка 10% на первый заказ"],
+    "recommendations": ["Добавить кейсы клиентов", "Усилить призыв к действию"],
+}
+
+IMAGE_ANALYSIS = {
+    "description": "Баннер с товаром на светлом фоне",
+    "insights": ["Яркий акцентный цвет", "Крупный заголовок"],
+    "style_score": 7,
+}
+
+
+class FakeServer(abc.ABC):
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        if not self._httpd:
+            raise RuntimeError("Fake server is not started")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeServer":
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self) -> None:
+                server._dispatch(self, "GET")
+
+            def do_POST(self) -> None:
+                server._dispatch(self, "POST")
+
+            def log_message(self, format: str, *args: Any) -> None:
+                return
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._httpd:
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._httpd = None
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+    @abc.abstractmethod
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        ...
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, method: str) -> None:
+        length = int(handler.headers.get("Content-Length") or 0)
+        body = handler.rfile.read(length) if length else b""
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+            failed = self.error_rate > 0 and self._random.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+        if failed:
+            status, content_type, payload = self.error_status, "application/json", b'{"error":"injected"}'
+        else:
+            status, content_type, payload = self.handle(method, handler.path, body)
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+def _json(status: int, data: Dict[str, Any]) -> Tuple[int, str, bytes]:
+    return status, "application/json", json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+class FakeGigaChat(FakeServer):
+    def __init__(self, token_ttl: int = 1800, defect_rate: float = 0.0, chunk_size: int = 16, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.token_ttl = token_ttl
+        self.defect_rate = defect_rate
+        self.chunk_size = chunk_size
+        self.token_requests = 0
+
+    @property
+    def auth_url(self) -> str:
+        return f"{self.base_url}/api/v2/oauth"
+
+    @property
+    def api_url(self) -> str:
+        return f"{self.base_url}/api/v1"
+
+    def _content(self, prompt: str) -> str:
+        ids = re.findall(r"^\[id=(\w+)\]$", prompt, re.MULTILINE)
+        if ids:
+            # several items packed into one prompt: one analysis per id
+            analysis = IMAGE_ANALYSIS if "style_score" in prompt else TEXT_ANALYSIS
+            return json.dumps({item: analysis for item in ids}, ensure_ascii=False)
+        content = dict(IMAGE_ANALYSIS if "style_score" in prompt else TEXT_ANALYSIS)
+        with self._lock:
+            defect = self._random.random() < self.defect_rate if self.defect_rate else False
+            missing_key = self._random.random() < 0.5
+        if defect and not prompt.startswith("Исправь"):
+            if missing_key:
+                content.pop(next(iter(content)))
+                return json.dumps(content, ensure_ascii=False)
+            body = json.dumps(content, ensure_ascii=False, indent=1)
+            return f"Конечно! Вот анализ:\n```json\n{body[:-1]},\n}}\n```\nОбращайтесь."
+        return json.dumps(content, ensure_ascii=False) + "\nНадеюсь, это поможет в работе над продуктом."
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if method == "POST" and path == "/api/v2/oauth":
+            self.token_requests += 1
+            return _json(200, {"access_token": uuid.uuid4().hex, "expires_in": self.token_ttl})
+        if method == "POST" and path == "/api/v1/chat/completions":
+            request = json.loads(body or b"{}")
+            prompt = request.get("messages", [{}])[-1].get("content", "")
+            content = self._content(prompt)
+            usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4}
+            if request.get("stream"):
+                events = []
+                for start in range(0, len(content), self.chunk_size):
+                    delta = {"choices": [{"delta": {"content": content[start : start + self.chunk_size]}, "index": 0}]}
+                    events.append(f"data: {json.dumps(delta, ensure_ascii=False)}\n\n")
+                events.append(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n")
+                events.append("data: [DONE]\n\n")
+                return 200, "text/event-stream", "".join(events).encode("utf-8")
+            return _json(
+                200,
+                {
+                    "choices": [{"message": {"role": "assistant", "content": content}}],
+                    "model": request.get("model"),
+                    "usage": usage,
+                },
+            )
+        return _json(404, {"error": "not found"})
+
+
+def build_vision_response(pages: int = 1, blocks: int = 4, lines: int = 6, words: int = 8) -> Dict[str, Any]:
+    page_items = []
+    for page_index in range(pages):
+        block_items = []
+        for block_index in range(blocks):
+            line_items = []
+            for line_index in range(lines):
+                word_items = []
+                for word_index in range(words):
+                    x = 20 + word_index * 60
+                    y = 40 + (block_index * lines + line_index) * 24
+                    word_items.append(
+                        {
+                            "boundingBox": {
+                                "vertices": [
+                                    {"x": str(x), "y": str(y)},
+                                    {"x": str(x), "y": str(y + 20)},
+                                    {"x": str(x + 50), "y": str(y + 20)},
+                                    {"x": str(x + 50), "y": str(y)},
+                                ]
+                            },
+                            "text": f"слово{page_index}_{block_index}_{line_index}_{word_index}",
+                            "confidence": 0.97,
+                            "languages": [{"languageCode": "ru", "confidence": 0.9}],
+                        }
+                    )
+                line_items.append({"boundingBox": {"vertices": []}, "words": word_items, "confidence": 0.97})
+            block_items.append({"boundingBox": {"vertices": []}, "lines": line_items})
+        page_items.append({"blocks": block_items, "width": "1240", "height": "1754"})
+    return {"results": [{"results": [{"textDetection": {"pages": page_items}}]}]}
+
+
+class FakeVision(FakeServer):
+    def __init__(self, pages: int = 1, blocks: int = 4, lines: int = 6, words: int = 8, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self._shape = (pages, blocks, lines, words)
+        self._image_payload = b""
+        self._pdf_payload = b""
+
+    @property
+    def url(self) -> str:
+        return f"{self.base_url}/vision/v1/batchAnalyze"
+
+    def start(self) -> "FakeServer":
+        pages, blocks, lines, words = self._shape
+        self._image_payload = json.dumps(build_vision_response(1, blocks, lines, words)).encode("utf-8")
+        self._pdf_payload = json.dumps(build_vision_response(pages, blocks, lines, words)).encode("utf-8")
+        return super().start()
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if method == "POST" and path == "/vision/v1/batchAnalyze":
+            request = json.loads(body or b"{}")
+            spec = (request.get("analyze_specs") or [{}])[0]
+            if spec.get("mime_type") == "application/pdf":
+                return 200, "application/json", self._pdf_payload
+            return 200, "application/json", self._image_payload
+        return _json(404, {"error": "not found"})
+
+
+def build_site_page(path: str, paragraphs: int = 40) -> str:
+    nav = "".join(f'<li><a href="/catalog/{i}">Раздел {i}</a></li>' for i in range(12))
+    body = "".join(
+        f"<p>Товар {i} на странице {path}: бесплатная доставка, гарантия 2 года, цена {990 + i * 10} ₽.</p>"
+        for i in range(paragraphs)
+    )
+    return (
+        "<!doctype html><html><head>"
+        f"<title>Конкурент — {path}</title>"
+        "<style>body{font-family:sans-serif}</style>"
+        "<script>window.analytics=[];</script>"
+        "</head><body>"
+        f"<header><nav><ul>{nav}</ul></nav></header>"
+        f'<main><h1>Страница {path}</h1>{body}<a class="btn" href="/pricing">Купить</a></main>'
+        '<div class="cookie-banner">Мы используем cookies</div>'
+        "<footer>© Конкурент. Все права защищены.</footer>"
+        "<noscript>Включите JavaScript</noscript>"
+        "</body></html>"
+    )
+
+
+class FakeSite(FakeServer):
+    def __init__(self, pages: int = 20, paragraphs: int = 40, **kwargs: Any) -> None:
+        super().__init__(**kwargs)
+        self.pages = pages
+        self.paragraphs = paragraphs
+
+    def handle(self, method: str, path: str, body: bytes) -> Tuple[int, str, bytes]:
+        if path == "/robots.txt":
+            return 200, "text/plain", b"User-agent: *\nDisallow: /private\n"
+        if path == "/sitemap.xml":
+            urls = "".join(
+                f"<url><loc>{self.base_url}/product/{i}</loc></url>" for i in range(self.pages)
+            )
+            sitemap = (
+                '<?xml version="1.0" encoding="UTF-8"?>'
+                f'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>'
+            )
+            return 200, "application/xml", sitemap.encode("utf-8")
+        html = build_site_page(path, self.paragraphs)
+        return 200, "text/html; charset=utf-8", html.encode("utf-8")
@@ -0,0 +1,145 @@
+import argparse
+import sys
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.fakes import build_site_page
+from benchmarks.stats import append_results, measure, print_report
+
+MESSY_PAGE = """<!DOCTYPE html>
+<html lang="ru"><head><meta charset="utf-8"><title> Магазин &amp; Ко </title>
+<script>var x = "<div>не текст</div>";</script><style>p{color:red}</style></head>
+<body>
+<div id="cookie-consent" class="Cookie Banner">Мы используем <b>cookies</b>.<button>Ок</button></div>
+<nav class="top-menu"><ul><li><a href="/">Главная</a></li><li><a href="/sale">Скидки&nbsp;%</a></li></ul></nav>
+<div role="main" class="page">
+  <h1>Смартфон <span>X</span>-100</h1>
+  <!-- price block -->
+  <p>Цена:<strong>19&#160;990 ₽</strong> <em>вместо</em> 24 990 ₽<br>Доставка завтра</p>
+  <div class="desc" itemprop="articleBody">Описание<div>вложенный <i>блок</i></div>хвост</div>
+  <table><tr><th>Память</th><td>128 ГБ</td></tr><tr><th>Цвет</th><td>Чёрный</td></tr></table>
+  <noscript><img src="/pixel.gif"></noscript>
+  <div aria-hidden="true">скрыто</div>
+  текст без блока
+</div>
+<aside>Похожие товары</aside>
+<footer><p>© 2024 Магазин</p><p>ИНН 7700000000</p></footer>
+</body></html>"""
+
+
+def build_pages(scale: int) -> Dict[str, str]:
+    return {
+        "messy": MESSY_PAGE,
+        "site_40p": build_site_page("/product/1", 40),
+        f"site_{2000 * scale}p": build_site_page("/catalog", 2000 * scale),
+    }
+
+
+def extract_page_bs4(html: str) -> Any:
+    # Reference implementation: the BeautifulSoup/html.parser pipeline used before the streaming walker.
+    from bs4 import BeautifulSoup, NavigableString
+    from bs4.element import CData, Comment, Declaration, Doctype, ProcessingInstruction
+
+    from fastapi_app.services.html_text import (
+        BLOCK_TAGS,
+        SKIP_TAGS,
+        Block,
+        ExtractedPage,
+        is_boilerplate_element,
+        is_main_element,
+    )
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(list(SKIP_TAGS)):
+        tag.decompose()
+    title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled"
+
+    blocks: List[Block] = []
+    current, flags, parts = None, (False, False), []
+    skipped = (Comment, Doctype, ProcessingInstruction, Declaration)
+
+    def flush() -> None:
+        text = " ".join(" ".join(parts).split())
+        if text:
+            tag = current.name if current is not None else "body"
+            blocks.append(Block(text=text, tag=tag, boilerplate=flags[0], main=flags[1]))
+
+    for node in soup.descendants:
+        if not isinstance(node, NavigableString) or (isinstance(node, skipped) and not isinstance(node, CData)):
+            continue
+        boilerplate = main = False
+        block_tag = None
+        element = node.parent
+        while element is not None and element.name != "[document]":
+            attrs = {key: " ".join(value) if isinstance(value, list) else value for key, value in element.attrs.items()}
+            if block_tag is None and element.name in BLOCK_TAGS:
+                block_tag = element
+            boilerplate = boilerplate or is_boilerplate_element(element.name, attrs)
+            main = main or is_main_element(element.name, attrs)
+            element = element.parent
+        if block_tag is not current:
+            flush()
+            current, parts = block_tag, []
+        flags = (boilerplate, main)
+        parts.append(str(node))
+    flush()
+    return ExtractedPage(title=title, blocks=blocks)
+
+
+def legacy_text(html: str) -> Tuple[str, str]:
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
+    text = " ".join(soup.get_text(separator=" ").split())
+    title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled"
+    return title, text
+
+
+def check_parity(pages: Dict[str, str], engines: List[str]) -> List[str]:
+    from fastapi_app.services.html_text import extract_page
+
+    problems = []
+    for label, html in pages.items():
+        reference = extract_page_bs4(html)
+        title, text = legacy_text(html)
+        if (reference.title, reference.text) != (title, text):
+            problems.append(f"{label}: bs4 blocks differ from legacy get_text output")
+        for engine in engines:
+            page = extract_page(html, engine)
+            if page.title != reference.title or page.blocks != reference.blocks:
+                problems.append(f"{label}: {engine} output differs from bs4")
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="HTML text extraction: bs4 vs streaming walker")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for the large page")
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    from fastapi_app.services.extraction import extract
+    from fastapi_app.services.html_text import _HAS_LXML, extract_page
+
+    engines = ["lxml", "stdlib"] if _HAS_LXML else ["stdlib"]
+    pages = build_pages(args.scale)
+    problems = check_parity(pages, engines)
+
+    results = []
+    for label, html in pages.items():
+        iterations = max(3, 200_000 // len(html))
+        results.append(measure(f"bs4[{label}]", lambda h=html: extract_page_bs4(h), iterations))
+        for engine in engines:
+            results.append(measure(f"{engine}[{label}]", lambda h=html, e=engine: extract_page(h, e), iterations))
+        results.append(measure(f"facts[{label}]", lambda h=html: extract(h), iterations))
+    print_report(results)
+    append_results(args.json_path, "html_parse", results)
+
+    for problem in problems:
+        print(f"PARITY: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+import argparse
+import json
+import subprocess
+import sys
+from typing import Dict, List
+
+from benchmarks.env import PROJECT_ROOT
+from benchmarks.stats import append_results
+
+HEAVY_MODULES = ["selenium", "bs4", "lxml", "PIL", "requests"]
+
+TARGETS = {
+    "fastapi_app.main": 450,
+    "backend": 150,
+}
+
+_PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - started
+print(json.dumps({{"elapsed": elapsed, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def probe(module: str, runs: int) -> Dict[str, object]:
+    samples: List[float] = []
+    loaded: List[str] = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+            cwd=PROJECT_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        data = json.loads(output.strip().splitlines()[-1])
+        samples.append(data["elapsed"])
+        loaded = data["loaded"]
+    return {"best_ms": round(min(samples) * 1000, 1), "loaded": loaded}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Cold import time budget check")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply budgets, e.g. for slow CI")
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    failed = False
+    results = []
+    for module, budget_ms in TARGETS.items():
+        result = probe(module, args.runs)
+        budget = budget_ms * args.scale
+        ok = result["best_ms"] <= budget and not result["loaded"]
+        failed = failed or not ok
+        results.append({"name": module, "budget_ms": budget, **result})
+        status = "ok" if ok else "FAIL"
+        heavy = ", ".join(result["loaded"]) or "-"
+        print(f"{module:<24} {result['best_ms']:>8} ms  budget {budget:>6.0f} ms  heavy: {heavy:<20} {status}")
+    append_results(args.json_path, "import_time", results)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+from benchmarks.env import configure_environment
+from benchmarks.fakes import FakeGigaChat, FakeSite, FakeVision
+from benchmarks.micro import _make_image
+from benchmarks.stats import append_results, print_report, summarize
+
+Scenario = Callable[[Any, str], bool]
+
+
+def _scenarios(site_url: str) -> Dict[str, Scenario]:
+    image_bytes = _make_image(1280, 720, "PNG")
+    pdf_bytes = b"%PDF-1.4\n" + b"0" * 200_000
+
+    def analyze_text(session: Any, base_url: str) -> bool:
+        resp = session.post(
+            f"{base_url}/analyze_text",
+            json={"text": "Бесплатная доставка от 1000 ₽. Скидка 10% на первый заказ." * 20},
+            timeout=60,
+        )
+        return resp.ok
+
+    def analyze_image(session: Any, base_url: str) -> bool:
+        resp = session.post(
+            f"{base_url}/analyze_image",
+            files={"file": ("banner.png", image_bytes, "image/png")},
+            timeout=60,
+        )
+        return resp.ok
+
+    def ocr_image(session: Any, base_url: str) -> bool:
+        resp = session.post(
+            f"{base_url}/ocr_image",
+            files={"file": ("scan.png", image_bytes, "image/png")},
+            timeout=60,
+        )
+        return resp.ok
+
+    def ocr_pdf(session: Any, base_url: str) -> bool:
+        resp = session.post(
+            f"{base_url}/ocr_pdf",
+            files={"file": ("doc.pdf", pdf_bytes, "application/pdf")},
+            timeout=120,
+        )
+        return resp.ok
+
+    def parse_demo(session: Any, base_url: str) -> bool:
+        resp = session.post(f"{base_url}/parse_demo", json={"url": f"{site_url}/pricing"}, timeout=120)
+        return resp.ok
+
+    def history(session: Any, base_url: str) -> bool:
+        return session.get(f"{base_url}/history", timeout=30).ok
+
+    return {
+        "analyze_text": analyze_text,
+        "analyze_image": analyze_image,
+        "ocr_image": ocr_image,
+        "ocr_pdf": ocr_pdf,
+        "parse_demo": parse_demo,
+        "history": history,
+    }
+
+
+def run_scenario(
+    name: str, scenario: Scenario, base_url: str, concurrency: int, requests_total: int, api_key: str = ""
+) -> Dict[str, Any]:
+    import requests
+
+    local = threading.local()
+    lock = threading.Lock()
+    samples: List[float] = []
+    errors = 0
+
+    def one_call(_: int) -> None:
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+            if api_key:
+                session.headers["X-API-Key"] = api_key
+        started = time.perf_counter()
+        try:
+            ok = scenario(session, base_url)
+        except requests.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - started
+        with lock:
+            if ok:
+                samples.append(elapsed)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one_call, range(requests_total)))
+    return summarize(f"{name}[c={concurrency}]", samples, time.perf_counter() - started, errors)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load scenarios against the FastAPI backend")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8])
+    parser.add_argument("--scenario", nargs="+", help="Scenarios to run (default: all)")
+    parser.add_argument("--browser", action="store_true", help="Include /parse_demo (needs Chrome)")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Fake GigaChat latency, s")
+    parser.add_argument("--vision-latency", type=float, default=0.05, help="Fake Vision latency, s")
+    parser.add_argument("--site-latency", type=float, default=0.0, help="Fake site latency, s")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random latency, s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of failed upstream calls")
+    parser.add_argument("--pdf-pages", type=int, default=20)
+    parser.add_argument("--api-key", help="X-API-Key sent with every request (default: BACKEND_API_KEY)")
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    fake_kwargs = {"jitter": args.jitter, "error_rate": args.error_rate, "seed": 1}
+    gigachat = FakeGigaChat(latency=args.llm_latency, **fake_kwargs).start()
+    vision = FakeVision(pages=args.pdf_pages, latency=args.vision_latency, **fake_kwargs).start()
+    site = FakeSite(latency=args.site_latency, **fake_kwargs).start()
+    configure_environment(gigachat=gigachat, vision=vision)
+
+    from backend import BackendServer
+    from fastapi_app.core import config
+
+    # config is read only after configure_environment, so the default comes from the same settings as the backend
+    api_key = config.BACKEND_API_KEY if args.api_key is None else args.api_key
+
+    backend = BackendServer()
+    backend.start()
+    scenarios = _scenarios(site.base_url)
+    selected = args.scenario or [name for name in scenarios if name != "parse_demo" or args.browser]
+    results = []
+    try:
+        for name in selected:
+            for concurrency in args.concurrency:
+                results.append(
+                    run_scenario(name, scenarios[name], backend.base_url, concurrency, args.requests, api_key)
+                )
+    finally:
+        backend.stop()
+        for server in (gigachat, vision, site):
+            server.stop()
+    print_report(results)
+    append_results(args.json_path, "load", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import json
+from io import BytesIO
+from typing import Any, Callable, Dict, List
+
+from benchmarks.env import configure_environment
+from benchmarks.fakes import IMAGE_ANALYSIS, TEXT_ANALYSIS, build_vision_response
+from benchmarks.stats import append_results, measure, print_report
+
+
+def _make_image(width: int, height: int, fmt: str) -> bytes:
+    from PIL import Image
+
+    image = Image.new("RGB", (width, height), (240, 240, 240))
+    for x in range(0, width, 8):
+        for y in range(0, height, 64):
+            image.putpixel((x, y), (x % 256, y % 256, 128))
+    buffer = BytesIO()
+    image.save(buffer, format=fmt)
+    return buffer.getvalue()
+
+
+def _json_samples() -> Dict[str, str]:
+    clean = json.dumps(TEXT_ANALYSIS, ensure_ascii=False)
+    return {
+        "clean": clean,
+        "fenced": f"Вот анализ:\n```json\n{clean}\n```\nНадеюсь, это поможет.",
+        "image": json.dumps(IMAGE_ANALYSIS, ensure_ascii=False),
+        "repairable": "```json\n" + clean.replace('"', "'")[:-1] + ",}\n```",
+        "garbage": "Извините, я не могу ответить на этот вопрос." * 20,
+    }
+
+
+def build_cases(scale: int) -> List[Dict[str, Any]]:
+    from fastapi_app.core import history
+    from fastapi_app.services.analysis import _extract_json
+    from fastapi_app.services.image_utils import summarize_image
+    from fastapi_app.services.yandex_vision import _parse_text_detection
+
+    cases: List[Dict[str, Any]] = []
+
+    for label, (width, height, fmt) in {
+        "png_1280x720": (1280, 720, "PNG"),
+        "jpeg_3000x2000": (3000, 2000, "JPEG"),
+    }.items():
+        image_bytes = _make_image(width, height, fmt)
+        cases.append(_case(f"summarize_image[{label}]", lambda b=image_bytes: summarize_image(b), 20))
+
+    for label, pages in {"1_page": 1, f"{10 * scale}_pages": 10 * scale}.items():
+        data = build_vision_response(pages=pages, blocks=6, lines=10, words=8)
+        cases.append(
+            _case(
+                f"_parse_text_detection[{label}]",
+                lambda d=data: _parse_text_detection(d, include_page_headers=True),
+                max(5, 200 // pages),
+            )
+        )
+
+    for label, sample in _json_samples().items():
+        cases.append(_case(f"_extract_json[{label}]", lambda s=sample: _extract_json(s), 2000))
+
+    entry = {"type": "text", "input": {"text": "x" * 500}, "output": dict(TEXT_ANALYSIS)}
+    cases.append(_case("history.save_history", lambda: history.save_history(dict(entry)), 200))
+    cases.append(_case("history.get_history", history.get_history, 500))
+    return cases
+
+
+def _case(name: str, func: Callable[[], Any], iterations: int) -> Dict[str, Any]:
+    return {"name": name, "func": func, "iterations": iterations}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks for service hot paths")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for large inputs")
+    parser.add_argument("--filter", default="", help="Run only benchmarks containing this substring")
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    configure_environment()
+    results = []
+    for case in build_cases(args.scale):
+        if args.filter and args.filter not in case["name"]:
+            continue
+        results.append(measure(case["name"], case["func"], case["iterations"]))
+    print_report(results)
+    append_results(args.json_path, "micro", results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import random
+import sys
+from io import BytesIO
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.stats import append_results, measure, print_report
+
+LINES = [
+    "Бесплатная доставка от 1000 ₽",
+    "Скидка 10% на первый заказ",
+    "Рассрочка 0-0-12 без переплаты",
+    "Premium support 24/7",
+    "Самовывоз из 120 магазинов",
+]
+# Vision reads text reliably down to roughly this glyph height
+MIN_GLYPH_PX = 10
+# mean absolute grayscale error (0-255) after scaling the processed image back to the original size
+MAX_MEAN_ERROR = 12.0
+
+
+def _font(size: int) -> Any:
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+def _render(width: int, height: int, font_size: int, noise: bool, seed: int) -> Any:
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    image = Image.new("RGB", (width, height), (250, 250, 250))
+    draw = ImageDraw.Draw(image)
+    if noise:
+        # photo-like background: smooth gradient plus sensor noise
+        for y in range(0, height, 4):
+            shade = 170 + int(60 * y / height)
+            draw.rectangle((0, y, width, y + 4), fill=(shade, shade - 20, shade - 40))
+        for _ in range(width * height // 50):
+            x, y = rng.randrange(width), rng.randrange(height)
+            image.putpixel((x, y), tuple(rng.randrange(256) for _ in range(3)))
+    font = _font(font_size)
+    y = font_size
+    while y < height - font_size * 2:
+        draw.text((font_size, y), rng.choice(LINES), fill=(20, 20, 30), font=font)
+        y += int(font_size * 1.8)
+    return image
+
+
+def _save(image: Any, fmt: str, orientation: int = 1) -> bytes:
+    buffer = BytesIO()
+    kwargs: Dict[str, Any] = {}
+    if orientation != 1:
+        exif = image.getexif()
+        exif[0x0112] = orientation
+        kwargs["exif"] = exif.tobytes()
+    if fmt == "JPEG":
+        kwargs["quality"] = 92
+    image.save(buffer, format=fmt, **kwargs)
+    return buffer.getvalue()
+
+
+def build_samples(scale: int) -> Dict[str, Tuple[bytes, int]]:
+    # label -> (encoded image, font size used for the text)
+    from PIL import Image
+
+    screenshot = _render(1440, 6000 * scale, 16, False, 1)
+    photo = _render(6000, 4000, 64, True, 2)
+    rotated = photo.transpose(Image.Transpose.ROTATE_270)
+    banner = _render(1200, 628, 36, True, 3)
+    return {
+        "screenshot_png": (_save(screenshot, "PNG"), 16),
+        "photo_jpeg_24mp": (_save(photo, "JPEG"), 64),
+        "photo_exif_rotated": (_save(rotated, "JPEG", orientation=6), 64),
+        "banner_png": (_save(banner, "PNG"), 36),
+    }
+
+
+def load_samples(directory: str) -> Dict[str, Tuple[bytes, int]]:
+    samples = {}
+    for path in sorted(Path(directory).iterdir()):
+        if path.suffix.lower() in {".png", ".jpg", ".jpeg", ".webp", ".bmp", ".tif", ".tiff"}:
+            samples[path.name] = (path.read_bytes(), 0)
+    return samples
+
+
+def mean_error(original: bytes, processed: bytes) -> float:
+    from PIL import Image, ImageChops, ImageOps, ImageStat
+
+    before = ImageOps.exif_transpose(Image.open(BytesIO(original))).convert("L")
+    after = Image.open(BytesIO(processed)).convert("L").resize(before.size, Image.BILINEAR)
+    return ImageStat.Stat(ImageChops.difference(before, after)).mean[0]
+
+
+def tesseract_recall(original: bytes, processed: bytes) -> Optional[float]:
+    try:
+        import pytesseract
+        from PIL import Image, ImageOps
+    except ImportError:
+        return None
+
+    def words(data: bytes) -> set:
+        image = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+        return set(pytesseract.image_to_string(image, lang="rus+eng").lower().split())
+
+    expected = words(original)
+    if not expected:
+        return None
+    return len(expected & words(processed)) / len(expected)
+
+
+def check_quality(samples: Dict[str, Tuple[bytes, int]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    from PIL import Image, ImageOps
+
+    from fastapi_app.services.image_utils import prepare_for_ocr
+
+    rows, problems = [], []
+    for label, (data, font_size) in samples.items():
+        processed = prepare_for_ocr(data)
+        before = ImageOps.exif_transpose(Image.open(BytesIO(data)))
+        after = Image.open(BytesIO(processed))
+        factor = after.size[0] / before.size[0]
+        error = mean_error(data, processed)
+        recall = tesseract_recall(data, processed)
+        glyph = font_size * factor if font_size else None
+        rows.append(
+            {
+                "sample": label,
+                "before": f"{before.size[0]}x{before.size[1]} {len(data) / 1024:.0f} KiB",
+                "after": f"{after.size[0]}x{after.size[1]} {after.mode} {len(processed) / 1024:.0f} KiB",
+                "saved": f"{1 - len(processed) / len(data):.0%}",
+                "glyph_px": f"{glyph:.1f}" if glyph else "-",
+                "mean_error": f"{error:.1f}",
+                "tesseract": f"{recall:.0%}" if recall is not None else "-",
+            }
+        )
+        if glyph is not None and glyph < MIN_GLYPH_PX:
+            problems.append(f"{label}: text shrinks to {glyph:.1f}px")
+        if error > MAX_MEAN_ERROR:
+            problems.append(f"{label}: mean error {error:.1f} exceeds {MAX_MEAN_ERROR}")
+        if recall is not None and recall < 0.9:
+            problems.append(f"{label}: tesseract recall {recall:.0%}")
+    return rows, problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="OCR pre-processing: payload size, latency and fidelity")
+    parser.add_argument("--images", help="Directory with sample images instead of the synthetic set")
+    parser.add_argument("--scale", type=int, default=1, help="Multiplier for the screenshot height")
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    from fastapi_app.services.image_utils import prepare_for_ocr
+
+    samples = load_samples(args.images) if args.images else build_samples(args.scale)
+    rows, problems = check_quality(samples)
+    columns = list(rows[0]) if rows else []
+    widths = {column: max(len(column), *(len(row[column]) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(row[column].ljust(widths[column]) for column in columns))
+    print()
+
+    results = [
+        measure(f"prepare_for_ocr[{label}]", lambda d=data: prepare_for_ocr(d), 5, warmup=1)
+        for label, (data, _) in samples.items()
+    ]
+    print_report(results)
+    append_results(args.json_path, "ocr_preprocess", results)
+
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import argparse
+import itertools
+import random
+import tempfile
+import time
+from typing import List
+
+from benchmarks.env import configure_environment
+from benchmarks.stats import append_results, measure, print_report
+
+SYLLABLES = "ка ро ми на те ло ви за пу се де ко ра ни мо ту ба ле го ры".split()
+PHRASES = [
+    "бесплатная доставка", "рассрочка без переплаты", "кэшбэк баллами", "гарантия возврата денег",
+    "premium support", "скидка для новых клиентов", "самовывоз из магазина", "пробный период",
+]
+QUERIES = ["бесплатная доставка", "рассрочка без переплаты", "кэшбэк", "гарантия возврата", "premium support"]
+
+
+class Corpus:
+    # Zipf-distributed vocabulary with marketing phrases in a few percent of documents
+    def __init__(self, seed: int, vocabulary: int = 20_000) -> None:
+        self.rng = random.Random(seed)
+        self.words = [
+            "".join(self.rng.choice(SYLLABLES) for _ in range(self.rng.randint(2, 4))) for _ in range(vocabulary)
+        ]
+        weights = [1.0 / rank for rank in range(1, vocabulary + 1)]
+        self.cum_weights = list(itertools.accumulate(weights))
+
+    def document(self) -> str:
+        words = self.rng.choices(self.words, cum_weights=self.cum_weights, k=self.rng.randint(40, 160))
+        for phrase in PHRASES:
+            if self.rng.random() < 0.03:
+                words.insert(self.rng.randrange(len(words) + 1), phrase)
+        return " ".join(words)
+
+
+def build_index(docs: int, seed: int) -> float:
+    from fastapi_app.core import search
+
+    corpus = Corpus(seed)
+    kinds: List[str] = sorted(search.KINDS)
+    started = time.perf_counter()
+    for index in range(docs):
+        body = corpus.document()
+        search.index_document(
+            kinds[index % len(kinds)], f"https://competitor{index % 50}.ru/{index}", body[:60], body,
+            {"strengths": [corpus.document()[:80]]},
+        )
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Search latency over a synthetic corpus")
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--embeddings", default="", help="SEARCH_EMBEDDINGS value, e.g. hashing")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", dest="json_path", help="Append results as JSON lines to this file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="cm-search-") as data_dir:
+        configure_environment(data_dir)
+        from fastapi_app.core import config, search
+
+        config.SEARCH_EMBEDDINGS = args.embeddings
+        elapsed = build_index(args.docs, args.seed)
+        print(f"indexed {args.docs} documents in {elapsed:.1f}s ({args.docs / elapsed:.0f} docs/s)")
+
+        modes = ["fts"] + (["semantic", "hybrid"] if args.embeddings else [])
+        results = []
+        for mode in modes:
+            for query in QUERIES:
+                results.append(
+                    measure(f"{mode}[{query}]", lambda q=query, m=mode: search.search(q, mode=m), 50)
+                )
+            results.append(
+                measure(f"{mode}[kind=ocr_pdf]", lambda m=mode: search.search(QUERIES[0], "ocr_pdf", m), 50)
+            )
+        print_report(results)
+        append_results(args.json_path, "search", results)
+
+
+if __name__ == "__main__":
+    main()
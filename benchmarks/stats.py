@@ -0,0 +1,75 @@
+import json
+import math
+import platform
+import resource
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        return round(peak / (1024 * 1024), 1)
+    return round(peak / 1024, 1)
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(name: str, samples: List[float], elapsed: float, errors: int = 0) -> Dict[str, Any]:
+    count = len(samples)
+    return {
+        "name": name,
+        "count": count,
+        "errors": errors,
+        "throughput": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def measure(name: str, func: Callable[[], Any], iterations: int, warmup: int = 3) -> Dict[str, Any]:
+    for _ in range(warmup):
+        func()
+    samples = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        call_started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - call_started)
+    return summarize(name, samples, time.perf_counter() - started)
+
+
+def print_report(results: List[Dict[str, Any]]) -> None:
+    header = f"{'benchmark':<32} {'count':>7} {'err':>5} {'ops/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10} {'rss MB':>8}"
+    print(header)
+    print("-" * len(header))
+    for item in results:
+        print(
+            f"{item['name']:<32} {item['count']:>7} {item['errors']:>5} {item['throughput']:>10} "
+            f"{item['p50_ms']:>10} {item['p95_ms']:>10} {item['p99_ms']:>10} {item['peak_rss_mb']:>8}"
+        )
+
+
+def append_results(path: Optional[str], suite: str, results: List[Dict[str, Any]]) -> None:
+    if not path:
+        return
+    record = {
+        "suite": suite,
+        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with Path(path).open("a", encoding="utf-8") as file:
+        file.write(json.dumps(record, ensure_ascii=False) + "\n")
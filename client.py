@@ -0,0 +1,189 @@
+import mimetypes
+import mmap
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from fastapi_app.core import cancellation
+
+Buffer = bytes | mmap.mmap
+# the server answers a blown deadline itself; give its 504 time to arrive before timing out locally
+DEADLINE_GRACE = 5
+
+
+@contextmanager
+def _map_file(path: str) -> Iterator[Buffer]:
+    with open(path, "rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            yield b""
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield buffer
+
+
+def _content_type(path: str) -> Optional[str]:
+    return mimetypes.guess_type(path)[0]
+
+
+class BackendClient:
+    def analyze_text(self, text: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def analyze_image(self, path: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def ocr_image(self, path: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def ocr_pdf(self, path: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def document_pages(self, document_id: int, first: int = 1, last: int = 0) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def parse_demo(self, url: str) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def history(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        return None
+
+
+class HttpBackendClient(BackendClient):
+    def __init__(self, base_url: str, api_key: str = "", pool_size: int = 10) -> None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self._base_url = base_url.rstrip("/")
+        self._session = requests.Session()
+        # every worker thread shares this session; keep a pooled connection per worker
+        adapter = HTTPAdapter(pool_maxsize=max(10, pool_size))
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        if api_key:
+            self._session.headers["X-API-Key"] = api_key
+
+    def analyze_text(self, text: str) -> Dict[str, Any]:
+        return self._post_json("/analyze_text", {"text": text}, 60, "Ошибка анализа текста")
+
+    def analyze_image(self, path: str) -> Dict[str, Any]:
+        return self._post_file("/analyze_image", path, 120, "Ошибка анализа изображения")
+
+    def ocr_image(self, path: str) -> Dict[str, Any]:
+        return self._post_file("/ocr_image", path, 120, "Ошибка OCR изображения")
+
+    def ocr_pdf(self, path: str) -> Dict[str, Any]:
+        return self._post_file("/ocr_pdf", path, 120, "Ошибка OCR PDF")
+
+    def document_pages(self, document_id: int, first: int = 1, last: int = 0) -> Dict[str, Any]:
+        params = {"from": first, "to": last}
+        return self._request("GET", f"/documents/{document_id}/pages", 30, "Ошибка чтения документа", params=params)
+
+    def parse_demo(self, url: str) -> Dict[str, Any]:
+        return self._post_json("/parse_demo", {"url": url}, 120, "Ошибка парсинга")
+
+    def history(self) -> Dict[str, Any]:
+        return self._request("GET", "/history", 30, "Ошибка истории")
+
+    def close(self) -> None:
+        self._session.close()
+
+    def _post_json(self, path: str, payload: Dict[str, Any], timeout: int, error: str) -> Dict[str, Any]:
+        return self._request("POST", path, timeout, error, json=payload)
+
+    def _post_file(self, path: str, file_path: str, timeout: int, error: str) -> Dict[str, Any]:
+        with open(file_path, "rb") as handle:
+            files = {"file": (os.path.basename(file_path), handle, _content_type(file_path))}
+            return self._request("POST", path, timeout, error, files=files)
+
+    def _request(self, method: str, path: str, timeout: float, error: str, **kwargs: Any) -> Dict[str, Any]:
+        import requests
+
+        # the deadline and request ID travel with the call so the server can stop on cancel
+        deadline = cancellation.timeout(timeout)
+        request_id = uuid.uuid4().hex
+        headers = {"X-Request-ID": request_id, "X-Request-Timeout": f"{deadline:.3f}"}
+        with cancellation.on_cancel(lambda: self._cancel_remote(request_id)):
+            try:
+                resp = self._session.request(
+                    method, f"{self._base_url}{path}", headers=headers, timeout=deadline + DEADLINE_GRACE, **kwargs
+                )
+            except requests.RequestException:
+                cancellation.check()
+                raise
+        cancellation.check()
+        return self._handle(resp, error)
+
+    def _cancel_remote(self, request_id: str) -> None:
+        # called from the cancelling (UI) thread; never block it on the network
+        def send() -> None:
+            try:
+                self._session.post(f"{self._base_url}/requests/{request_id}/cancel", timeout=5)
+            except Exception:
+                pass
+
+        threading.Thread(target=send, daemon=True).start()
+
+    @staticmethod
+    def _handle(resp: Any, error: str) -> Dict[str, Any]:
+        try:
+            data = resp.json()
+        except ValueError:
+            data = {}
+        if not resp.ok:
+            raise RuntimeError(data.get("detail") or error)
+        return data
+
+
+class InProcessBackendClient(BackendClient):
+    def analyze_text(self, text: str) -> Dict[str, Any]:
+        from fastapi_app.services import pipeline
+
+        return self._call(pipeline.run_text_analysis, text)
+
+    def analyze_image(self, path: str) -> Dict[str, Any]:
+        from fastapi_app.services import pipeline
+
+        return self._call_file(pipeline.run_image_analysis, path)
+
+    def ocr_image(self, path: str) -> Dict[str, Any]:
+        from fastapi_app.services import pipeline
+
+        return self._call_file(pipeline.run_image_ocr, path)
+
+    def ocr_pdf(self, path: str) -> Dict[str, Any]:
+        from fastapi_app.services import pipeline
+
+        return self._call_file(pipeline.run_pdf_ocr, path)
+
+    def document_pages(self, document_id: int, first: int = 1, last: int = 0) -> Dict[str, Any]:
+        from fastapi_app.core import documents
+
+        return self._call(documents.get_pages, document_id, first, last)
+
+    def parse_demo(self, url: str) -> Dict[str, Any]:
+        from fastapi_app.services import pipeline
+
+        return self._call(pipeline.run_parse_demo, url)
+
+    def history(self) -> Dict[str, Any]:
+        from fastapi_app.core.history import get_history
+
+        return {"items": self._call(get_history)}
+
+    def _call_file(self, func: Callable[..., Dict[str, Any]], path: str) -> Dict[str, Any]:
+        with _map_file(path) as buffer:
+            return self._call(func, buffer, os.path.basename(path), _content_type(path))
+
+    @staticmethod
+    def _call(func: Callable[..., Any], *args: Any) -> Any:
+        from fastapi import HTTPException
+
+        try:
+            return func(*args)
+        except HTTPException as exc:
+            raise RuntimeError(str(exc.detail)) from exc
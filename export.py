@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+APP_ROOT = Path(__file__).resolve().parent
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from fastapi import HTTPException
+
+from fastapi_app.core import config, export
+from fastapi_app.core.locks import atomic_write_text
+
+
+def _load_state(path: Path) -> Dict[str, int]:
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return {key: int(value) for key, value in data.items()} if isinstance(data, dict) else {}
+
+
+def _remote(url: str, api_key: str, dataset: str, fmt: str, since: int) -> Tuple[Iterator[bytes], int]:
+    import requests
+
+    response = requests.get(
+        f"{url.rstrip('/')}/export/{dataset}",
+        params={"format": fmt, "since": since},
+        headers={"X-API-Key": api_key} if api_key else {},
+        stream=True,
+        timeout=60,
+    )
+    if not response.ok:
+        raise SystemExit(f"{dataset}: {response.status_code} {response.text[:200]}")
+    return response.iter_content(chunk_size=1 << 16), int(response.headers["X-Export-Watermark"])
+
+
+def _export_one(
+    dataset: str, fmt: str, since: int, out_dir: Path, url: Optional[str], api_key: str
+) -> Optional[Tuple[Path, int]]:
+    if url:
+        stream, watermark = _remote(url, api_key, dataset, fmt, since)
+    else:
+        try:
+            stream, watermark = export.export(dataset, fmt, since)
+        except HTTPException as exc:
+            raise SystemExit(f"{dataset}: {exc.detail}") from exc
+    if watermark <= since:
+        return None
+    path = out_dir / f"{dataset}-{since}-{watermark}.{export.FORMATS[fmt][1]}"
+    partial = path.with_name(path.name + ".part")
+    # chunks go straight to disk; the file appears under its final name only when complete
+    with partial.open("wb") as handle:
+        for chunk in stream:
+            handle.write(chunk)
+    os.replace(partial, path)
+    return path, watermark
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Export stored analyses, OCR text and facts for BI")
+    parser.add_argument("datasets", nargs="*", help=f"Datasets (default: all of {', '.join(export.DATASETS)})")
+    parser.add_argument("--format", default=export.DEFAULT_FORMAT, choices=sorted(export.FORMATS))
+    parser.add_argument("--out", default="export", help="Output directory")
+    parser.add_argument("--since", type=int, help="Export rows after this watermark instead of the saved one")
+    parser.add_argument("--full", action="store_true", help="Ignore saved watermarks and export everything")
+    parser.add_argument("--state", help="Watermark file (default: <out>/watermarks.json)")
+    parser.add_argument("--url", default=config.BACKEND_URL, help="Read from a backend over HTTP, not DATA_DIR")
+    parser.add_argument("--api-key", default=config.BACKEND_API_KEY)
+    args = parser.parse_args()
+
+    datasets = args.datasets or list(export.DATASETS)
+    unknown = [name for name in datasets if name not in export.DATASETS]
+    if unknown:
+        parser.error(f"unknown datasets: {', '.join(unknown)}")
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    state_path = Path(args.state) if args.state else out_dir / "watermarks.json"
+    state = {} if args.full else _load_state(state_path)
+
+    for dataset in datasets:
+        since = args.since if args.since is not None else state.get(dataset, 0)
+        result = _export_one(dataset, args.format, since, out_dir, args.url or None, args.api_key)
+        if result is None:
+            print(f"{dataset}: no new rows after {since}")
+            continue
+        path, state[dataset] = result
+        # the watermark is saved per dataset, so an interrupted run resumes where it stopped
+        atomic_write_text(state_path, json.dumps(state, indent=2))
+        print(f"{dataset}: {path} (ids {since + 1}..{state[dataset]})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from fastapi_app.core import config, db
+from fastapi_app.core.locks import file_lock
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL);
+"""
+
+_local = threading.local()
+_key_locks: Dict[str, List[Any]] = {}
+_key_locks_guard = threading.Lock()
+
+
+def make_key(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _connect() -> sqlite3.Connection:
+    first = getattr(_local, "purged", None) != config.DATA_DIR
+    conn = db.connect("cache.sqlite3", _SCHEMA)
+    if first:
+        conn.execute("DELETE FROM cache WHERE expires_at < ?", (time.time(),))
+        _local.purged = config.DATA_DIR
+    return conn
+
+
+def lookup(key: str) -> Optional[Any]:
+    row = _connect().execute(
+        "SELECT value, expires_at FROM cache WHERE key = ?", (key,)
+    ).fetchone()
+    if not row or row[1] < time.time():
+        return None
+    return json.loads(row[0])
+
+
+def store(key: str, value: Any, ttl: float) -> None:
+    _connect().execute(
+        "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+        (key, json.dumps(value, ensure_ascii=False), time.time() + ttl),
+    )
+
+
+@contextmanager
+def single_flight(key: str) -> Iterator[None]:
+    with _key_locks_guard:
+        entry = _key_locks.setdefault(key, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        # one lock per key, so unrelated prompts never wait on each other's upstream calls
+        with entry[0], file_lock(config.DATA_DIR / "locks" / f"{key}.lock", remove=True):
+            yield
+    finally:
+        with _key_locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                _key_locks.pop(key, None)
+
+
+def cached_call(key: str, func: Callable[[], Any], ttl: float) -> Any:
+    if ttl <= 0:
+        return func()
+    value = lookup(key)
+    if value is not None:
+        return value
+    with single_flight(key):
+        value = lookup(key)
+        if value is not None:
+            return value
+        value = func()
+        if value is not None:
+            store(key, value, ttl)
+        return value
@@ -0,0 +1,274 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import socket
+import threading
+import time
+import uuid
+import weakref
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi_app.core import config
+
+logger = logging.getLogger(__name__)
+
+
+class Cancelled(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class CancelToken:
+    # shared by everything working on one request; callbacks release sockets and browsers on cancel
+    def __init__(
+        self, timeout: Optional[float] = None, request_id: Optional[str] = None, client_timeout: Optional[float] = None
+    ) -> None:
+        self.id = request_id or uuid.uuid4().hex
+        now = time.monotonic()
+        self.deadline = now + timeout if timeout else None
+        # what the client asked for itself; long streams keep only this one
+        self.client_deadline = now + client_timeout if client_timeout else None
+        self.reason = ""
+        self._lock = threading.Lock()
+        self._callbacks: Dict[int, Callable[[], None]] = {}
+        self._counter = itertools.count()
+        if self.deadline is not None:
+            _watchdog.watch(self)
+
+    @property
+    def cancelled(self) -> bool:
+        return bool(self.reason) or self.remaining() == 0
+
+    def remaining(self) -> Optional[float]:
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = "cancelled") -> None:
+        with self._lock:
+            if self.reason:
+                return
+            self.reason = reason
+            callbacks = list(self._callbacks.values())
+            self._callbacks.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as exc:
+                logger.warning("Cancel callback failed: %s", exc)
+
+    def drop_server_deadline(self) -> None:
+        with self._lock:
+            if self.deadline == self.client_deadline:
+                return
+            self.deadline = self.client_deadline
+        if self.deadline is not None:
+            _watchdog.watch(self)
+
+    def on_cancel(self, callback: Callable[[], None]) -> Callable[[], None]:
+        with self._lock:
+            if not self.reason:
+                key = next(self._counter)
+                self._callbacks[key] = callback
+                return lambda: self._forget(key)
+        callback()
+        return lambda: None
+
+    def _forget(self, key: int) -> None:
+        with self._lock:
+            self._callbacks.pop(key, None)
+
+    def check(self) -> None:
+        if self.reason == "deadline" or (not self.reason and self.remaining() == 0):
+            raise Cancelled(504, "Deadline exceeded")
+        if self.reason:
+            raise Cancelled(499, "Request cancelled")
+
+
+class _Watchdog:
+    # one thread fires every deadline so that blocked calls are interrupted, not just checked
+    def __init__(self) -> None:
+        self._heap: List[Tuple[float, int, Any]] = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+
+    def watch(self, token: CancelToken) -> None:
+        with self._cond:
+            heapq.heappush(self._heap, (token.deadline, next(self._counter), weakref.ref(token)))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="deadline-watchdog", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, ref = heapq.heappop(self._heap)
+            token = ref()
+            # the deadline may have been moved or dropped since it was scheduled
+            if token is not None and token.remaining() == 0:
+                token.cancel("deadline")
+
+
+_watchdog = _Watchdog()
+_current: ContextVar[Optional[CancelToken]] = ContextVar("cancel_token", default=None)
+_active: Dict[str, CancelToken] = {}
+_active_lock = threading.Lock()
+
+
+def current() -> Optional[CancelToken]:
+    return _current.get()
+
+
+@contextmanager
+def scope(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def check() -> None:
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def timeout(default: float) -> float:
+    # the smaller of a call's own timeout and what is left of the request deadline
+    token = _current.get()
+    if token is None:
+        return default
+    token.check()
+    remaining = token.remaining()
+    return default if remaining is None else min(default, remaining)
+
+
+@contextmanager
+def on_cancel(callback: Callable[[], None]) -> Iterator[None]:
+    token = _current.get()
+    forget = token.on_cancel(callback) if token is not None else None
+    try:
+        yield
+    finally:
+        if forget is not None:
+            forget()
+
+
+def shutdown_socket(response: Any) -> None:
+    # close() does not wake a thread blocked in recv(); shutdown() does
+    sock = getattr(getattr(getattr(response, "raw", None), "connection", None), "sock", None)
+    if sock is not None:
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+
+@contextmanager
+def registered(token: CancelToken) -> Iterator[None]:
+    # makes the token reachable by POST /requests/{id}/cancel while the work runs
+    with _active_lock:
+        _active[token.id] = token
+    try:
+        yield
+    finally:
+        with _active_lock:
+            if _active.get(token.id) is token:
+                del _active[token.id]
+
+
+def cancel_request(request_id: str) -> bool:
+    with _active_lock:
+        token = _active.get(request_id)
+    if token is None:
+        return False
+    token.cancel()
+    return True
+
+
+def stream_without_server_deadline() -> None:
+    # for responses whose length grows with the data (exports): stop on disconnect or the client's own
+    # X-Request-Timeout, not on REQUEST_TIMEOUT, which would cut the stream after the headers went out
+    token = _current.get()
+    if token is not None:
+        token.drop_server_deadline()
+
+
+def _client_timeout(value: Optional[str]) -> Optional[float]:
+    try:
+        requested = float(value) if value else 0.0
+    except ValueError:
+        requested = 0.0
+    return requested if requested > 0 else None
+
+
+def _request_timeout(requested: Optional[float]) -> Optional[float]:
+    limits = [item for item in (requested or 0.0, config.REQUEST_TIMEOUT) if item > 0]
+    return min(limits) if limits else None
+
+
+class CancellationMiddleware:
+    # gives every HTTP request a CancelToken: X-Request-Timeout sets its deadline, and it is cancelled
+    # when the client disconnects or calls POST /requests/{X-Request-ID}/cancel
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, request_scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if request_scope["type"] != "http":
+            await self.app(request_scope, receive, send)
+            return
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in request_scope["headers"]}
+        requested = _client_timeout(headers.get("x-request-timeout"))
+        token = CancelToken(_request_timeout(requested), headers.get("x-request-id"), requested)
+        has_body = headers.get("content-length", "0") != "0" or "transfer-encoding" in headers
+        pending = [] if has_body else [{"type": "http.request", "body": b"", "more_body": False}]
+        responded = False
+        watcher: Optional[asyncio.Future] = None
+
+        async def watch() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    if not responded:
+                        token.cancel("disconnected")
+                    return
+
+        async def app_receive() -> Dict[str, Any]:
+            nonlocal watcher
+            if pending:
+                return pending.pop()
+            if watcher is not None:
+                await asyncio.shield(watcher)
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                token.cancel("disconnected")
+            elif not message.get("more_body"):
+                # the body is in; from now on only a disconnect can arrive
+                watcher = asyncio.ensure_future(watch())
+            return message
+
+        async def app_send(message: Dict[str, Any]) -> None:
+            nonlocal responded
+            if message["type"] == "http.response.body" and not message.get("more_body"):
+                responded = True
+            await send(message)
+
+        if not has_body:
+            watcher = asyncio.ensure_future(watch())
+        try:
+            with registered(token), scope(token):
+                await self.app(request_scope, app_receive, app_send)
+        finally:
+            if watcher is not None:
+                watcher.cancel()
@@ -0,0 +1,260 @@
+import re
+import sqlite3
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from fastapi import HTTPException
+
+from fastapi_app.core import config, db
+from fastapi_app.core.facts import offer_keys
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY, domain TEXT NOT NULL, kind TEXT NOT NULL, created_at REAL NOT NULL, style_score REAL
+);
+CREATE INDEX IF NOT EXISTS runs_domain ON runs (domain, created_at);
+CREATE TABLE IF NOT EXISTS clusters (
+    id INTEGER PRIMARY KEY, domain TEXT NOT NULL, category TEXT NOT NULL, representative TEXT NOT NULL,
+    tokens TEXT NOT NULL, occurrences INTEGER NOT NULL, first_run INTEGER NOT NULL, last_run INTEGER NOT NULL,
+    first_seen REAL NOT NULL, last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS clusters_domain ON clusters (domain, category);
+CREATE TABLE IF NOT EXISTS current_offers (
+    domain TEXT NOT NULL, url TEXT NOT NULL, name TEXT NOT NULL, currency TEXT NOT NULL, position INTEGER NOT NULL,
+    price REAL, since REAL NOT NULL, PRIMARY KEY (domain, url, name, currency, position)
+);
+CREATE TABLE IF NOT EXISTS offer_events (
+    domain TEXT NOT NULL, url TEXT NOT NULL, name TEXT NOT NULL, event TEXT NOT NULL, price REAL,
+    previous_price REAL, currency TEXT NOT NULL, at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS offer_events_domain ON offer_events (domain, at);
+"""
+
+FINDING_CATEGORIES = ("strengths", "weaknesses", "unique_offers", "recommendations", "insights")
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_STOPWORDS = {
+    "и", "в", "во", "на", "не", "с", "со", "по", "для", "от", "до", "из", "к", "о", "об", "а", "но", "или",
+    "что", "как", "это", "the", "and", "for", "with", "of", "to", "in",
+}
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("competitors.sqlite3", _SCHEMA)
+
+
+def normalize_domain(value: str) -> str:
+    host = value.strip().lower()
+    if "://" in host:
+        host = host.split("://", 1)[1]
+    host = host.split("/", 1)[0].split(":", 1)[0]
+    return host[4:] if host.startswith("www.") else host
+
+
+def finding_tokens(text: str) -> Set[str]:
+    # crude stemming: the first five letters are enough to merge Russian word forms
+    return {token[:5] for token in _TOKEN_RE.findall(text.lower()) if token not in _STOPWORDS and len(token) > 1}
+
+
+def jaccard(left: Set[str], right: Set[str]) -> float:
+    if not left or not right:
+        return 0.0
+    return len(left & right) / len(left | right)
+
+
+def _findings(analysis: Dict[str, Any]) -> Iterable[tuple]:
+    for category in FINDING_CATEGORIES:
+        values = analysis.get(category) or []
+        for value in values if isinstance(values, list) else [values]:
+            text = " ".join(str(value).split())
+            if text:
+                yield category, text
+
+
+def _style_score(analysis: Dict[str, Any]) -> Optional[float]:
+    try:
+        return float(analysis["style_score"]) if analysis.get("style_score") is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def record_analysis(domain: str, kind: str, analysis: Dict[str, Any], at: Optional[float] = None) -> int:
+    at = time.time() if at is None else at
+    domain = normalize_domain(domain)
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        run_id = conn.execute(
+            "INSERT INTO runs (domain, kind, created_at, style_score) VALUES (?, ?, ?, ?)",
+            (domain, kind, at, _style_score(analysis)),
+        ).lastrowid
+        clusters: Dict[str, List[List[Any]]] = {}
+        for category, text in _findings(analysis):
+            if category not in clusters:
+                clusters[category] = [
+                    [cluster_id, set(tokens.split())]
+                    for cluster_id, tokens in conn.execute(
+                        "SELECT id, tokens FROM clusters WHERE domain = ? AND category = ?", (domain, category)
+                    )
+                ]
+            tokens = finding_tokens(text)
+            best_id, best_score = None, 0.0
+            for cluster_id, cluster_tokens in clusters[category]:
+                score = jaccard(tokens, cluster_tokens)
+                if score > best_score:
+                    best_id, best_score = cluster_id, score
+            if best_id is not None and best_score >= config.FINDING_SIMILARITY:
+                conn.execute(
+                    "UPDATE clusters SET occurrences = occurrences + 1, last_run = ?, last_seen = ? WHERE id = ?",
+                    (run_id, at, best_id),
+                )
+                continue
+            cluster_id = conn.execute(
+                "INSERT INTO clusters (domain, category, representative, tokens, occurrences, first_run, last_run,"
+                " first_seen, last_seen) VALUES (?, ?, ?, ?, 1, ?, ?, ?, ?)",
+                (domain, category, text, " ".join(sorted(tokens)), run_id, run_id, at, at),
+            ).lastrowid
+            clusters[category].append([cluster_id, tokens])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return run_id
+
+
+def record_offers(domain: str, url: str, offers: List[Dict[str, Any]], at: Optional[float] = None) -> None:
+    at = time.time() if at is None else at
+    domain = normalize_domain(domain)
+    seen = {key: offer.get("price") for key, offer in zip(offer_keys(offers), offers) if key[0]}
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        current = {
+            (name, currency, position): price
+            for name, currency, position, price in conn.execute(
+                "SELECT name, currency, position, price FROM current_offers WHERE domain = ? AND url = ?",
+                (domain, url),
+            )
+        }
+        events = []
+        for key, price in seen.items():
+            name, currency, position = key
+            if key not in current:
+                events.append((domain, url, name, "appeared", price, None, currency, at))
+                conn.execute(
+                    "INSERT INTO current_offers (domain, url, name, currency, position, price, since)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (domain, url, name, currency, position, price, at),
+                )
+            elif current[key] != price:
+                events.append((domain, url, name, "price_changed", price, current[key], currency, at))
+                conn.execute(
+                    "UPDATE current_offers SET price = ?, since = ?"
+                    " WHERE domain = ? AND url = ? AND name = ? AND currency = ? AND position = ?",
+                    (price, at, domain, url, name, currency, position),
+                )
+        for key, price in current.items():
+            name, currency, position = key
+            if key not in seen:
+                events.append((domain, url, name, "disappeared", price, None, currency, at))
+                conn.execute(
+                    "DELETE FROM current_offers"
+                    " WHERE domain = ? AND url = ? AND name = ? AND currency = ? AND position = ?",
+                    (domain, url, name, currency, position),
+                )
+        conn.executemany(
+            "INSERT INTO offer_events (domain, url, name, event, price, previous_price, currency, at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            events,
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _status(first_run: int, last_run: int, oldest_recent: int) -> str:
+    if last_run < oldest_recent:
+        return "stale"
+    return "new" if first_run >= oldest_recent else "recurring"
+
+
+def summary(domain: str, limit: int = 10) -> Dict[str, Any]:
+    domain = normalize_domain(domain)
+    conn = _connect()
+    runs, first_seen, last_seen = conn.execute(
+        "SELECT COUNT(*), MIN(created_at), MAX(created_at) FROM runs WHERE domain = ?", (domain,)
+    ).fetchone()
+    if not runs:
+        raise HTTPException(status_code=404, detail="Competitor not found")
+    # findings first seen within the last FINDING_STALE_RUNS runs are new, those absent from them are stale
+    recent = [row[0] for row in conn.execute(
+        "SELECT id FROM runs WHERE domain = ? ORDER BY id DESC LIMIT ?", (domain, config.FINDING_STALE_RUNS)
+    )]
+    oldest_recent = recent[-1]
+
+    findings: Dict[str, List[Dict[str, Any]]] = {}
+    for category in FINDING_CATEGORIES:
+        rows = conn.execute(
+            "SELECT representative, occurrences, first_run, last_run, first_seen, last_seen FROM clusters"
+            " WHERE domain = ? AND category = ? ORDER BY occurrences DESC, last_seen DESC LIMIT ?",
+            (domain, category, limit),
+        ).fetchall()
+        if not rows:
+            continue
+        findings[category] = [
+            {
+                "text": text,
+                "occurrences": occurrences,
+                "first_seen": first,
+                "last_seen": last,
+                "status": _status(first_run, last_run, oldest_recent),
+            }
+            for text, occurrences, first_run, last_run, first, last in rows
+        ]
+
+    scores = conn.execute(
+        "SELECT created_at, style_score FROM runs WHERE domain = ? AND style_score IS NOT NULL"
+        " ORDER BY created_at DESC LIMIT 20",
+        (domain,),
+    ).fetchall()[::-1]
+    average = conn.execute(
+        "SELECT AVG(style_score) FROM runs WHERE domain = ? AND style_score IS NOT NULL", (domain,)
+    ).fetchone()[0]
+
+    current = [
+        {"url": url, "name": name, "price": price, "currency": currency, "since": since}
+        for url, name, price, currency, since in conn.execute(
+            "SELECT url, name, price, currency, since FROM current_offers WHERE domain = ? ORDER BY since DESC LIMIT ?",
+            (domain, limit * 5),
+        )
+    ]
+    events = [
+        {
+            "url": url, "name": name, "event": event, "price": price, "previous_price": previous_price,
+            "currency": currency, "at": at,
+        }
+        for url, name, event, price, previous_price, currency, at in conn.execute(
+            "SELECT url, name, event, price, previous_price, currency, at FROM offer_events"
+            " WHERE domain = ? ORDER BY at DESC LIMIT ?",
+            (domain, limit * 5),
+        )
+    ]
+    return {
+        "domain": domain,
+        "runs": runs,
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+        "findings": findings,
+        "style_score": {
+            "latest": scores[-1][1] if scores else None,
+            "average": average,
+            "delta": scores[-1][1] - scores[-2][1] if len(scores) > 1 else None,
+            "history": [{"at": at, "score": score} for at, score in scores],
+        },
+        "offers": {
+            "current": current,
+            "appeared": [event for event in events if event["event"] == "appeared"],
+            "disappeared": [event for event in events if event["event"] == "disappeared"],
+            "price_changed": [event for event in events if event["event"] == "price_changed"],
+        },
+    }
@@ -8,11 +8,16 @@ PROJECT_ROOT = BASE_DIR.parent
 
 load_dotenv(PROJECT_ROOT / ".env")
 
-HISTORY_PATH = PROJECT_ROOT / "history.json"
+DATA_DIR = Path(os.getenv("DATA_DIR") or PROJECT_ROOT)
+HISTORY_PATH = DATA_DIR / "history.json"
 
 GIGACHAT_CLIENT_ID = os.getenv("GIGACHAT_CLIENT_ID", "")
 GIGACHAT_CLIENT_SECRET = os.getenv("GIGACHAT_CLIENT_SECRET", "")
 GIGACHAT_MODEL = os.getenv("GIGACHAT_MODEL", "GigaChat")
+GIGACHAT_AUTH_URL = (
+    os.getenv("GIGACHAT_AUTH_URL") or "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+)
+GIGACHAT_API_URL = os.getenv("GIGACHAT_API_URL") or "https://gigachat.devices.sberbank.ru/api/v1"
 GIGACHAT_CA_CERT = os.getenv("GIGACHAT_CA_CERT", "")
 GIGACHAT_SKIP_VERIFY = os.getenv("GIGACHAT_SKIP_VERIFY", "").strip().lower() in {
     "1",
@@ -25,6 +30,91 @@ YC_FOLDER_ID = os.getenv("YC_FOLDER_ID", "")
 YC_ART_MODEL_URI = os.getenv(
     "YC_ART_MODEL_URI", f"art://{YC_FOLDER_ID}/yandex-art/latest" if YC_FOLDER_ID else ""
 )
+YC_VISION_URL = (
+    os.getenv("YC_VISION_URL") or "https://vision.api.cloud.yandex.net/vision/v1/batchAnalyze"
+)
 YC_SKIP_VERIFY = os.getenv("YC_SKIP_VERIFY", "").strip().lower() in {"1", "true", "yes"}
 
 CHROME_DRIVER_PATH = os.getenv("CHROME_DRIVER_PATH", "")
+
+SERVER_HOST = os.getenv("SERVER_HOST") or "0.0.0.0"
+SERVER_PORT = int(os.getenv("SERVER_PORT") or 8000)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS") or os.cpu_count() or 1)
+SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT") or 30)
+# upper bound for any request deadline; clients may ask for less with X-Request-Timeout (0 disables)
+REQUEST_TIMEOUT = float(os.getenv("REQUEST_TIMEOUT") or 600)
+
+BACKEND_API_KEY = os.getenv("BACKEND_API_KEY", "")
+BACKEND_MODE = (os.getenv("BACKEND_MODE") or "inprocess").strip().lower()
+BACKEND_URL = os.getenv("BACKEND_URL", "")
+BATCH_CONCURRENCY = int(os.getenv("BATCH_CONCURRENCY") or 4)
+
+TENANTS_PATH = os.getenv("TENANTS_PATH", "")
+GIGACHAT_STREAM = os.getenv("GIGACHAT_STREAM", "true").strip().lower() in {"1", "true", "yes"}
+LLM_REASK = os.getenv("LLM_REASK", "true").strip().lower() in {"1", "true", "yes"}
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL") or 7 * 24 * 3600)
+# model tiers, cheapest first: a request starts on the cheapest tier its size and task allow and moves
+# up only when the answer is invalid or incomplete
+GIGACHAT_MODELS = [
+    item.strip() for item in (os.getenv("GIGACHAT_MODELS") or GIGACHAT_MODEL).split(",") if item.strip()
+]
+# prompts of at least N tokens skip a tier, one threshold per tier above the first
+ROUTE_TOKEN_THRESHOLDS = [
+    int(item) for item in (os.getenv("ROUTE_TOKEN_THRESHOLDS") or "1500,2800").split(",") if item.strip()
+]
+# lowest tier per task (text, image, site), e.g. "site=1"
+ROUTE_TASK_TIERS = {
+    key.strip(): int(value)
+    for key, _, value in (item.partition("=") for item in (os.getenv("ROUTE_TASK_TIERS") or "").split(","))
+    if key.strip() and value.strip()
+}
+# share of schema fields that must be non-empty for an answer to be accepted without escalation;
+# below 1.0 so that a correctly empty list (no unique offers) does not escalate
+ROUTE_MIN_COMPLETENESS = float(os.getenv("ROUTE_MIN_COMPLETENESS") or 0.75)
+# gigachat, keywords (local TF-IDF extractor) or llama (GGUF model via llama-cpp-python); auto picks
+# gigachat when its credentials are set, otherwise llama when LOCAL_MODEL_PATH is set, otherwise keywords
+ANALYSIS_PROVIDER = (os.getenv("ANALYSIS_PROVIDER") or "auto").strip().lower()
+LOCAL_MODEL_PATH = os.getenv("LOCAL_MODEL_PATH", "")
+LOCAL_MODEL_CTX = int(os.getenv("LOCAL_MODEL_CTX") or 4096)
+LOCAL_MODEL_THREADS = int(os.getenv("LOCAL_MODEL_THREADS") or 0)
+LOCAL_MODEL_MAX_TOKENS = int(os.getenv("LOCAL_MODEL_MAX_TOKENS") or 512)
+# short analyses arriving within PACK_WINDOW_MS of each other go to the model as one prompt (0 disables)
+PACK_WINDOW_MS = float(os.getenv("PACK_WINDOW_MS") or 15)
+PACK_MAX_ITEMS = int(os.getenv("PACK_MAX_ITEMS") or 8)
+PACK_MAX_ITEM_TOKENS = int(os.getenv("PACK_MAX_ITEM_TOKENS") or 300)
+# price per 1000 tokens, e.g. "GigaChat=0.2,GigaChat-Pro=1.5"; models without a price have no cost
+GIGACHAT_PRICES = {
+    key.strip(): float(value)
+    for key, _, value in (item.partition("=") for item in (os.getenv("GIGACHAT_PRICES") or "").split(","))
+    if key.strip() and value.strip()
+}
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET") or 3000)
+MAIN_CONTENT_MIN_CHARS = int(os.getenv("MAIN_CONTENT_MIN_CHARS") or 200)
+TEMPLATE_MIN_PAGES = int(os.getenv("TEMPLATE_MIN_PAGES") or 3)
+TEMPLATE_MIN_SHARE = float(os.getenv("TEMPLATE_MIN_SHARE") or 0.6)
+SNAPSHOT_KEYFRAME_INTERVAL = int(os.getenv("SNAPSHOT_KEYFRAME_INTERVAL") or 10)
+SNAPSHOT_ZSTD_LEVEL = int(os.getenv("SNAPSHOT_ZSTD_LEVEL") or 10)
+SEARCH_EMBEDDINGS = (os.getenv("SEARCH_EMBEDDINGS") or "").strip()
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES") or 5000)
+FINDING_SIMILARITY = float(os.getenv("FINDING_SIMILARITY") or 0.5)
+FINDING_STALE_RUNS = int(os.getenv("FINDING_STALE_RUNS") or 3)
+OCR_PREPROCESS = os.getenv("OCR_PREPROCESS", "true").strip().lower() in {"1", "true", "yes"}
+OCR_MAX_MEGAPIXELS = float(os.getenv("OCR_MAX_MEGAPIXELS") or 8)
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "true").strip().lower() in {"1", "true", "yes"}
+OCR_FORMAT = (os.getenv("OCR_FORMAT") or "auto").strip().lower()
+OCR_JPEG_QUALITY = int(os.getenv("OCR_JPEG_QUALITY") or 85)
+# WebP cannot encode images taller than 16383 px
+SCREENSHOT_MAX_HEIGHT = min(int(os.getenv("SCREENSHOT_MAX_HEIGHT") or 16000), 16383)
+SCREENSHOT_QUALITY = int(os.getenv("SCREENSHOT_QUALITY") or 80)
+SCREENSHOT_THUMB_WIDTH = int(os.getenv("SCREENSHOT_THUMB_WIDTH") or 320)
+CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES") or 20)
+CRAWL_MAX_DEPTH = int(os.getenv("CRAWL_MAX_DEPTH") or 2)
+CRAWL_WORKERS = int(os.getenv("CRAWL_WORKERS") or 2)
+CRAWL_DELAY = float(os.getenv("CRAWL_DELAY") or 1.0)
+CRAWL_MAX_SECONDS = float(os.getenv("CRAWL_MAX_SECONDS") or 300)
+CRAWL_REQUEST_TIMEOUT = float(os.getenv("CRAWL_REQUEST_TIMEOUT") or 10)
+CRAWL_USER_AGENT = os.getenv("CRAWL_USER_AGENT") or "CompetitorMonitoringBot"
+# background jobs (site crawls) run at the same time per worker process
+JOB_WORKERS = int(os.getenv("JOB_WORKERS") or 2)
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS") or 5000)
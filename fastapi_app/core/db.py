@@ -0,0 +1,24 @@
+import sqlite3
+import threading
+from pathlib import Path
+
+from fastapi_app.core import config
+
+_local = threading.local()
+
+
+def connect(name: str, schema: str) -> sqlite3.Connection:
+    path: Path = config.DATA_DIR / name
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    conn = connections.get(path)
+    if conn is not None:
+        return conn
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(schema)
+    connections[path] = conn
+    return conn
@@ -0,0 +1,74 @@
+import sqlite3
+import time
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+
+from fastapi_app.core import db
+from fastapi_app.core.ocr_layout import OcrPage
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY, kind TEXT NOT NULL, filename TEXT NOT NULL, created_at REAL NOT NULL,
+    pages INTEGER NOT NULL, chars INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    document_id INTEGER NOT NULL, number INTEGER NOT NULL, layout BLOB NOT NULL,
+    PRIMARY KEY (document_id, number)
+);
+"""
+
+# upper bound for one /documents/{id}/pages response
+MAX_PAGES_PER_REQUEST = 50
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("ocr.sqlite3", _SCHEMA)
+
+
+def save_document(kind: str, filename: str, pages: List[OcrPage], chars: int) -> int:
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        document_id = conn.execute(
+            "INSERT INTO documents (kind, filename, created_at, pages, chars) VALUES (?, ?, ?, ?, ?)",
+            (kind, filename, time.time(), len(pages), chars),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO pages (document_id, number, layout) VALUES (?, ?, ?)",
+            ((document_id, page.number, page.to_bytes()) for page in pages),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return document_id
+
+
+def get_pages(document_id: int, first: int = 1, last: int = 0, words: bool = False) -> Dict[str, Any]:
+    conn = _connect()
+    row = conn.execute(
+        "SELECT kind, filename, created_at, pages, chars FROM documents WHERE id = ?", (document_id,)
+    ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Document not found")
+    kind, filename, created_at, page_count, chars = row
+    last = min(last or page_count, page_count, first + MAX_PAGES_PER_REQUEST - 1)
+    if first > last and page_count:
+        raise HTTPException(status_code=400, detail="Page range is out of bounds")
+    # only the requested pages are read and decoded
+    rows = conn.execute(
+        "SELECT number, layout FROM pages WHERE document_id = ? AND number BETWEEN ? AND ? ORDER BY number",
+        (document_id, first, last),
+    ).fetchall()
+    return {
+        "id": document_id,
+        "kind": kind,
+        "filename": filename,
+        "created_at": created_at,
+        "page_count": page_count,
+        "chars": chars,
+        "first_page": first,
+        "last_page": last,
+        "pages": [OcrPage.from_bytes(number, layout).to_dict(words) for number, layout in rows],
+    }
@@ -0,0 +1,48 @@
+import math
+import re
+import threading
+import zlib
+from array import array
+from typing import Any, List
+
+from fastapi_app.core import config
+
+HASHING_DIMS = 512
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_model: Any = None
+_model_lock = threading.Lock()
+
+
+def enabled() -> bool:
+    return bool(config.SEARCH_EMBEDDINGS)
+
+
+def _hashing(text: str) -> List[float]:
+    # character trigram feature hashing: cheap, dependency-free, tolerant to Russian word endings
+    vector = [0.0] * HASHING_DIMS
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        for index in range(len(padded) - 2):
+            digest = zlib.crc32(padded[index : index + 3].encode("utf-8"))
+            vector[digest % HASHING_DIMS] += -1.0 if digest & 0x80000000 else 1.0
+    norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+    return [value / norm for value in vector]
+
+
+def _sentence_transformer() -> Any:
+    global _model
+    with _model_lock:
+        if _model is None:
+            from sentence_transformers import SentenceTransformer
+
+            _model = SentenceTransformer(config.SEARCH_EMBEDDINGS)
+        return _model
+
+
+def embed(text: str) -> bytes:
+    if config.SEARCH_EMBEDDINGS == "hashing":
+        values = _hashing(text)
+    else:
+        values = _sentence_transformer().encode([text], normalize_embeddings=True)[0].tolist()
+    return array("f", values).tobytes()
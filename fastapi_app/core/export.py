@@ -0,0 +1,185 @@
+import csv
+import importlib.util
+import io
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from fastapi import HTTPException
+
+from fastapi_app.core import cancellation, competitors, config, facts, search
+
+
+@dataclass(frozen=True)
+class Dataset:
+    connect: Callable[[], sqlite3.Connection]
+    table: str
+    # monotonic integer column: rows are read in key order and the largest key is the watermark
+    key: str
+    columns: Tuple[Tuple[str, str], ...]
+
+
+DATASETS: Dict[str, Dataset] = {
+    "documents": Dataset(
+        search._connect,
+        "documents",
+        "id",
+        (("kind", "str"), ("source", "str"), ("created_at", "float"), ("title", "str"), ("body", "str"),
+         ("findings", "str")),
+    ),
+    "pages": Dataset(
+        facts._connect,
+        "pages",
+        "id",
+        (("url", "str"), ("domain", "str"), ("captured_at", "float"), ("title", "str"), ("facts", "str")),
+    ),
+    "offers": Dataset(
+        facts._connect,
+        "offers",
+        "rowid",
+        (("page_id", "int"), ("domain", "str"), ("url", "str"), ("name", "str"), ("price", "float"),
+         ("currency", "str"), ("position", "int"), ("availability", "str"), ("source", "str"), ("captured_at", "float")),
+    ),
+    "offer_events": Dataset(
+        competitors._connect,
+        "offer_events",
+        "rowid",
+        (("domain", "str"), ("url", "str"), ("name", "str"), ("event", "str"), ("price", "float"),
+         ("previous_price", "float"), ("currency", "str"), ("at", "float")),
+    ),
+    "competitor_runs": Dataset(
+        competitors._connect,
+        "runs",
+        "id",
+        (("domain", "str"), ("kind", "str"), ("created_at", "float"), ("style_score", "float")),
+    ),
+}
+FORMATS = {
+    "jsonl": ("application/x-ndjson", "jsonl"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+_HAS_ARROW = importlib.util.find_spec("pyarrow") is not None
+# the command-line export writes Parquet when pyarrow is installed and JSON Lines otherwise
+DEFAULT_FORMAT = "parquet" if _HAS_ARROW else "jsonl"
+
+
+def _dataset(name: str) -> Dataset:
+    if name not in DATASETS:
+        raise HTTPException(status_code=404, detail="Unknown dataset")
+    return DATASETS[name]
+
+
+def column_names(name: str) -> List[str]:
+    return ["id"] + [column for column, _ in _dataset(name).columns]
+
+
+def watermark(name: str) -> int:
+    spec = _dataset(name)
+    row = spec.connect().execute(f"SELECT MAX({spec.key}) FROM {spec.table}").fetchone()
+    return int(row[0] or 0)
+
+
+def iter_chunks(name: str, since: int, until: int, chunk_rows: int) -> Iterator[List[tuple]]:
+    # keyset pagination: every chunk is an independent short query, so memory does not grow with the
+    # table and no read transaction stays open while the client consumes the stream
+    spec = _dataset(name)
+    columns = ", ".join(column for column, _ in spec.columns)
+    sql = (
+        f"SELECT {spec.key}, {columns} FROM {spec.table} WHERE {spec.key} > ? AND {spec.key} <= ? "
+        f"ORDER BY {spec.key} LIMIT ?"
+    )
+    last = since
+    token = cancellation.current()
+    while last < until:
+        if token is not None and token.reason == "disconnected":
+            return
+        # a blown deadline breaks the stream instead of ending it, so a truncated export never looks complete
+        cancellation.check()
+        rows = spec.connect().execute(sql, (last, until, chunk_rows)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last = rows[-1][0]
+
+
+def _jsonl(names: List[str], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    for rows in chunks:
+        yield "".join(json.dumps(dict(zip(names, row)), ensure_ascii=False) + "\n" for row in rows).encode("utf-8")
+
+
+def _csv(names: List[str], chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(names)
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _Sink:
+    # write-only file object that hands out whatever pyarrow has written since the last take()
+    def __init__(self) -> None:
+        self._parts: List[bytes] = []
+        self.closed = False
+
+    def write(self, data: Any) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow(name: str, fmt: str, chunks: Iterator[List[tuple]]) -> Iterator[bytes]:
+    import pyarrow as pa
+
+    types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    spec = _dataset(name)
+    schema = pa.schema([("id", pa.int64())] + [(column, types[kind]) for column, kind in spec.columns])
+    sink = _Sink()
+    output = pa.PythonFile(sink, mode="w")
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+
+        writer = pq.ParquetWriter(output, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(output, schema)
+    try:
+        for rows in chunks:
+            # one record batch (a Parquet row group) per chunk
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*rows), schema)]
+            writer.write_batch(pa.record_batch(arrays, schema=schema))
+            yield sink.take()
+    finally:
+        writer.close()
+    yield sink.take()
+
+
+def export(name: str, fmt: str, since: int = 0) -> Tuple[Iterator[bytes], int]:
+    _dataset(name)
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    if fmt in {"parquet", "arrow"} and not _HAS_ARROW:
+        raise HTTPException(status_code=400, detail="Parquet and Arrow export require the pyarrow package")
+    # the range is fixed up front so that rows written during the export go to the next one
+    until = max(since, watermark(name))
+    chunks = iter_chunks(name, since, until, config.EXPORT_CHUNK_ROWS)
+    if fmt == "jsonl":
+        return _jsonl(column_names(name), chunks), until
+    if fmt == "csv":
+        return _csv(column_names(name), chunks), until
+    return _arrow(name, fmt, chunks), until
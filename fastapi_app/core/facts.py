@@ -0,0 +1,109 @@
+import json
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi_app.core import db
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY, url TEXT NOT NULL, domain TEXT NOT NULL, captured_at REAL NOT NULL,
+    title TEXT NOT NULL, facts TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_domain ON pages (domain, captured_at);
+CREATE TABLE IF NOT EXISTS offers (
+    page_id INTEGER NOT NULL, domain TEXT NOT NULL, url TEXT NOT NULL, name TEXT NOT NULL,
+    price REAL, currency TEXT NOT NULL, position INTEGER NOT NULL, availability TEXT NOT NULL,
+    source TEXT NOT NULL, captured_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS offers_series ON offers (url, source, name, currency, position, captured_at);
+CREATE INDEX IF NOT EXISTS offers_domain ON offers (domain, captured_at);
+"""
+
+_OFFER_COLUMNS = (
+    "domain", "url", "name", "price", "currency", "position", "availability", "source", "captured_at"
+)
+_CHANGE_COLUMNS = (
+    "domain", "url", "name", "currency", "position", "source", "previous_price", "price", "previous_at",
+    "captured_at",
+)
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("facts.sqlite3", _SCHEMA)
+
+
+def offer_keys(offers: List[Dict[str, Any]]) -> List[Tuple[str, str, int]]:
+    # (name, currency, position): offers sharing a name and currency are told apart by their order on the page
+    counts: Dict[Tuple[str, str], int] = {}
+    keys = []
+    for offer in offers:
+        series = (offer.get("name") or "", offer.get("currency") or "")
+        counts[series] = counts.get(series, -1) + 1
+        keys.append((series[0], series[1], counts[series]))
+    return keys
+
+
+def save_facts(url: str, domain: str, facts: Dict[str, Any], captured_at: Optional[float] = None) -> int:
+    captured_at = time.time() if captured_at is None else captured_at
+    offers = facts.get("offers", [])
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        page_id = conn.execute(
+            "INSERT INTO pages (url, domain, captured_at, title, facts) VALUES (?, ?, ?, ?, ?)",
+            (url, domain, captured_at, facts.get("title") or "", json.dumps(facts, ensure_ascii=False)),
+        ).lastrowid
+        conn.executemany(
+            "INSERT INTO offers (page_id, domain, url, name, price, currency, position, availability, source,"
+            " captured_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (
+                    page_id,
+                    domain,
+                    url,
+                    offer["name"],
+                    offer["price"],
+                    offer["currency"],
+                    position,
+                    offer["availability"],
+                    offer["source"],
+                    captured_at,
+                )
+                for offer, (_, _, position) in zip(offers, offer_keys(offers))
+            ],
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return page_id
+
+
+def latest_offers(domain: Optional[str] = None, limit: int = 200) -> List[Dict[str, Any]]:
+    rows = _connect().execute(
+        f"SELECT {', '.join(_OFFER_COLUMNS)} FROM offers WHERE page_id IN ("
+        " SELECT MAX(id) FROM pages WHERE (?1 IS NULL OR domain = ?1) GROUP BY url"
+        ") ORDER BY captured_at DESC, rowid LIMIT ?2",
+        (domain, limit),
+    )
+    return [dict(zip(_OFFER_COLUMNS, row)) for row in rows]
+
+
+def offer_changes(
+    domain: Optional[str] = None, since: Optional[float] = None, limit: int = 200
+) -> List[Dict[str, Any]]:
+    rows = _connect().execute(
+        f"SELECT {', '.join(_CHANGE_COLUMNS)} FROM ("
+        " SELECT domain, url, name, currency, position, source, price, captured_at, page_id,"
+        "  LAG(price) OVER series AS previous_price, LAG(captured_at) OVER series AS previous_at,"
+        "  LAG(page_id) OVER series AS previous_page"
+        " FROM offers WHERE (?1 IS NULL OR domain = ?1)"
+        " WINDOW series AS (PARTITION BY url, source, name, currency, position ORDER BY captured_at, rowid)"
+        # a series is compared across snapshots only, never within one capture
+        ") WHERE previous_page IS NOT NULL AND previous_page != page_id AND price IS NOT previous_price"
+        " AND captured_at >= ?2"
+        " ORDER BY captured_at DESC LIMIT ?3",
+        (domain, since or 0, limit),
+    )
+    return [dict(zip(_CHANGE_COLUMNS, row)) for row in rows]
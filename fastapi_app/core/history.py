@@ -6,6 +6,7 @@ from typing import Any, Dict, List
 from fastapi import HTTPException
 
 from fastapi_app.core.config import HISTORY_PATH
+from fastapi_app.core.locks import atomic_write_text, file_lock
 
 
 def _read_history(path: Path) -> List[Dict[str, Any]]:
@@ -22,16 +23,16 @@ def _read_history(path: Path) -> List[Dict[str, Any]]:
 
 
 def _write_history(path: Path, items: List[Dict[str, Any]]) -> None:
-    with path.open("w", encoding="utf-8") as file:
-        json.dump(items, file, ensure_ascii=False, indent=2)
+    atomic_write_text(path, json.dumps(items, ensure_ascii=False, indent=2))
 
 
 def save_history(entry: Dict[str, Any]) -> None:
-    history = _read_history(HISTORY_PATH)
     entry["timestamp"] = datetime.utcnow().isoformat() + "Z"
-    history.append(entry)
-    history = history[-10:]
-    _write_history(HISTORY_PATH, history)
+    with file_lock(HISTORY_PATH.with_name(HISTORY_PATH.name + ".lock")):
+        history = _read_history(HISTORY_PATH)
+        history.append(entry)
+        history = history[-10:]
+        _write_history(HISTORY_PATH, history)
 
 
 def get_history() -> List[Dict[str, Any]]:
@@ -0,0 +1,155 @@
+import contextvars
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException
+
+from fastapi_app.core import cancellation, config, db
+from fastapi_app.core.tenants import current_tenant, pid_alive
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY, kind TEXT NOT NULL, tenant TEXT NOT NULL, pid INTEGER NOT NULL,
+    status TEXT NOT NULL, created_at REAL NOT NULL,
+    started_at REAL, finished_at REAL, heartbeat_at REAL NOT NULL, cancel_requested INTEGER NOT NULL DEFAULT 0,
+    result TEXT, error TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created_at);
+CREATE INDEX IF NOT EXISTS jobs_tenant ON jobs (tenant, status);
+"""
+
+# a running job refreshes its heartbeat this often; one silent for STALE_AFTER died with its worker
+HEARTBEAT_SECONDS = 2.0
+STALE_AFTER = 30.0
+FINISHED = ("done", "error", "cancelled")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("jobs.sqlite3", _SCHEMA)
+
+
+def _pool() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max(1, config.JOB_WORKERS), thread_name_prefix="job")
+        return _executor
+
+
+def _update(job_id: str, **fields: Any) -> None:
+    columns = ", ".join(f"{name} = ?" for name in fields)
+    _connect().execute(f"UPDATE jobs SET {columns} WHERE id = ?", (*fields.values(), job_id))
+
+
+def _watch(job_id: str, token: cancellation.CancelToken, finished: threading.Event) -> None:
+    # the job may be cancelled from any worker process, so the flag is polled from the database
+    while not finished.wait(HEARTBEAT_SECONDS):
+        row = _connect().execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row[0]:
+            token.cancel()
+        _update(job_id, heartbeat_at=time.time())
+
+
+def _run(job_id: str, func: Callable[[], Dict[str, Any]]) -> None:
+    # a fresh token: the job outlives the request that started it and its deadline
+    token = cancellation.CancelToken(request_id=job_id)
+    finished = threading.Event()
+    now = time.time()
+    started = _connect().execute(
+        "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ? AND status = 'queued'",
+        (now, now, job_id),
+    ).rowcount
+    if not started:
+        # cancelled while it was queued
+        return
+    threading.Thread(target=_watch, args=(job_id, token, finished), name=f"job-{job_id}", daemon=True).start()
+    status, result, error = "error", None, None
+    try:
+        with cancellation.registered(token), cancellation.scope(token):
+            token.check()
+            result = json.dumps(func(), ensure_ascii=False)
+            status = "done"
+    except cancellation.Cancelled as exc:
+        status, error = "cancelled", exc.detail
+    except HTTPException as exc:
+        error = str(exc.detail)
+    except Exception as exc:
+        error = str(exc) or exc.__class__.__name__
+    finally:
+        finished.set()
+        _update(job_id, status=status, finished_at=time.time(), heartbeat_at=time.time(), result=result, error=error)
+
+
+def submit(kind: str, func: Callable[[], Dict[str, Any]]) -> Dict[str, Any]:
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    tenant = current_tenant.get()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if tenant.max_concurrency:
+            # the request slot is released with the 202, so the tenant's limit also caps its unfinished jobs;
+            # jobs of a worker process that is gone no longer count
+            pids = conn.execute(
+                "SELECT pid FROM jobs WHERE tenant = ? AND status IN ('queued', 'running')", (tenant.name,)
+            ).fetchall()
+            if sum(1 for (pid,) in pids if pid == os.getpid() or pid_alive(pid)) >= tenant.max_concurrency:
+                raise HTTPException(status_code=429, detail="Too many unfinished jobs")
+        conn.execute(
+            "INSERT INTO jobs (id, kind, tenant, pid, status, created_at, heartbeat_at)"
+            " VALUES (?, ?, ?, ?, 'queued', ?, ?)",
+            (job_id, kind, tenant.name, os.getpid(), now, now),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    # the job keeps the caller's context (tenant) but not its cancel token
+    context = contextvars.copy_context()
+    _pool().submit(context.run, _run, job_id, func)
+    return get(job_id)
+
+
+def get(job_id: str) -> Dict[str, Any]:
+    row = _connect().execute(
+        "SELECT kind, status, created_at, started_at, finished_at, heartbeat_at, result, error FROM jobs WHERE id = ?",
+        (job_id,),
+    ).fetchone()
+    if not row:
+        raise HTTPException(status_code=404, detail="Job not found")
+    kind, status, created_at, started_at, finished_at, heartbeat_at, result, error = row
+    if status == "running" and time.time() - heartbeat_at > STALE_AFTER:
+        status, error = "error", "Worker stopped before the job finished"
+    return {
+        "id": job_id,
+        "kind": kind,
+        "status": status,
+        "created_at": created_at,
+        "started_at": started_at,
+        "finished_at": finished_at,
+        "result": json.loads(result) if result else None,
+        "error": error,
+    }
+
+
+def cancel(job_id: str) -> Dict[str, Any]:
+    job = get(job_id)
+    if job["status"] not in FINISHED:
+        _connect().execute("UPDATE jobs SET cancel_requested = 1 WHERE id = ?", (job_id,))
+        # a queued job is dropped right away; a running one stops at its next check
+        _connect().execute(
+            "UPDATE jobs SET status = 'cancelled', finished_at = ?, error = 'Request cancelled'"
+            " WHERE id = ? AND status = 'queued'",
+            (time.time(), job_id),
+        )
+        cancellation.cancel_request(job_id)
+    return get(job_id)
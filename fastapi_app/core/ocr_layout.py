@@ -0,0 +1,159 @@
+import struct
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class OcrPage:
+    # one recognized page in flat arrays instead of nested dicts: word i has its text in words[i], its
+    # bounding box in boxes[4 * i : 4 * i + 4] (x0, y0, x1, y1) and its confidence in confidences[i];
+    # line j covers words line_starts[j] .. line_starts[j + 1], block k covers lines block_starts[k] ..
+    __slots__ = ("number", "width", "height", "words", "boxes", "confidences", "line_starts", "block_starts")
+
+    def __init__(self, number: int, width: int = 0, height: int = 0) -> None:
+        self.number = number
+        self.width = width
+        self.height = height
+        self.words: List[str] = []
+        self.boxes = array("i")
+        self.confidences = array("f")
+        self.line_starts = array("I")
+        self.block_starts = array("I")
+
+    def _line_end(self, line: int) -> int:
+        return self.line_starts[line + 1] if line + 1 < len(self.line_starts) else len(self.words)
+
+    def _block_end(self, block: int) -> int:
+        return self.block_starts[block + 1] if block + 1 < len(self.block_starts) else len(self.line_starts)
+
+    def line_text(self, line: int) -> str:
+        return " ".join(self.words[self.line_starts[line] : self._line_end(line)]).strip()
+
+    def block_lines(self, block: int) -> range:
+        return range(self.block_starts[block], self._block_end(block))
+
+    def text(self) -> str:
+        return "".join(self.iter_text()).strip()
+
+    def _span(self, start: int, end: int) -> Tuple[List[int], float]:
+        # bounding box and mean confidence of words start .. end
+        if start >= end:
+            return [0, 0, 0, 0], 0.0
+        boxes = self.boxes
+        box = [
+            min(boxes[4 * index] for index in range(start, end)),
+            min(boxes[4 * index + 1] for index in range(start, end)),
+            max(boxes[4 * index + 2] for index in range(start, end)),
+            max(boxes[4 * index + 3] for index in range(start, end)),
+        ]
+        return box, round(sum(self.confidences[start:end]) / (end - start), 4)
+
+    def to_dict(self, words: bool = False) -> Dict[str, Any]:
+        blocks = []
+        for block in range(len(self.block_starts)):
+            lines = []
+            for line in self.block_lines(block):
+                start, end = self.line_starts[line], self._line_end(line)
+                box, confidence = self._span(start, end)
+                item: Dict[str, Any] = {"text": self.line_text(line), "box": box, "confidence": confidence}
+                if words:
+                    item["words"] = [
+                        {
+                            "text": self.words[index],
+                            "box": list(self.boxes[4 * index : 4 * index + 4]),
+                            "confidence": round(self.confidences[index], 4),
+                        }
+                        for index in range(start, end)
+                    ]
+                lines.append(item)
+            lines_range = self.block_lines(block)
+            first = self.line_starts[lines_range.start] if lines_range else 0
+            last = self._line_end(lines_range.stop - 1) if lines_range else 0
+            box, confidence = self._span(first, last)
+            blocks.append({"box": box, "confidence": confidence, "lines": lines})
+        return {
+            "number": self.number,
+            "width": self.width,
+            "height": self.height,
+            "text": self.text(),
+            "blocks": blocks,
+        }
+
+    def to_bytes(self) -> bytes:
+        # stored form: counts, the arrays as raw bytes, then the words; zlib-compressed
+        words = "\x1f".join(self.words).encode("utf-8")
+        header = struct.pack(
+            "<6I", self.width, self.height, len(self.words), len(self.line_starts), len(self.block_starts), len(words)
+        )
+        parts = (header, self.boxes.tobytes(), self.confidences.tobytes(), self.line_starts.tobytes(),
+                 self.block_starts.tobytes(), words)
+        return zlib.compress(b"".join(parts), 6)
+
+    @classmethod
+    def from_bytes(cls, number: int, data: bytes) -> "OcrPage":
+        data = zlib.decompress(data)
+        width, height, word_count, line_count, block_count, words_size = struct.unpack_from("<6I", data)
+        page = cls(number, width, height)
+        offset = struct.calcsize("<6I")
+        for target, count in (
+            (page.boxes, 4 * word_count),
+            (page.confidences, word_count),
+            (page.line_starts, line_count),
+            (page.block_starts, block_count),
+        ):
+            size = count * target.itemsize
+            target.frombytes(data[offset : offset + size])
+            offset += size
+        words = data[offset : offset + words_size].decode("utf-8")
+        page.words = words.split("\x1f") if word_count else []
+        return page
+
+    def iter_text(self) -> Iterator[str]:
+        # the same layout as before: a line per row, an empty row after every block
+        for block in range(len(self.block_starts)):
+            for line in self.block_lines(block):
+                text = self.line_text(line)
+                if text:
+                    yield text + "\n"
+            yield "\n"
+
+
+def _box(vertices: List[Dict[str, Any]]) -> Tuple[int, int, int, int]:
+    # Vision sends coordinates as strings and leaves out zero values
+    if len(vertices) == 4:
+        # the usual quadrilateral, unrolled: this runs once per word
+        a, b, c, d = vertices
+        xa, xb, xc, xd = int(a.get("x") or 0), int(b.get("x") or 0), int(c.get("x") or 0), int(d.get("x") or 0)
+        ya, yb, yc, yd = int(a.get("y") or 0), int(b.get("y") or 0), int(c.get("y") or 0), int(d.get("y") or 0)
+        return (min(xa, xb, xc, xd), min(ya, yb, yc, yd), max(xa, xb, xc, xd), max(ya, yb, yc, yd))
+    if not vertices:
+        return (0, 0, 0, 0)
+    xs = [int(vertex.get("x") or 0) for vertex in vertices]
+    ys = [int(vertex.get("y") or 0) for vertex in vertices]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def page_from_vision(page: Dict[str, Any], number: int) -> OcrPage:
+    result = OcrPage(number, int(page.get("width") or 0), int(page.get("height") or 0))
+    words, boxes, confidences = result.words, result.boxes, result.confidences
+    for block in page.get("blocks", []):
+        result.block_starts.append(len(result.line_starts))
+        for line in block.get("lines", []):
+            result.line_starts.append(len(words))
+            for word in line.get("words", []):
+                words.append(word.get("text", ""))
+                boxes.extend(_box((word.get("boundingBox") or {}).get("vertices", [])))
+                confidences.append(float(word.get("confidence") or 0.0))
+    return result
+
+
+def iter_text(pages: Iterable[OcrPage], include_page_headers: bool = False) -> Iterator[str]:
+    for page in pages:
+        if include_page_headers:
+            yield f"\n--- Page {page.number} ---\n"
+        yield from page.iter_text()
+
+
+def join_text(pages: Iterable[OcrPage], include_page_headers: bool = False) -> Optional[str]:
+    text = "".join(iter_text(pages, include_page_headers)).strip()
+    return text or None
@@ -0,0 +1,114 @@
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from fastapi_app.core import config, db
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_calls (
+    id INTEGER PRIMARY KEY, at REAL NOT NULL, task TEXT NOT NULL, model TEXT NOT NULL, tier INTEGER NOT NULL,
+    input_tokens INTEGER NOT NULL, tokens INTEGER NOT NULL, latency_ms REAL NOT NULL, cost REAL,
+    cached INTEGER NOT NULL, outcome TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS llm_calls_at ON llm_calls (at);
+"""
+
+# input sizes are grouped into buckets of this many tokens to show where escalations start
+BUCKET_TOKENS = 500
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("routing.sqlite3", _SCHEMA)
+
+
+def plan(task: str, input_tokens: int) -> List[Tuple[int, str]]:
+    # (tier, model) pairs to try in order: from the first tier that fits up to the most capable model
+    models = config.GIGACHAT_MODELS or [config.GIGACHAT_MODEL]
+    tier = sum(1 for threshold in config.ROUTE_TOKEN_THRESHOLDS if input_tokens >= threshold)
+    tier = min(max(tier, config.ROUTE_TASK_TIERS.get(task, 0)), len(models) - 1)
+    return list(enumerate(models))[tier:]
+
+
+def completeness(model: Type[BaseModel], result: Optional[Dict[str, Any]]) -> float:
+    if result is None:
+        return 0.0
+    fields = list(model.model_fields)
+    filled = sum(1 for name in fields if result.get(name) not in (None, "", [], {}))
+    return filled / len(fields) if fields else 1.0
+
+
+def cost(model: str, tokens: int) -> Optional[float]:
+    price = config.GIGACHAT_PRICES.get(model)
+    return None if price is None else round(tokens * price / 1000, 6)
+
+
+def record(
+    task: str,
+    model: str,
+    tier: int,
+    input_tokens: int,
+    tokens: int,
+    latency_ms: float,
+    cached: bool,
+    outcome: str,
+) -> None:
+    _connect().execute(
+        "INSERT INTO llm_calls (at, task, model, tier, input_tokens, tokens, latency_ms, cost, cached, outcome) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (time.time(), task, model, tier, input_tokens, tokens, round(latency_ms, 1),
+         None if cached else cost(model, tokens), int(cached), outcome),
+    )
+
+
+def _percentile(values: List[float], share: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def stats(since: Optional[float] = None) -> Dict[str, Any]:
+    rows = _connect().execute(
+        "SELECT task, model, tier, input_tokens, tokens, latency_ms, cost, cached, outcome FROM llm_calls "
+        "WHERE at >= ? ORDER BY task, tier",
+        (since or 0.0,),
+    ).fetchall()
+    routes: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    latencies: Dict[Tuple[str, str], List[float]] = {}
+    for task, model, tier, input_tokens, tokens, latency_ms, row_cost, cached, outcome in rows:
+        route = routes.setdefault(
+            (task, model),
+            {
+                "task": task, "model": model, "tier": tier, "calls": 0, "cached": 0, "accepted": 0,
+                "escalated": 0, "failed": 0, "tokens": 0, "cost": None, "buckets": {},
+            },
+        )
+        route["calls"] += 1
+        route["cached"] += cached
+        route[outcome] = route.get(outcome, 0) + 1
+        start = input_tokens // BUCKET_TOKENS * BUCKET_TOKENS
+        bucket = route["buckets"].setdefault(start, {"min_tokens": start, "calls": 0, "escalated": 0})
+        bucket["calls"] += 1
+        bucket["escalated"] += outcome == "escalated"
+        if cached:
+            continue
+        # cache hits are free and instant, so they stay out of latency, tokens and cost
+        latencies.setdefault((task, model), []).append(latency_ms)
+        route["tokens"] += tokens
+        if row_cost is not None:
+            route["cost"] = round((route["cost"] or 0.0) + row_cost, 6)
+    items = []
+    for key, route in routes.items():
+        values = sorted(latencies.get(key, []))
+        route["escalation_rate"] = round(route["escalated"] / route["calls"], 4)
+        route["latency_p50_ms"] = _percentile(values, 0.5)
+        route["latency_p95_ms"] = _percentile(values, 0.95)
+        route["buckets"] = [route["buckets"][start] for start in sorted(route["buckets"])]
+        items.append(route)
+    return {
+        "models": config.GIGACHAT_MODELS,
+        "token_thresholds": config.ROUTE_TOKEN_THRESHOLDS,
+        "since": since,
+        "items": items,
+    }
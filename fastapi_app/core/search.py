@@ -0,0 +1,218 @@
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from fastapi_app.core import config, db, embeddings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY, kind TEXT NOT NULL, source TEXT NOT NULL, created_at REAL NOT NULL,
+    title TEXT NOT NULL, body TEXT NOT NULL, findings TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_kind ON documents (kind, created_at);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, body, findings, kind, content='documents', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts (rowid, title, body, findings, kind)
+    VALUES (new.id, new.title, new.body, new.findings, new.kind);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts (documents_fts, rowid, title, body, findings, kind)
+    VALUES ('delete', old.id, old.title, old.body, old.findings, old.kind);
+END;
+CREATE TABLE IF NOT EXISTS embeddings (doc_id INTEGER PRIMARY KEY, vector BLOB NOT NULL);
+"""
+
+KINDS = {"text", "image", "ocr_image", "ocr_pdf", "parse_demo", "crawl"}
+# bm25 column weights: title, body, findings, kind
+_WEIGHTS = (2.0, 1.0, 1.5, 0.0)
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+_RRF_K = 60
+
+_vectors_lock = threading.Lock()
+_vectors: Dict[str, Any] = {}
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("search.sqlite3", _SCHEMA)
+
+
+def flatten_findings(value: Any) -> str:
+    if isinstance(value, dict):
+        return "\n".join(flatten_findings(item) for item in value.values() if item not in (None, ""))
+    if isinstance(value, (list, tuple)):
+        return "\n".join(flatten_findings(item) for item in value)
+    return str(value)
+
+
+def index_document(kind: str, source: str, title: str, body: str, findings: Any = "") -> int:
+    findings_text = findings if isinstance(findings, str) else flatten_findings(findings)
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        doc_id = conn.execute(
+            "INSERT INTO documents (kind, source, created_at, title, body, findings) VALUES (?, ?, ?, ?, ?, ?)",
+            (kind, source or "", time.time(), title or "", body or "", findings_text),
+        ).lastrowid
+        if embeddings.enabled():
+            vector = embeddings.embed("\n".join(part for part in (title, body, findings_text) if part))
+            conn.execute("INSERT INTO embeddings (doc_id, vector) VALUES (?, ?)", (doc_id, vector))
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return doc_id
+
+
+def fts_query(query: str) -> str:
+    # unicode61 has no Russian stemmer: long words match by prefix without the last two letters
+    terms = []
+    for token in _TOKEN_RE.findall(query.lower()):
+        if len(token) >= 6:
+            terms.append(f'"{token[:-2]}"*')
+        else:
+            terms.append(f'"{token}"')
+    return " ".join(terms)
+
+
+def _fts(conn: sqlite3.Connection, query: str, kind: Optional[str], limit: int) -> List[Tuple[int, float]]:
+    match = fts_query(query)
+    if not match:
+        return []
+    if kind:
+        # the kind column holds a single value, so an initial-token phrase matches it exactly
+        match = f'({match}) AND kind : ^"{kind}"'
+    # bm25 is computed for every candidate; broad queries rank only the newest SEARCH_MAX_CANDIDATES matches
+    rows = conn.execute(
+        "SELECT rowid, score FROM ("
+        " SELECT rowid, bm25(documents_fts, ?, ?, ?, ?) AS score FROM documents_fts"
+        " WHERE documents_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+        ") ORDER BY score LIMIT ?",
+        (*_WEIGHTS, match, config.SEARCH_MAX_CANDIDATES, limit),
+    )
+    return [(doc_id, -score) for doc_id, score in rows]
+
+
+def _highlight_pattern(query: str) -> Optional["re.Pattern[str]"]:
+    stems = [term.strip('"*') for term in fts_query(query).split()]
+    if not stems:
+        return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(stem) for stem in stems) + r")\w*", re.IGNORECASE)
+
+
+def _snippet(body: str, findings: str, pattern: Optional["re.Pattern[str]"], width: int = 200) -> str:
+    text, found = body, pattern.search(body) if pattern else None
+    if not found and pattern:
+        text, found = findings, pattern.search(findings)
+    if not found:
+        return body[:width]
+    start = max(0, found.start() - width // 4)
+    fragment = pattern.sub(lambda item: f"[{item.group()}]", text[start : start + width])
+    return ("…" if start else "") + fragment + ("…" if start + width < len(text) else "")
+
+
+def _vector_matrix(conn: sqlite3.Connection) -> Tuple[Any, Any]:
+    import numpy as np
+
+    with _vectors_lock:
+        key = str(config.DATA_DIR)
+        ids, matrix = _vectors.get(key, (np.zeros(0, dtype=np.int64), None))
+        last = int(ids[-1]) if len(ids) else 0
+        rows = conn.execute("SELECT doc_id, vector FROM embeddings WHERE doc_id > ? ORDER BY doc_id", (last,)).fetchall()
+        if rows:
+            new_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+            new_matrix = np.vstack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+            ids = np.concatenate([ids, new_ids])
+            matrix = new_matrix if matrix is None else np.vstack([matrix, new_matrix])
+            _vectors[key] = (ids, matrix)
+        return ids, matrix
+
+
+def _semantic(conn: sqlite3.Connection, query: str, kind: Optional[str], limit: int) -> List[Tuple[int, float]]:
+    if not embeddings.enabled():
+        raise HTTPException(status_code=400, detail="Semantic search is disabled (SEARCH_EMBEDDINGS)")
+    try:
+        import numpy as np
+    except ImportError as exc:
+        raise HTTPException(status_code=400, detail="Semantic search requires numpy") from exc
+
+    ids, matrix = _vector_matrix(conn)
+    if matrix is None:
+        return []
+    scores = matrix @ np.frombuffer(embeddings.embed(query), dtype=np.float32)
+    # over-fetch when filtering by kind, since filtering happens after ranking
+    top = min(len(scores), limit * 5 if kind else limit)
+    best = np.argpartition(-scores, top - 1)[:top]
+    ranked = [(int(ids[index]), float(scores[index])) for index in best[np.argsort(-scores[best])]]
+    if kind:
+        allowed = _kinds(conn, (doc_id for doc_id, _ in ranked))
+        ranked = [item for item in ranked if allowed.get(item[0]) == kind]
+    return ranked[:limit]
+
+
+def _kinds(conn: sqlite3.Connection, doc_ids: Iterable[int]) -> Dict[int, str]:
+    ids = list(doc_ids)
+    if not ids:
+        return {}
+    placeholders = ", ".join("?" * len(ids))
+    return dict(conn.execute(f"SELECT id, kind FROM documents WHERE id IN ({placeholders})", ids))
+
+
+def _fuse(*rankings: List[Tuple[int, float]]) -> List[Tuple[int, float]]:
+    scores: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, (doc_id, _) in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def search(query: str, kind: Optional[str] = None, mode: str = "fts", limit: int = 20) -> List[Dict[str, Any]]:
+    if not query.strip():
+        raise HTTPException(status_code=400, detail="Query is required")
+    if kind and kind not in KINDS:
+        raise HTTPException(status_code=400, detail=f"Unknown kind: {kind}")
+    conn = _connect()
+    if mode == "fts":
+        ranked = _fts(conn, query, kind, limit)
+    elif mode == "semantic":
+        ranked = _semantic(conn, query, kind, limit)
+    elif mode == "hybrid":
+        ranked = _fuse(_fts(conn, query, kind, limit * 2), _semantic(conn, query, kind, limit * 2))[:limit]
+    else:
+        raise HTTPException(status_code=400, detail="mode must be fts, semantic or hybrid")
+    if not ranked:
+        return []
+
+    ids = [doc_id for doc_id, _ in ranked]
+    placeholders = ", ".join("?" * len(ids))
+    rows = {
+        row[0]: row
+        for row in conn.execute(
+            f"SELECT id, kind, source, created_at, title, body, findings FROM documents WHERE id IN ({placeholders})",
+            ids,
+        )
+    }
+    pattern = _highlight_pattern(query)
+    results = []
+    for doc_id, score in ranked:
+        row = rows.get(doc_id)
+        if row is None:
+            continue
+        results.append(
+            {
+                "id": doc_id,
+                "kind": row[1],
+                "source": row[2],
+                "created_at": row[3],
+                "title": row[4],
+                "snippet": _snippet(row[5], row[6], pattern),
+                "score": score,
+            }
+        )
+    return results
@@ -0,0 +1,247 @@
+import difflib
+import hashlib
+import importlib.util
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from fastapi_app.core import config, db
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY, codec TEXT NOT NULL, base TEXT, depth INTEGER NOT NULL,
+    size INTEGER NOT NULL, data BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS versions (
+    url TEXT NOT NULL, version INTEGER NOT NULL, captured_at REAL NOT NULL, title TEXT NOT NULL,
+    html_hash TEXT NOT NULL, text_hash TEXT NOT NULL, PRIMARY KEY (url, version)
+);
+CREATE TABLE IF NOT EXISTS screenshots (
+    url TEXT NOT NULL, version INTEGER NOT NULL, width INTEGER NOT NULL, height INTEGER NOT NULL,
+    image_hash TEXT NOT NULL, thumbnail BLOB NOT NULL, PRIMARY KEY (url, version)
+);
+CREATE TABLE IF NOT EXISTS screenshot_images (hash TEXT PRIMARY KEY, data BLOB NOT NULL);
+"""
+
+_HAS_ZSTD = importlib.util.find_spec("zstandard") is not None
+# zlib can only reference the last 32 KiB of a preset dictionary
+_ZLIB_WINDOW = 32768
+_DECODED_CACHE_SIZE = 32
+_TAG_BOUNDARY = re.compile(r"(?<=>)\s*(?=<)")
+
+_decoded: "OrderedDict[str, bytes]" = OrderedDict()
+_decoded_lock = threading.Lock()
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("snapshots.sqlite3", _SCHEMA)
+
+
+def _compress(data: bytes, base: Optional[bytes]) -> Tuple[str, bytes]:
+    if _HAS_ZSTD:
+        import zstandard
+
+        dict_data = zstandard.ZstdCompressionDict(base, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if base else None
+        compressor = zstandard.ZstdCompressor(level=config.SNAPSHOT_ZSTD_LEVEL, dict_data=dict_data)
+        return "zstd", compressor.compress(data)
+    compressor = zlib.compressobj(9, zdict=base[-_ZLIB_WINDOW:]) if base else zlib.compressobj(9)
+    return "zlib", compressor.compress(data) + compressor.flush()
+
+
+def _decompress(codec: str, payload: bytes, base: Optional[bytes]) -> bytes:
+    if codec == "zstd":
+        try:
+            import zstandard
+        except ImportError as exc:
+            raise RuntimeError("Snapshot was stored with zstd; install the zstandard package") from exc
+        dict_data = zstandard.ZstdCompressionDict(base, dict_type=zstandard.DICT_TYPE_RAWCONTENT) if base else None
+        return zstandard.ZstdDecompressor(dict_data=dict_data).decompress(payload)
+    decompressor = zlib.decompressobj(zdict=base[-_ZLIB_WINDOW:]) if base else zlib.decompressobj()
+    return decompressor.decompress(payload) + decompressor.flush()
+
+
+def _remember(digest: str, data: bytes) -> None:
+    with _decoded_lock:
+        _decoded[digest] = data
+        _decoded.move_to_end(digest)
+        while len(_decoded) > _DECODED_CACHE_SIZE:
+            _decoded.popitem(last=False)
+
+
+def _load_blob(conn: sqlite3.Connection, digest: str) -> bytes:
+    chain: List[Tuple[str, str, bytes]] = []
+    base: Optional[bytes] = None
+    current: Optional[str] = digest
+    while current:
+        with _decoded_lock:
+            base = _decoded.get(current)
+        if base is not None:
+            break
+        row = conn.execute("SELECT codec, base, data FROM blobs WHERE hash = ?", (current,)).fetchone()
+        if row is None:
+            raise HTTPException(status_code=500, detail="Snapshot blob is missing")
+        chain.append((current, row[0], row[2]))
+        current = row[1]
+    for blob_hash, codec, payload in reversed(chain):
+        base = _decompress(codec, payload, base)
+        _remember(blob_hash, base)
+    return base or b""
+
+
+def _put_blob(conn: sqlite3.Connection, data: bytes, previous: Optional[str]) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone():
+        return digest
+    base_hash, base, depth = None, None, 0
+    if previous:
+        row = conn.execute("SELECT depth FROM blobs WHERE hash = ?", (previous,)).fetchone()
+        if row and row[0] + 1 < config.SNAPSHOT_KEYFRAME_INTERVAL:
+            base_hash, base, depth = previous, _load_blob(conn, previous), row[0] + 1
+    codec, payload = _compress(data, base)
+    conn.execute(
+        "INSERT INTO blobs (hash, codec, base, depth, size, data) VALUES (?, ?, ?, ?, ?, ?)",
+        (digest, codec, base_hash, depth, len(data), payload),
+    )
+    _remember(digest, data)
+    return digest
+
+
+def save_snapshot(
+    url: str, title: str, html: str, text: str, captured_at: Optional[float] = None
+) -> Dict[str, Any]:
+    captured_at = time.time() if captured_at is None else captured_at
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        latest = conn.execute(
+            "SELECT version, html_hash, text_hash FROM versions WHERE url = ? ORDER BY version DESC LIMIT 1",
+            (url,),
+        ).fetchone()
+        version, previous_html, previous_text = latest if latest else (0, None, None)
+        html_hash = _put_blob(conn, html.encode("utf-8"), previous_html)
+        text_hash = _put_blob(conn, text.encode("utf-8"), previous_text)
+        conn.execute(
+            "INSERT INTO versions (url, version, captured_at, title, html_hash, text_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            (url, version + 1, captured_at, title, html_hash, text_hash),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return {
+        "url": url,
+        "version": version + 1,
+        "captured_at": captured_at,
+        "changed": html_hash != previous_html or text_hash != previous_text,
+    }
+
+
+def list_versions(url: str) -> List[Dict[str, Any]]:
+    rows = _connect().execute(
+        "SELECT v.version, v.captured_at, v.title, h.size, t.size, h.hash, t.hash, s.version IS NOT NULL"
+        " FROM versions v JOIN blobs h ON h.hash = v.html_hash JOIN blobs t ON t.hash = v.text_hash"
+        " LEFT JOIN screenshots s ON s.url = v.url AND s.version = v.version"
+        " WHERE v.url = ? ORDER BY v.version",
+        (url,),
+    )
+    items: List[Dict[str, Any]] = []
+    previous = None
+    for version, captured_at, title, html_size, text_size, html_hash, text_hash, screenshot in rows:
+        items.append(
+            {
+                "version": version,
+                "captured_at": captured_at,
+                "title": title,
+                "html_size": html_size,
+                "text_size": text_size,
+                "changed": previous != (html_hash, text_hash),
+                "screenshot": bool(screenshot),
+            }
+        )
+        previous = (html_hash, text_hash)
+    return items
+
+
+def get_version(url: str, version: int, include_html: bool = True) -> Dict[str, Any]:
+    conn = _connect()
+    row = conn.execute(
+        "SELECT captured_at, title, html_hash, text_hash FROM versions WHERE url = ? AND version = ?",
+        (url, version),
+    ).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Snapshot not found")
+    captured_at, title, html_hash, text_hash = row
+    return {
+        "url": url,
+        "version": version,
+        "captured_at": captured_at,
+        "title": title,
+        # the html blob is the largest part of a version, so it is only read when asked for
+        "html": _load_blob(conn, html_hash).decode("utf-8") if include_html else None,
+        "text": _load_blob(conn, text_hash).decode("utf-8"),
+    }
+
+
+def save_screenshot(url: str, version: int, image: bytes, thumbnail: bytes, width: int, height: int) -> None:
+    # the full image already is lossy WebP, so it is stored as is; thumbnails live apart for cheap listing
+    digest = hashlib.sha256(image).hexdigest()
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("INSERT OR IGNORE INTO screenshot_images (hash, data) VALUES (?, ?)", (digest, image))
+        conn.execute(
+            "INSERT OR REPLACE INTO screenshots (url, version, width, height, image_hash, thumbnail)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (url, version, width, height, digest, thumbnail),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def get_screenshot(url: str, version: int, full: bool = False) -> Tuple[bytes, str]:
+    if full:
+        sql = (
+            "SELECT i.data, s.image_hash FROM screenshots s JOIN screenshot_images i ON i.hash = s.image_hash"
+            " WHERE s.url = ? AND s.version = ?"
+        )
+    else:
+        sql = "SELECT thumbnail, image_hash FROM screenshots WHERE url = ? AND version = ?"
+    row = _connect().execute(sql, (url, version)).fetchone()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Screenshot not found")
+    return row[0], row[1]
+
+
+def _lines(value: str, field: str) -> List[str]:
+    if field == "html":
+        # pages are often served as a single line; diff them tag by tag
+        value = _TAG_BOUNDARY.sub("\n", value)
+    return value.splitlines()
+
+
+def diff_versions(url: str, old: int, new: int, field: str = "text", context: int = 3) -> Dict[str, Any]:
+    if field not in {"text", "html"}:
+        raise HTTPException(status_code=400, detail="field must be 'text' or 'html'")
+    before = _lines(get_version(url, old, field == "html")[field], field)
+    after = _lines(get_version(url, new, field == "html")[field], field)
+    lines = list(
+        difflib.unified_diff(before, after, f"v{old}", f"v{new}", n=context, lineterm="")
+    )
+    body = lines[2:]
+    return {
+        "url": url,
+        "from_version": old,
+        "to_version": new,
+        "field": field,
+        "added": sum(1 for line in body if line.startswith("+")),
+        "removed": sum(1 for line in body if line.startswith("-")),
+        "diff": lines,
+    }
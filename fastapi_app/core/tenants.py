@@ -0,0 +1,164 @@
+import hashlib
+import hmac
+import json
+import os
+import sqlite3
+import threading
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional
+
+from fastapi import Header, HTTPException
+from fastapi.concurrency import run_in_threadpool
+
+from fastapi_app.core import config, db
+
+
+@dataclass(frozen=True)
+class Tenant:
+    name: str
+    max_concurrency: int = 0
+    daily_token_quota: int = 0
+
+
+ANONYMOUS = Tenant(name="anonymous")
+
+current_tenant: ContextVar[Tenant] = ContextVar("current_tenant", default=ANONYMOUS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS usage (
+    tenant TEXT NOT NULL, day TEXT NOT NULL, tokens INTEGER NOT NULL,
+    PRIMARY KEY (tenant, day)
+);
+CREATE TABLE IF NOT EXISTS inflight (
+    tenant TEXT NOT NULL, pid INTEGER NOT NULL, count INTEGER NOT NULL,
+    PRIMARY KEY (tenant, pid)
+);
+"""
+
+_tenants_lock = threading.Lock()
+_tenants: Optional[Dict[str, Tenant]] = None
+
+
+def _hash_key(api_key: str) -> str:
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+
+
+def _load_tenants() -> Dict[str, Tenant]:
+    global _tenants
+    with _tenants_lock:
+        if _tenants is None:
+            _tenants = {}
+            if config.TENANTS_PATH:
+                items = json.loads(Path(config.TENANTS_PATH).read_text(encoding="utf-8"))
+                for item in items:
+                    key_hash = item.get("api_key_sha256") or _hash_key(item["api_key"])
+                    _tenants[key_hash] = Tenant(
+                        name=item["name"],
+                        max_concurrency=int(item.get("max_concurrency", 0)),
+                        daily_token_quota=int(item.get("daily_token_quota", 0)),
+                    )
+        return _tenants
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("tenants.sqlite3", _SCHEMA)
+
+
+def _today() -> str:
+    return datetime.utcnow().strftime("%Y-%m-%d")
+
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def tokens_used(tenant: Tenant) -> int:
+    row = _connect().execute(
+        "SELECT tokens FROM usage WHERE tenant = ? AND day = ?", (tenant.name, _today())
+    ).fetchone()
+    return int(row[0]) if row else 0
+
+
+def record_tokens(tokens: int, tenant: Optional[Tenant] = None) -> None:
+    tenant = tenant or current_tenant.get()
+    if tokens <= 0 or tenant is ANONYMOUS:
+        return
+    _connect().execute(
+        "INSERT INTO usage (tenant, day, tokens) VALUES (?, ?, ?) "
+        "ON CONFLICT (tenant, day) DO UPDATE SET tokens = tokens + excluded.tokens",
+        (tenant.name, _today(), tokens),
+    )
+
+
+def acquire_slot(tenant: Tenant) -> None:
+    if tenant.daily_token_quota and tokens_used(tenant) >= tenant.daily_token_quota:
+        raise HTTPException(status_code=429, detail="Daily LLM token quota exceeded")
+    if not tenant.max_concurrency:
+        return
+    conn = _connect()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        rows = conn.execute(
+            "SELECT pid, count FROM inflight WHERE tenant = ?", (tenant.name,)
+        ).fetchall()
+        active = 0
+        for pid, count in rows:
+            if pid != os.getpid() and not pid_alive(pid):
+                conn.execute("DELETE FROM inflight WHERE tenant = ? AND pid = ?", (tenant.name, pid))
+                continue
+            active += count
+        if active >= tenant.max_concurrency:
+            raise HTTPException(status_code=429, detail="Too many concurrent requests")
+        conn.execute(
+            "INSERT INTO inflight (tenant, pid, count) VALUES (?, ?, 1) "
+            "ON CONFLICT (tenant, pid) DO UPDATE SET count = count + 1",
+            (tenant.name, os.getpid()),
+        )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def release_slot(tenant: Tenant) -> None:
+    if not tenant.max_concurrency:
+        return
+    _connect().execute(
+        "UPDATE inflight SET count = MAX(count - 1, 0) WHERE tenant = ? AND pid = ?",
+        (tenant.name, os.getpid()),
+    )
+
+
+def resolve_tenant(api_key: Optional[str]) -> Tenant:
+    tenants = _load_tenants()
+    if not tenants:
+        return ANONYMOUS
+    if not api_key:
+        raise HTTPException(status_code=401, detail="API key is required")
+    key_hash = _hash_key(api_key)
+    for known_hash, tenant in tenants.items():
+        if hmac.compare_digest(known_hash, key_hash):
+            return tenant
+    raise HTTPException(status_code=401, detail="Invalid API key")
+
+
+async def require_tenant(x_api_key: Optional[str] = Header(default=None)) -> AsyncIterator[Tenant]:
+    tenant = resolve_tenant(x_api_key)
+    if tenant is ANONYMOUS:
+        yield tenant
+        return
+    await run_in_threadpool(acquire_slot, tenant)
+    current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        await run_in_threadpool(release_slot, tenant)
@@ -1,137 +1,269 @@
+import os
+import threading
+from contextlib import asynccontextmanager
 from typing import Optional
-from urllib.parse import urlparse
 
-from fastapi import FastAPI, File, HTTPException, UploadFile
+from fastapi import Depends, FastAPI, File, Form, HTTPException, Query, Request, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
-from fastapi_app.core.history import get_history, save_history
+from fastapi_app.core import cancellation, competitors, config, documents, export, facts, jobs, routing
+from fastapi_app.core.history import get_history
+from fastapi_app.core.tenants import require_tenant
 from fastapi_app.schemas import (
+    CompetitorSummaryResponse,
+    CrawlJobResponse,
+    CrawlRequest,
+    DocumentPagesResponse,
     ErrorResponse,
+    HealthResponse,
     HistoryResponse,
     ImageResponse,
     OCRResponse,
+    OfferChangesResponse,
+    OffersResponse,
     ParseDemoRequest,
     ParseDemoResponse,
+    RoutingStatsResponse,
+    SearchResponse,
+    SnapshotDiffResponse,
+    SnapshotListResponse,
+    SnapshotResponse,
     TextRequest,
     TextResponse,
 )
-from fastapi_app.services.analysis import analyze_image, analyze_text
-from fastapi_app.services.image_utils import summarize_image
-from fastapi_app.services.parse_demo import fetch_page_text
-from fastapi_app.services.yandex_vision import recognize_image_text, recognize_pdf_text
+from fastapi_app.services import pipeline, providers
+from fastapi_app.services.urls import normalize_url
 
-app = FastAPI(title="Competitor Monitoring Assistant", version="1.0.0")
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+    # a local model is loaded before the worker reports ready, not on the first request
+    await run_in_threadpool(providers.warm_up)
+    app.state.ready.set()
+    yield
+    app.state.ready.clear()
 
-def _normalize_url(value: str) -> Optional[str]:
-    trimmed = value.strip()
-    if not trimmed:
-        return None
-    if not trimmed.startswith(("http://", "https://")):
-        trimmed = f"https://{trimmed}"
-    parsed = urlparse(trimmed)
-    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
-        return None
-    return trimmed
 
+app = FastAPI(title="Competitor Monitoring Assistant", version="1.0.0", lifespan=lifespan)
+app.state.ready = threading.Event()
+app.add_middleware(cancellation.CancellationMiddleware)
 
-@app.post("/analyze_text", response_model=TextResponse, responses={400: {"model": ErrorResponse}})
-def analyze_text_endpoint(payload: TextRequest):
-    text = payload.text.strip()
-    if not text:
-        raise HTTPException(status_code=400, detail="Text is required")
+TENANT = [Depends(require_tenant)]
+ERRORS = {
+    400: {"model": ErrorResponse},
+    401: {"model": ErrorResponse},
+    429: {"model": ErrorResponse},
+    504: {"model": ErrorResponse},
+}
 
-    analysis = analyze_text(text)
-    save_history({"type": "text", "input": {"text": text[:500]}, "output": analysis})
-    return {"analysis": analysis}
 
+@app.exception_handler(cancellation.Cancelled)
+async def cancelled_handler(request: Request, exc: cancellation.Cancelled):
+    return JSONResponse(status_code=exc.status_code, content={"detail": exc.detail})
 
-@app.post("/analyze_image", response_model=ImageResponse, responses={400: {"model": ErrorResponse}})
-async def analyze_image_endpoint(file: UploadFile = File(...)):
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Image file is required")
 
-    image_bytes = await file.read()
-    if not image_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
+@app.post("/analyze_text", response_model=TextResponse, responses=ERRORS, dependencies=TENANT)
+def analyze_text_endpoint(payload: TextRequest):
+    return pipeline.run_text_analysis(payload.text, payload.url)
 
-    metadata = summarize_image(image_bytes)
-    summary = (
-        f"Формат: {metadata['format']}, размер {metadata['width']}x{metadata['height']}, "
-        f"соотношение {metadata['aspect_ratio']}, доминирующий цвет {metadata['dominant_color']}."
-    )
-    analysis = analyze_image(summary)
-    save_history(
-        {
-            "type": "image",
-            "input": {"filename": file.filename, "content_type": file.content_type},
-            "output": {"metadata": metadata, "analysis": analysis},
-        }
-    )
-    return {"metadata": metadata, "analysis": analysis}
 
+@app.post("/analyze_image", response_model=ImageResponse, responses=ERRORS, dependencies=TENANT)
+async def analyze_image_endpoint(file: UploadFile = File(...), competitor: Optional[str] = Form(None)):
+    image_bytes = await file.read()
+    return await run_in_threadpool(
+        pipeline.run_image_analysis, image_bytes, file.filename, file.content_type, competitor
+    )
 
-@app.post("/ocr_image", response_model=OCRResponse, responses={400: {"model": ErrorResponse}})
-async def ocr_image_endpoint(file: UploadFile = File(...)):
-    if not file.content_type or not file.content_type.startswith("image/"):
-        raise HTTPException(status_code=400, detail="Image file is required")
 
+@app.post(
+    "/ocr_image", response_model=OCRResponse, response_model_exclude_none=True, responses=ERRORS, dependencies=TENANT
+)
+async def ocr_image_endpoint(file: UploadFile = File(...), include_text: bool = True):
     image_bytes = await file.read()
-    if not image_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    text = recognize_image_text(image_bytes)
-    if not text:
-        raise HTTPException(status_code=400, detail="OCR failed")
-
-    save_history(
-        {
-            "type": "ocr_image",
-            "input": {"filename": file.filename, "content_type": file.content_type},
-            "output": {"text": text[:2000], "truncated": len(text) > 2000},
-        }
+    return await run_in_threadpool(
+        pipeline.run_image_ocr, image_bytes, file.filename, file.content_type, include_text
     )
-    return {"text": text}
-
 
-@app.post("/ocr_pdf", response_model=OCRResponse, responses={400: {"model": ErrorResponse}})
-async def ocr_pdf_endpoint(file: UploadFile = File(...)):
-    is_pdf = file.content_type == "application/pdf"
-    if not is_pdf and file.filename:
-        is_pdf = file.filename.lower().endswith(".pdf")
-    if not is_pdf:
-        raise HTTPException(status_code=400, detail="PDF file is required")
 
+@app.post(
+    "/ocr_pdf", response_model=OCRResponse, response_model_exclude_none=True, responses=ERRORS, dependencies=TENANT
+)
+async def ocr_pdf_endpoint(file: UploadFile = File(...), include_text: bool = True):
     pdf_bytes = await file.read()
-    if not pdf_bytes:
-        raise HTTPException(status_code=400, detail="Empty file")
-
-    text = recognize_pdf_text(pdf_bytes)
-    if not text:
-        raise HTTPException(status_code=400, detail="OCR failed")
-
-    save_history(
-        {
-            "type": "ocr_pdf",
-            "input": {"filename": file.filename, "content_type": file.content_type},
-            "output": {"text": text[:2000], "truncated": len(text) > 2000},
-        }
-    )
-    return {"text": text}
+    return await run_in_threadpool(pipeline.run_pdf_ocr, pdf_bytes, file.filename, file.content_type, include_text)
+
+
+@app.get(
+    "/documents/{document_id}/pages",
+    response_model=DocumentPagesResponse,
+    response_model_exclude_none=True,
+    responses={**ERRORS, 404: {"model": ErrorResponse}},
+    dependencies=TENANT,
+)
+def document_pages_endpoint(
+    document_id: int,
+    first: int = Query(1, ge=1, alias="from"),
+    last: int = Query(0, ge=0, alias="to"),
+    words: bool = False,
+):
+    # an OCR document page by page; `to` defaults to the last page, at most 50 pages per call
+    return documents.get_pages(document_id, first, last, words)
 
 
-@app.post("/parse_demo", response_model=ParseDemoResponse, responses={400: {"model": ErrorResponse}})
+@app.post("/parse_demo", response_model=ParseDemoResponse, responses=ERRORS, dependencies=TENANT)
 def parse_demo_endpoint(payload: ParseDemoRequest):
-    normalized_url = _normalize_url(payload.url)
-    if not normalized_url:
+    return pipeline.run_parse_demo(payload.url, payload.screenshot)
+
+
+@app.post("/crawl", status_code=202, response_model=CrawlJobResponse, responses=ERRORS, dependencies=TENANT)
+def crawl_endpoint(payload: CrawlRequest):
+    # a crawl takes up to CRAWL_MAX_SECONDS, so it runs as a background job instead of holding a worker thread
+    if not normalize_url(payload.url):
         raise HTTPException(status_code=400, detail="Неверный формат URL. Пример: https://example.com")
-    title, text = fetch_page_text(normalized_url)
-    if not text:
-        raise HTTPException(status_code=400, detail="Empty page content")
-    analysis = analyze_text(text)
-    save_history({"type": "parse_demo", "input": {"url": normalized_url}, "output": analysis})
-    return {"title": title, "analysis": analysis}
+    return jobs.submit("crawl", lambda: pipeline.run_crawl(payload.url, payload.max_pages, payload.max_depth))
 
 
-@app.get("/history", response_model=HistoryResponse)
+@app.get(
+    "/crawl/{job_id}", response_model=CrawlJobResponse, responses={404: {"model": ErrorResponse}}, dependencies=TENANT
+)
+def crawl_job_endpoint(job_id: str):
+    return jobs.get(job_id)
+
+
+@app.post(
+    "/crawl/{job_id}/cancel",
+    response_model=CrawlJobResponse,
+    responses={404: {"model": ErrorResponse}},
+    dependencies=TENANT,
+)
+def cancel_crawl_endpoint(job_id: str):
+    return jobs.cancel(job_id)
+
+
+@app.post(
+    "/requests/{request_id}/cancel", status_code=204, responses={404: {"model": ErrorResponse}}, dependencies=TENANT
+)
+def cancel_request_endpoint(request_id: str):
+    if not cancellation.cancel_request(request_id):
+        raise HTTPException(status_code=404, detail="Request not found")
+    return Response(status_code=204)
+
+
+@app.get("/history", response_model=HistoryResponse, dependencies=TENANT)
 def history_endpoint():
     return {"items": get_history()}
+
+
+@app.get(
+    "/export/{dataset}",
+    response_class=StreamingResponse,
+    responses={**ERRORS, 404: {"model": ErrorResponse}},
+    dependencies=TENANT,
+)
+def export_endpoint(
+    dataset: str,
+    format: str = Query("jsonl", pattern="^(jsonl|csv|parquet|arrow)$"),
+    since: int = Query(0, ge=0),
+):
+    stream, watermark = export.export(dataset, format, since)
+    cancellation.stream_without_server_deadline()
+    media_type, extension = export.FORMATS[format]
+    # pass X-Export-Watermark back as `since` to get only the rows added after this export
+    headers = {
+        "X-Export-Watermark": str(watermark),
+        "Content-Disposition": f'attachment; filename="{dataset}-{since}-{watermark}.{extension}"',
+    }
+    return StreamingResponse(stream, media_type=media_type, headers=headers)
+
+
+@app.get("/routing/stats", response_model=RoutingStatsResponse, dependencies=TENANT)
+def routing_stats_endpoint(since: Optional[float] = None):
+    # per task and model: escalation rate by input size, latency and cost, for tuning ROUTE_* settings
+    return routing.stats(since)
+
+
+@app.get("/offers", response_model=OffersResponse, dependencies=TENANT)
+def offers_endpoint(domain: Optional[str] = None, limit: int = Query(200, ge=1, le=1000)):
+    return {"items": facts.latest_offers(domain, limit)}
+
+
+@app.get("/offers/changes", response_model=OfferChangesResponse, dependencies=TENANT)
+def offer_changes_endpoint(
+    domain: Optional[str] = None, since: Optional[float] = None, limit: int = Query(200, ge=1, le=1000)
+):
+    return {"items": facts.offer_changes(domain, since, limit)}
+
+
+@app.get("/search", response_model=SearchResponse, responses=ERRORS, dependencies=TENANT)
+def search_endpoint(
+    q: str = Query(..., min_length=1),
+    kind: Optional[str] = None,
+    mode: str = Query("fts", pattern="^(fts|semantic|hybrid)$"),
+    limit: int = Query(20, ge=1, le=100),
+):
+    return pipeline.run_search(q, kind, mode, limit)
+
+
+SNAPSHOT_ERRORS = {**ERRORS, 404: {"model": ErrorResponse}}
+
+
+@app.get(
+    "/competitors/{domain}/summary",
+    response_model=CompetitorSummaryResponse,
+    responses=SNAPSHOT_ERRORS,
+    dependencies=TENANT,
+)
+def competitor_summary_endpoint(domain: str, limit: int = Query(10, ge=1, le=100)):
+    return competitors.summary(domain, limit)
+
+
+@app.get("/snapshots", response_model=SnapshotListResponse, responses=ERRORS, dependencies=TENANT)
+def snapshots_endpoint(url: str):
+    return pipeline.list_snapshots(url)
+
+
+@app.get("/snapshots/diff", response_model=SnapshotDiffResponse, responses=SNAPSHOT_ERRORS, dependencies=TENANT)
+def snapshot_diff_endpoint(
+    url: str,
+    from_version: int = Query(..., ge=1),
+    to_version: int = Query(..., ge=1),
+    field: str = Query("text", pattern="^(text|html)$"),
+):
+    return pipeline.diff_snapshots(url, from_version, to_version, field)
+
+
+@app.get(
+    "/snapshots/{version}/screenshot",
+    response_class=Response,
+    responses={**SNAPSHOT_ERRORS, 200: {"content": {"image/webp": {}}}},
+    dependencies=TENANT,
+)
+def snapshot_screenshot_endpoint(
+    version: int, url: str, size: str = Query("thumbnail", pattern="^(thumbnail|full)$")
+):
+    image, digest = pipeline.get_snapshot_screenshot(url, version, size == "full")
+    # screenshots never change once stored
+    headers = {"Cache-Control": "private, max-age=31536000, immutable", "ETag": f'"{digest[:16]}-{size}"'}
+    return Response(image, media_type="image/webp", headers=headers)
+
+
+@app.get("/snapshots/{version}", response_model=SnapshotResponse, responses=SNAPSHOT_ERRORS, dependencies=TENANT)
+def snapshot_endpoint(version: int, url: str, include_html: bool = False):
+    return pipeline.get_snapshot(url, version, include_html)
+
+
+@app.get("/health", response_model=HealthResponse, responses={503: {"model": HealthResponse}})
+def health_endpoint():
+    # probes run often, so the checks only stat files and never read them
+    checks = {
+        "startup": app.state.ready.is_set(),
+        "data_dir": os.access(config.DATA_DIR, os.W_OK),
+        "history": not config.HISTORY_PATH.exists() or os.access(config.HISTORY_PATH, os.R_OK | os.W_OK),
+    }
+    status = "ok" if all(checks.values()) else "unavailable"
+    return JSONResponse(
+        status_code=200 if status == "ok" else 503,
+        content={"status": status, "pid": os.getpid(), "checks": checks},
+    )
@@ -1,10 +1,12 @@
-from typing import Any, Dict, List
+import re
+from typing import Any, Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
 
 class TextRequest(BaseModel):
     text: str = Field(..., min_length=1)
+    url: Optional[str] = None
 
 
 class TextResponse(BaseModel):
@@ -13,11 +15,109 @@ class TextResponse(BaseModel):
 
 class ParseDemoRequest(BaseModel):
     url: str = Field(..., min_length=1)
+    screenshot: bool = False
 
 
 class ParseDemoResponse(BaseModel):
     title: str
     analysis: Dict[str, Any]
+    facts: Dict[str, Any] = Field(default_factory=dict)
+    screenshot: Optional[Dict[str, Any]] = None
+
+
+class CrawlRequest(BaseModel):
+    url: str = Field(..., min_length=1)
+    max_pages: Optional[int] = Field(None, ge=1, le=200)
+    max_depth: Optional[int] = Field(None, ge=0, le=5)
+
+
+class CrawledPage(BaseModel):
+    url: str
+    title: str
+    depth: int
+    offers: int
+
+
+class CrawlResponse(BaseModel):
+    url: str
+    analysis: Dict[str, Any]
+    pages: List[CrawledPage]
+    skipped: List[Dict[str, str]]
+    errors: List[Dict[str, str]]
+
+
+class CrawlJobResponse(BaseModel):
+    id: str
+    kind: str
+    status: str
+    created_at: float
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Optional[CrawlResponse] = None
+    error: Optional[str] = None
+
+
+class OfferRecord(BaseModel):
+    domain: str
+    url: str
+    name: str
+    price: Optional[float]
+    currency: str
+    position: int
+    availability: str
+    source: str
+    captured_at: float
+
+
+class OffersResponse(BaseModel):
+    items: List[OfferRecord]
+
+
+class OfferChange(BaseModel):
+    domain: str
+    url: str
+    name: str
+    currency: str
+    position: int
+    source: str
+    previous_price: Optional[float]
+    price: Optional[float]
+    previous_at: float
+    captured_at: float
+
+
+class OfferChangesResponse(BaseModel):
+    items: List[OfferChange]
+
+
+class RouteBucket(BaseModel):
+    min_tokens: int
+    calls: int
+    escalated: int
+
+
+class RouteStats(BaseModel):
+    task: str
+    model: str
+    tier: int
+    calls: int
+    cached: int
+    accepted: int
+    escalated: int
+    failed: int
+    escalation_rate: float
+    latency_p50_ms: float
+    latency_p95_ms: float
+    tokens: int
+    cost: Optional[float]
+    buckets: List[RouteBucket]
+
+
+class RoutingStatsResponse(BaseModel):
+    models: List[str]
+    token_thresholds: List[int]
+    since: Optional[float]
+    items: List[RouteStats]
 
 
 class ImageResponse(BaseModel):
@@ -26,7 +126,155 @@ class ImageResponse(BaseModel):
 
 
 class OCRResponse(BaseModel):
+    document_id: int
+    pages: int
+    chars: int
+    # omitted with include_text=false; pages are then read from /documents/{document_id}/pages
+    text: Optional[str] = None
+
+
+class DocumentWord(BaseModel):
+    text: str
+    box: List[int]
+    confidence: float
+
+
+class DocumentLine(BaseModel):
     text: str
+    box: List[int]
+    confidence: float
+    words: Optional[List[DocumentWord]] = None
+
+
+class DocumentBlock(BaseModel):
+    box: List[int]
+    confidence: float
+    lines: List[DocumentLine]
+
+
+class DocumentPage(BaseModel):
+    number: int
+    width: int
+    height: int
+    text: str
+    blocks: List[DocumentBlock]
+
+
+class DocumentPagesResponse(BaseModel):
+    id: int
+    kind: str
+    filename: str
+    created_at: float
+    page_count: int
+    chars: int
+    first_page: int
+    last_page: int
+    pages: List[DocumentPage]
+
+
+class SnapshotInfo(BaseModel):
+    version: int
+    captured_at: float
+    title: str
+    html_size: int
+    text_size: int
+    changed: bool
+    screenshot: bool = False
+
+
+class SnapshotListResponse(BaseModel):
+    url: str
+    items: List[SnapshotInfo]
+
+
+class SnapshotResponse(BaseModel):
+    url: str
+    version: int
+    captured_at: float
+    title: str
+    text: str
+    html: Optional[str] = None
+
+
+class SnapshotDiffResponse(BaseModel):
+    url: str
+    from_version: int
+    to_version: int
+    field: str
+    added: int
+    removed: int
+    diff: List[str]
+
+
+class SearchHit(BaseModel):
+    id: int
+    kind: str
+    source: str
+    created_at: float
+    title: str
+    snippet: str
+    score: float
+
+
+class SearchResponse(BaseModel):
+    query: str
+    mode: str
+    items: List[SearchHit]
+
+
+class CompetitorFinding(BaseModel):
+    text: str
+    occurrences: int
+    first_seen: float
+    last_seen: float
+    status: str
+
+
+class StylePoint(BaseModel):
+    at: float
+    score: float
+
+
+class StyleTrend(BaseModel):
+    latest: Optional[float] = None
+    average: Optional[float] = None
+    delta: Optional[float] = None
+    history: List[StylePoint]
+
+
+class CompetitorOffer(BaseModel):
+    url: str
+    name: str
+    price: Optional[float] = None
+    currency: str
+    since: float
+
+
+class CompetitorOfferEvent(BaseModel):
+    url: str
+    name: str
+    event: str
+    price: Optional[float] = None
+    previous_price: Optional[float] = None
+    currency: str
+    at: float
+
+
+class CompetitorOffers(BaseModel):
+    current: List[CompetitorOffer]
+    appeared: List[CompetitorOfferEvent]
+    disappeared: List[CompetitorOfferEvent]
+    price_changed: List[CompetitorOfferEvent]
+
+
+class CompetitorSummaryResponse(BaseModel):
+    domain: str
+    runs: int
+    first_seen: float
+    last_seen: float
+    findings: Dict[str, List[CompetitorFinding]]
+    style_score: StyleTrend
+    offers: CompetitorOffers
 
 
 class HistoryItem(BaseModel):
@@ -40,5 +288,50 @@ class HistoryResponse(BaseModel):
     items: List[HistoryItem]
 
 
+class HealthResponse(BaseModel):
+    status: str
+    pid: int
+    checks: Dict[str, bool]
+
+
 class ErrorResponse(BaseModel):
     error: str
+
+
+def _as_string_list(value: Any) -> Any:
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [item if isinstance(item, str) else str(item) for item in value if item is not None]
+    return value
+
+
+class TextAnalysis(BaseModel):
+    strengths: List[str]
+    weaknesses: List[str]
+    unique_offers: List[str]
+    recommendations: List[str]
+
+    _coerce_lists = field_validator(
+        "strengths", "weaknesses", "unique_offers", "recommendations", mode="before"
+    )(_as_string_list)
+
+
+class ImageAnalysis(BaseModel):
+    description: str
+    insights: List[str]
+    style_score: int | float = Field(..., ge=1, le=10)
+
+    _coerce_lists = field_validator("insights", mode="before")(_as_string_list)
+
+    @field_validator("style_score", mode="before")
+    @classmethod
+    def _parse_score(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            match = re.search(r"\d+(?:[.,]\d+)?", value)
+            if not match:
+                return value
+            value = float(match.group(0).replace(",", "."))
+        if isinstance(value, float) and value.is_integer():
+            return int(value)
+        return value
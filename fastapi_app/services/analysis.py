@@ -1,29 +1,156 @@
 import json
-from typing import Any, Dict
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple, Type
 
-from fastapi_app.core import config
+from pydantic import BaseModel
+
+from fastapi_app.core import cache, cancellation, config, routing
+from fastapi_app.core.tenants import current_tenant
+from fastapi_app.schemas import ImageAnalysis, TextAnalysis
+from fastapi_app.services import providers
+from fastapi_app.services.content import compact_text, estimate_tokens, fit_to_budget
 from fastapi_app.services.gigachat import GigaChatClient
+from fastapi_app.services.llm_json import JSONStreamExtractor, parse_json, validate
+from fastapi_app.services.packing import MicroBatcher, pack_prompt
 
+logger = logging.getLogger(__name__)
 
 def _extract_json(text: str) -> Dict[str, Any]:
+    return parse_json(text)
+
+
+def _complete(prompt: str, model: str, call: Dict[str, Any]) -> str:
+    client = GigaChatClient(model)
+    call["cached"] = False
+    if not config.GIGACHAT_STREAM:
+        content = client.chat(prompt)
+        call["tokens"] = client.tokens
+        return content
+    extractor = JSONStreamExtractor()
+    stream = client.chat_stream(prompt)
     try:
-        return json.loads(text)
-    except json.JSONDecodeError:
-        start = text.find("{")
-        end = text.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            try:
-                return json.loads(text[start : end + 1])
-            except json.JSONDecodeError:
-                return {}
-        return {}
-
-
-def analyze_text(text: str) -> Dict[str, Any]:
-    if not (config.GIGACHAT_CLIENT_ID and config.GIGACHAT_CLIENT_SECRET):
-        return _fallback_text_analysis(text)
+        for chunk in stream:
+            if extractor.feed(chunk):
+                break
+    finally:
+        stream.close()
+        call["tokens"] = client.tokens
+    return extractor.candidate() or extractor.text()
+
+
+def _chat(prompt: str, model: str, call: Dict[str, Any]) -> str:
+    # `call` reports whether the answer came from the cache and how many tokens a real call used
+    call.update(cached=True, tokens=0)
+    key = cache.make_key("gigachat", model, prompt)
+    return cache.cached_call(key, lambda: _complete(prompt, model, call), config.LLM_CACHE_TTL)
+
+
+def _reask_prompt(model: Type[BaseModel], problems: List[str], response: str) -> str:
+    return (
+        "Исправь ответ: он должен быть корректным JSON с ключами "
+        f"{', '.join(model.model_fields)}. "
+        f"Отсутствуют или заполнены неверно: {', '.join(problems)}. "
+        "Верни только JSON, без пояснений.\n\n"
+        f"Ответ:\n{response[:3000]}"
+    )
+
+
+def _routed_chat(
+    prompt: str, schema: Type[BaseModel], task: str, tier: int, model: str, input_tokens: int, last: bool
+) -> Tuple[Optional[Dict[str, Any]], str, float]:
+    call: Dict[str, Any] = {}
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        response = _chat(prompt, model, call)
+        result, _ = validate(schema, parse_json(response))
+        filled = routing.completeness(schema, result)
+        if filled >= config.ROUTE_MIN_COMPLETENESS or (last and result is not None):
+            outcome = "accepted"
+        elif not last:
+            outcome = "escalated"
+        return result, response, filled
+    finally:
+        latency_ms = (time.perf_counter() - started) * 1000
+        routing.record(task, model, tier, input_tokens, call.get("tokens", 0), latency_ms, call.get("cached", False),
+                       outcome)
 
-    prompt = (
+
+def _structured_chat(prompt: str, schema: Type[BaseModel], task: str) -> Tuple[Optional[Dict[str, Any]], str]:
+    input_tokens = estimate_tokens(prompt)
+    route = routing.plan(task, input_tokens)
+    # the most complete valid answer so far; a later tier may fail outright and must not discard it
+    best: Tuple[Optional[Dict[str, Any]], str, float] = (None, "", -1.0)
+    response = ""
+    for step, (tier, model) in enumerate(route):
+        result, response, filled = _routed_chat(
+            prompt, schema, task, tier, model, input_tokens, step == len(route) - 1
+        )
+        if result is not None and filled >= config.ROUTE_MIN_COMPLETENESS:
+            return result, response
+        if result is not None and filled > best[2]:
+            best = (result, response, filled)
+    if best[0] is not None or not config.LLM_REASK:
+        return best[0], best[1] or response
+    _, problems = validate(schema, parse_json(response))
+    tier, model = route[-1]
+    retry_prompt = _reask_prompt(schema, problems, response)
+    result, retry, _ = _routed_chat(retry_prompt, schema, task, tier, model, estimate_tokens(retry_prompt), True)
+    return result, retry
+
+
+def _run_pack(key: Tuple[Any, ...], items: List[Tuple[str, str]]) -> List[Optional[Dict[str, Any]]]:
+    schema, task, tier, model, _ = key
+    prompt = pack_prompt(schema, [body for body, _ in items])
+    results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+    call: Dict[str, Any] = {}
+    started = time.perf_counter()
+    outcome = "failed"
+    try:
+        data = parse_json(_chat(prompt, model, call))
+        for index, (_, item_key) in enumerate(items):
+            entry = data.get(str(index + 1))
+            result, _ = validate(schema, entry) if isinstance(entry, dict) else (None, [])
+            if result is None or routing.completeness(schema, result) < config.ROUTE_MIN_COMPLETENESS:
+                continue
+            results[index] = result
+            if config.LLM_CACHE_TTL > 0:
+                # a later single call for the same item is answered from the cache
+                cache.store(item_key, json.dumps(result, ensure_ascii=False), config.LLM_CACHE_TTL)
+        if all(results):
+            outcome = "accepted"
+        elif any(results):
+            outcome = "escalated"
+    except cancellation.Cancelled:
+        raise
+    except Exception as exc:
+        logger.warning("Packed %s call failed, items fall back to single calls: %s", task, exc)
+    finally:
+        latency_ms = (time.perf_counter() - started) * 1000
+        routing.record(f"{task}-packed", model, tier, estimate_tokens(prompt), call.get("tokens", 0), latency_ms,
+                       call.get("cached", False), outcome)
+    return results
+
+
+_packer = MicroBatcher(_run_pack)
+
+
+def _packed_chat(prompt: str, body: str, schema: Type[BaseModel], task: str) -> Optional[Dict[str, Any]]:
+    # short inputs that arrive together share one call; None means the caller makes its own call
+    if config.PACK_WINDOW_MS <= 0 or config.PACK_MAX_ITEMS < 2 or estimate_tokens(body) > config.PACK_MAX_ITEM_TOKENS:
+        return None
+    tier, model = routing.plan(task, estimate_tokens(prompt))[0]
+    item_key = cache.make_key("gigachat", model, prompt)
+    if config.LLM_CACHE_TTL > 0 and cache.lookup(item_key) is not None:
+        return None
+    # items are packed per tenant so that each tenant is charged for its own tokens
+    key = (schema, task, tier, model, current_tenant.get().name)
+    return _packer.submit(key, (body, item_key), config.PACK_WINDOW_MS / 1000, config.PACK_MAX_ITEMS)
+
+
+def _text_prompt(text: str) -> str:
+    return (
         "Ты маркетинговый аналитик. "
         "Сделай структурированный анализ конкурентного текста. "
         "Верни ответ строго в JSON с ключами: "
@@ -31,59 +158,69 @@ def analyze_text(text: str) -> Dict[str, Any]:
         "Каждое поле — список строк. "
         f"\n\nТекст конкурента:\n{text}"
     )
+
+
+def _image_prompt(text_summary: str) -> str:
+    return (
+        "Ты маркетинговый аналитик. "
+        "На основе описания изображения дай анализ. "
+        "Верни ответ строго в JSON с ключами: "
+        "description, insights, style_score. "
+        "description — строка, insights — список строк, "
+        "style_score — число от 1 до 10.\n\n"
+        f"Описание: {text_summary}"
+    )
+
+
+def analyze_text(text: str, task: str = "text") -> Dict[str, Any]:
+    text = fit_to_budget(compact_text(text), config.PROMPT_TOKEN_BUDGET)
+    prompt = _text_prompt(text)
+    provider = providers.provider_name()
+    if provider != "gigachat":
+        return providers.analyze(provider, TextAnalysis, text, prompt)
+    if not (config.GIGACHAT_CLIENT_ID and config.GIGACHAT_CLIENT_SECRET):
+        return _fallback_text_analysis(text)
+
     try:
-        client = GigaChatClient()
-        response = client.chat(prompt)
-        parsed = _extract_json(response)
+        parsed = _packed_chat(prompt, text, TextAnalysis, task)
+        if parsed:
+            return parsed
+        parsed, response = _structured_chat(prompt, TextAnalysis, task)
         if parsed:
             return parsed
         return _fallback_text_analysis(text, response)
+    except cancellation.Cancelled:
+        raise
     except Exception:
         return _fallback_text_analysis(text)
 
 
 def analyze_image(text_summary: str) -> Dict[str, Any]:
+    prompt = _image_prompt(text_summary)
+    provider = providers.provider_name()
+    if provider != "gigachat":
+        return providers.analyze(provider, ImageAnalysis, text_summary, prompt)
     if not (config.GIGACHAT_CLIENT_ID and config.GIGACHAT_CLIENT_SECRET):
         return _fallback_image_analysis(text_summary)
 
-    prompt = (
-        "Ты маркетинговый аналитик. "
-        "На основе описания изображения дай анализ. "
-        "Верни ответ строго в JSON с ключами: "
-        "description, insights, style_score. "
-        "description — строка, insights — список строк, "
-        "style_score — число от 1 до 10.\n\n"
-        f"Описание: {text_summary}"
-    )
     try:
-        client = GigaChatClient()
-        response = client.chat(prompt)
-        parsed = _extract_json(response)
+        parsed = _packed_chat(prompt, text_summary, ImageAnalysis, "image")
+        if parsed:
+            return parsed
+        parsed, response = _structured_chat(prompt, ImageAnalysis, "image")
         if parsed:
             return parsed
         return _fallback_image_analysis(text_summary, response)
+    except cancellation.Cancelled:
+        raise
     except Exception:
         return _fallback_image_analysis(text_summary)
 
 
+# when GigaChat is unavailable or its answer is unusable, the local keyword analysis stands in
 def _fallback_text_analysis(text: str, raw: str | None = None) -> Dict[str, Any]:
-    snippet = text.strip().split("\n")[0][:120]
-    return {
-        "strengths": [f"Четко сформулирован основной месседж: {snippet}"],
-        "weaknesses": ["Недостаточно данных о подтверждениях и кейсах."],
-        "unique_offers": ["Упоминание пользы для клиента нуждается в уточнении."],
-        "recommendations": [
-            "Добавить конкретные выгоды и цифры.",
-            "Усилить призыв к действию.",
-        ],
-        "raw": raw,
-    }
+    return {**providers.get("keywords").analyze_text(text), "raw": raw}
 
 
 def _fallback_image_analysis(text_summary: str, raw: str | None = None) -> Dict[str, Any]:
-    return {
-        "description": f"Изображение с характеристиками: {text_summary}.",
-        "insights": ["Проверьте, соответствует ли визуальный стиль бренду."],
-        "style_score": 6,
-        "raw": raw,
-    }
+    return {**providers.get("keywords").analyze_image(text_summary), "raw": raw}
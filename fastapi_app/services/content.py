@@ -0,0 +1,154 @@
+import hashlib
+import math
+import re
+import sqlite3
+from typing import Iterable, List, Optional, Set
+from urllib.parse import urlparse
+
+from fastapi_app.core import config, db
+from fastapi_app.services.html_text import ExtractedPage
+
+_CYRILLIC_RE = re.compile(r"[Ѐ-ӿ]")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS template_domains (domain TEXT PRIMARY KEY, pages INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS template_urls (
+    domain TEXT NOT NULL, url_hash TEXT NOT NULL, PRIMARY KEY (domain, url_hash)
+);
+CREATE TABLE IF NOT EXISTS template_blocks (
+    domain TEXT NOT NULL, fingerprint TEXT NOT NULL, pages INTEGER NOT NULL, last_page INTEGER NOT NULL,
+    PRIMARY KEY (domain, fingerprint)
+);
+"""
+
+
+def fingerprint(text: str) -> str:
+    normalized = " ".join(_WORD_RE.findall(text.lower()))
+    return hashlib.blake2b(normalized.encode("utf-8"), digest_size=12).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    cyrillic = len(_CYRILLIC_RE.findall(text))
+    chars_per_token = 3.0 if cyrillic > len(text) * 0.3 else 4.0
+    return math.ceil(len(text) / chars_per_token)
+
+
+def fit_to_budget(text: str, max_tokens: int) -> str:
+    if max_tokens <= 0 or estimate_tokens(text) <= max_tokens:
+        return text
+    kept: List[str] = []
+    used = 0
+    for line in text.split("\n"):
+        cost = estimate_tokens(line) + 1
+        if used + cost <= max_tokens:
+            kept.append(line)
+            used += cost
+            continue
+        remaining = max_tokens - used
+        if remaining > 8:
+            ratio = remaining / cost
+            cut = line[: int(len(line) * ratio)]
+            cut = cut.rsplit(" ", 1)[0] if " " in cut else cut
+            kept.append(cut + "…")
+        break
+    return "\n".join(kept)
+
+
+def compact_text(text: str) -> str:
+    seen: Set[str] = set()
+    lines: List[str] = []
+    for raw in text.splitlines():
+        line = " ".join(raw.split())
+        if not line:
+            continue
+        key = fingerprint(line)
+        if key in seen:
+            continue
+        seen.add(key)
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def domain_of(url: str) -> str:
+    host = urlparse(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def _connect() -> sqlite3.Connection:
+    return db.connect("content.sqlite3", _SCHEMA)
+
+
+def template_fingerprints(domain: str) -> Set[str]:
+    conn = _connect()
+    row = conn.execute("SELECT pages FROM template_domains WHERE domain = ?", (domain,)).fetchone()
+    pages = row[0] if row else 0
+    if pages < config.TEMPLATE_MIN_PAGES:
+        return set()
+    threshold = max(config.TEMPLATE_MIN_PAGES, math.ceil(pages * config.TEMPLATE_MIN_SHARE))
+    rows = conn.execute(
+        "SELECT fingerprint FROM template_blocks WHERE domain = ? AND pages >= ?", (domain, threshold)
+    )
+    return {fp for (fp,) in rows}
+
+
+def learn_template(domain: str, url: str, fingerprints: Iterable[str]) -> None:
+    conn = _connect()
+    url_hash = hashlib.blake2b(url.encode("utf-8"), digest_size=12).hexdigest()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        inserted = conn.execute(
+            "INSERT OR IGNORE INTO template_urls (domain, url_hash) VALUES (?, ?)", (domain, url_hash)
+        ).rowcount
+        if not inserted:
+            conn.execute("COMMIT")
+            return
+        conn.execute(
+            "INSERT INTO template_domains (domain, pages) VALUES (?, 1) "
+            "ON CONFLICT (domain) DO UPDATE SET pages = pages + 1",
+            (domain,),
+        )
+        (page,) = conn.execute("SELECT pages FROM template_domains WHERE domain = ?", (domain,)).fetchone()
+        conn.executemany(
+            "INSERT INTO template_blocks (domain, fingerprint, pages, last_page) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT (domain, fingerprint) DO UPDATE SET pages = pages + 1, last_page = excluded.last_page",
+            [(domain, fp, page) for fp in set(fingerprints)],
+        )
+        if page % 50 == 0:
+            conn.execute(
+                "DELETE FROM template_blocks WHERE domain = ? AND pages = 1 AND last_page < ?",
+                (domain, page - 50),
+            )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def select_content(page: ExtractedPage, url: Optional[str] = None) -> str:
+    blocks = page.blocks
+    main = [block for block in blocks if block.main and not block.boilerplate]
+    if sum(len(block.text) for block in main) >= config.MAIN_CONTENT_MIN_CHARS:
+        candidates = main
+    else:
+        candidates = [block for block in blocks if not block.boilerplate] or blocks
+
+    template: Set[str] = set()
+    if url:
+        domain = domain_of(url)
+        template = template_fingerprints(domain)
+        learn_template(domain, url, (fingerprint(block.text) for block in blocks))
+
+    seen: Set[str] = set()
+    lines: List[str] = []
+    for block in candidates:
+        if block.tag == "title":
+            continue
+        key = fingerprint(block.text)
+        if key in template or key in seen:
+            continue
+        seen.add(key)
+        lines.append(block.text)
+    return "\n".join(lines)
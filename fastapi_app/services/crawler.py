@@ -0,0 +1,313 @@
+import contextvars
+import hashlib
+import heapq
+import itertools
+import logging
+import math
+import re
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+from urllib.robotparser import RobotFileParser
+
+from fastapi_app.core import cancellation, config
+from fastapi_app.services import content
+from fastapi_app.services.content import domain_of
+from fastapi_app.services.parse_demo import PageContent, create_driver, fetch_html, parse_page, quit_driver
+from fastapi_app.services.urls import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+# pricing, product and landing pages are fetched first
+PRIORITY_RE = re.compile(
+    r"pric|tarif|plan|cen[ay]|tseny|product|catalog|shop|offer|akci|sale|promo|landing|buy|service|uslug"
+    r"|тариф|цен|прайс|каталог|товар|услуг|акци|скидк",
+    re.IGNORECASE,
+)
+SKIP_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".webp", ".svg", ".ico", ".pdf", ".zip", ".rar", ".doc", ".docx",
+    ".xls", ".xlsx", ".mp4", ".mp3", ".avi", ".css", ".js", ".xml", ".json", ".woff", ".woff2",
+)
+_SITEMAP_NS = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+MAX_SITEMAPS = 5
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = 0.001) -> None:
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> List[int]:
+        # Kirsch-Mitzenmacher double hashing over one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def add(self, item: str) -> bool:
+        added = False
+        for position in self._positions(item):
+            mask = 1 << (position & 7)
+            if not self._bits[position >> 3] & mask:
+                self._bits[position >> 3] |= mask
+                added = True
+        return added
+
+
+class Frontier:
+    # one priority queue per host; a host is handed out again only after its crawl delay
+    def __init__(self, delay: float) -> None:
+        self.delay = delay
+        self._queues: Dict[str, List[Tuple[int, int, int, str]]] = {}
+        self._ready_at: Dict[str, float] = {}
+        self._delays: Dict[str, float] = {}
+        self._in_flight = 0
+        self._closed = False
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+
+    def set_delay(self, host: str, delay: float) -> None:
+        with self._cond:
+            self._delays[host] = max(self.delay, delay)
+
+    def push(self, url: str, depth: int, priority: int) -> None:
+        host = urlsplit(url).netloc
+        with self._cond:
+            heapq.heappush(self._queues.setdefault(host, []), (priority, depth, next(self._counter), url))
+            self._cond.notify()
+
+    def pop(self, deadline: float) -> Optional[Tuple[str, int]]:
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                if now >= deadline:
+                    return None
+                waiting = [host for host, queue in self._queues.items() if queue]
+                if not waiting and not self._in_flight:
+                    return None
+                ready = [host for host in waiting if self._ready_at.get(host, 0.0) <= now]
+                if ready:
+                    host = min(ready, key=lambda item: self._queues[item][0])
+                    _, depth, _, url = heapq.heappop(self._queues[host])
+                    self._ready_at[host] = now + self._delays.get(host, self.delay)
+                    self._in_flight += 1
+                    return url, depth
+                wake = min((self._ready_at[host] for host in waiting), default=deadline)
+                self._cond.wait(max(0.01, min(wake, deadline) - now))
+            return None
+
+    def done(self) -> None:
+        with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+@dataclass
+class CrawledPage:
+    url: str
+    depth: int
+    page: PageContent
+
+
+@dataclass
+class CrawlResult:
+    start_url: str
+    pages: List[CrawledPage] = field(default_factory=list)
+    skipped: List[Dict[str, str]] = field(default_factory=list)
+    errors: List[Dict[str, str]] = field(default_factory=list)
+
+
+def url_priority(url: str) -> int:
+    return 0 if PRIORITY_RE.search(urlsplit(url).path) else 1
+
+
+def _get(url: str) -> Optional[Any]:
+    import requests
+
+    try:
+        response = requests.get(
+            url,
+            headers={"User-Agent": config.CRAWL_USER_AGENT},
+            timeout=cancellation.timeout(config.CRAWL_REQUEST_TIMEOUT),
+        )
+    except requests.RequestException as exc:
+        logger.info("Crawl fetch %s failed: %s", url, exc)
+        return None
+    return response
+
+
+def load_robots(root: str) -> RobotFileParser:
+    parser = RobotFileParser(f"{root}/robots.txt")
+    response = _get(f"{root}/robots.txt")
+    # missing or unreachable robots.txt means no restrictions
+    parser.parse(response.text.splitlines() if response is not None and response.status_code == 200 else [])
+    return parser
+
+
+def sitemap_urls(sitemaps: List[str], limit: int) -> List[str]:
+    found: List[str] = []
+    queue, visited = list(sitemaps), 0
+    while queue and visited < MAX_SITEMAPS and len(found) < limit:
+        response = _get(queue.pop(0))
+        visited += 1
+        if response is None or response.status_code != 200:
+            continue
+        try:
+            root = ElementTree.fromstring(response.content)
+        except ElementTree.ParseError:
+            continue
+        nested = root.tag == f"{_SITEMAP_NS}sitemapindex"
+        for loc in root.iter(f"{_SITEMAP_NS}loc"):
+            if loc.text:
+                (queue if nested else found).append(loc.text.strip())
+    return found[:limit]
+
+
+class Crawler:
+    def __init__(self, start_url: str, max_pages: int, max_depth: int, workers: int) -> None:
+        self.start_url = start_url
+        self.site = domain_of(start_url)
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.workers = max(1, workers)
+        self.frontier = Frontier(config.CRAWL_DELAY)
+        self.seen = BloomFilter(max(10_000, max_pages * 200))
+        self.result = CrawlResult(start_url)
+        self._robots: Dict[str, RobotFileParser] = {}
+        self._fingerprints: set = set()
+        self._lock = threading.Lock()
+
+    def _in_scope(self, url: str) -> bool:
+        host = domain_of(url)
+        return (host == self.site or host.endswith(f".{self.site}")) and not urlsplit(url).path.lower().endswith(
+            SKIP_EXTENSIONS
+        )
+
+    def _robots_for(self, url: str) -> RobotFileParser:
+        parts = urlsplit(url)
+        root = f"{parts.scheme}://{parts.netloc}"
+        with self._lock:
+            parser = self._robots.get(root)
+        if parser is None:
+            parser = load_robots(root)
+            delay = parser.crawl_delay(config.CRAWL_USER_AGENT)
+            if delay:
+                self.frontier.set_delay(parts.netloc, float(delay))
+            with self._lock:
+                parser = self._robots.setdefault(root, parser)
+        return parser
+
+    def enqueue(self, url: str, depth: int) -> None:
+        if depth > self.max_depth or not self._in_scope(url) or not self.seen.add(url):
+            return
+        if not self._robots_for(url).can_fetch(config.CRAWL_USER_AGENT, url):
+            with self._lock:
+                self.result.skipped.append({"url": url, "reason": "robots.txt"})
+            return
+        self.frontier.push(url, depth, url_priority(url))
+
+    def seed(self) -> None:
+        self.enqueue(self.start_url, 0)
+        robots = self._robots_for(self.start_url)
+        parts = urlsplit(self.start_url)
+        sitemaps = robots.site_maps() or [f"{parts.scheme}://{parts.netloc}/sitemap.xml"]
+        for url in sitemap_urls(sitemaps, self.max_pages * 10):
+            canonical = canonicalize_url(url)
+            if canonical:
+                self.enqueue(canonical, 1)
+
+    def _accept(self, url: str, depth: int, page: PageContent) -> bool:
+        fingerprint = content.fingerprint(page.full_text)
+        with self._lock:
+            if len(self.result.pages) >= self.max_pages:
+                return False
+            if fingerprint in self._fingerprints:
+                self.result.skipped.append({"url": url, "reason": "duplicate"})
+                return False
+            self._fingerprints.add(fingerprint)
+            self.result.pages.append(CrawledPage(url, depth, page))
+            if len(self.result.pages) >= self.max_pages:
+                self.frontier.close()
+            return True
+
+    def _work(self, deadline: float) -> None:
+        driver = None
+        try:
+            while True:
+                item = self.frontier.pop(deadline)
+                if item is None:
+                    return
+                url, depth = item
+                try:
+                    if driver is None:
+                        driver = create_driver()
+                    html, _ = fetch_html(url, driver=driver)
+                    page = parse_page(html, url)
+                    canonical = canonicalize_url(page.canonical, url) if page.canonical else None
+                    # a page whose canonical URL was already seen (or lives off-site) is a duplicate
+                    if canonical and canonical != url and (not self._in_scope(canonical) or not self.seen.add(canonical)):
+                        with self._lock:
+                            self.result.skipped.append({"url": url, "reason": "canonical"})
+                    elif self._accept(url, depth, page) and "nofollow" not in page.robots:
+                        for link in page.links:
+                            target = canonicalize_url(link, url)
+                            if target:
+                                self.enqueue(target, depth + 1)
+                except cancellation.Cancelled:
+                    return
+                except Exception as exc:
+                    logger.warning("Crawl of %s failed: %s", url, exc)
+                    with self._lock:
+                        self.result.errors.append({"url": url, "error": str(exc)})
+                finally:
+                    self.frontier.done()
+        finally:
+            if driver is not None:
+                quit_driver(driver)
+
+    def run(self) -> CrawlResult:
+        deadline = time.monotonic() + cancellation.timeout(config.CRAWL_MAX_SECONDS)
+        self.seed()
+        with cancellation.on_cancel(self.frontier.close):
+            with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="crawl") as pool:
+                # each worker gets its own copy of the request context, cancel token included
+                futures = [
+                    pool.submit(contextvars.copy_context().run, self._work, deadline) for _ in range(self.workers)
+                ]
+                for future in futures:
+                    future.result()
+        cancellation.check()
+        self.result.pages.sort(key=lambda item: (url_priority(item.url), item.depth, item.url))
+        return self.result
+
+
+def crawl(start_url: str, max_pages: int, max_depth: int, workers: Optional[int] = None) -> CrawlResult:
+    start = canonicalize_url(start_url)
+    if not start:
+        raise ValueError(f"Invalid URL: {start_url}")
+    return Crawler(start, max_pages, max_depth, workers or config.CRAWL_WORKERS).run()
+
+
+def site_text(result: CrawlResult, budget: int) -> str:
+    # split the prompt budget between pages so that every crawled page is represented
+    pages = [item for item in result.pages if item.page.text]
+    if not pages:
+        return ""
+    share = max(50, budget // len(pages))
+    sections = [
+        f"## {item.page.title} ({item.url})\n{content.fit_to_budget(item.page.text, share)}" for item in pages
+    ]
+    return "\n\n".join(sections)
@@ -0,0 +1,243 @@
+import json
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from fastapi_app.services.html_text import BlockCollector, ExtractedPage, extract_page
+
+HEADING_TAGS = {"h1", "h2", "h3"}
+CTA_CLASS_RE = re.compile(r"btn|button|cta|buy|order|checkout|signup|cart", re.IGNORECASE)
+_AMOUNT = r"\d{1,3}(?:[ \u00a0\u202f]\d{3})+(?:[.,]\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+PRICE_RE = re.compile(
+    rf"(?P<pre>[$€£])\s?(?P<a1>{_AMOUNT})"
+    rf"|(?P<a2>{_AMOUNT})\s?(?P<post>₽|руб\.?|р\.|rub\b|usd\b|eur\b|[$€£₸])",
+    re.IGNORECASE,
+)
+CURRENCIES = {
+    "₽": "RUB", "руб": "RUB", "руб.": "RUB", "р.": "RUB", "rub": "RUB",
+    "$": "USD", "usd": "USD", "€": "EUR", "eur": "EUR", "£": "GBP", "₸": "KZT",
+}
+MAX_PRICES = 50
+MAX_CTAS = 30
+MAX_LINKS = 1000
+
+
+@dataclass
+class Offer:
+    name: str
+    price: Optional[float]
+    currency: str = ""
+    availability: str = ""
+    source: str = "text"
+
+
+@dataclass
+class PageFacts:
+    title: str = ""
+    description: str = ""
+    headings: List[Dict[str, Any]] = field(default_factory=list)
+    ctas: List[str] = field(default_factory=list)
+    offers: List[Offer] = field(default_factory=list)
+    schema_types: List[str] = field(default_factory=list)
+    opengraph: Dict[str, str] = field(default_factory=dict)
+
+
+class FactsCollector(BlockCollector):
+    def __init__(self) -> None:
+        super().__init__()
+        self.meta: Dict[str, str] = {}
+        self.jsonld: List[str] = []
+        self.ctas: List[str] = []
+        self.microdata: Dict[str, str] = {}
+        self.links: List[str] = []
+        self.canonical = ""
+        self._script: Optional[List[str]] = None
+        # (stack depth, kind, text parts) for elements whose own text we need
+        self._captures: List[Tuple[int, str, List[str]]] = []
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> None:
+        tag = tag.lower()
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json" and not self._skip:
+            self._script = []
+        elif tag == "meta":
+            key = attrs.get("property") or attrs.get("name") or attrs.get("itemprop")
+            if key and attrs.get("content"):
+                self.meta.setdefault(key.lower(), attrs["content"].strip())
+        elif tag == "input" and (attrs.get("type") or "").lower() in {"submit", "button"}:
+            self._add_cta(attrs.get("value") or "")
+        elif tag == "link" and "canonical" in (attrs.get("rel") or "").lower().split() and attrs.get("href"):
+            self.canonical = self.canonical or attrs["href"].strip()
+        elif tag in {"a", "area"} and attrs.get("href") and len(self.links) < MAX_LINKS:
+            if "nofollow" not in (attrs.get("rel") or "").lower().split():
+                self.links.append(attrs["href"].strip())
+        super().start(tag, attrs)
+        if self._skip:
+            return
+        itemprop = attrs.get("itemprop")
+        if itemprop in {"price", "priceCurrency", "name"}:
+            if attrs.get("content"):
+                self.microdata.setdefault(itemprop, attrs["content"].strip())
+            else:
+                self._captures.append((len(self._stack), f"microdata:{itemprop}", []))
+        if tag == "button" or (
+            tag == "a" and ((attrs.get("role") or "") == "button" or CTA_CLASS_RE.search(attrs.get("class") or ""))
+        ):
+            self._captures.append((len(self._stack), "cta", []))
+
+    def end(self, tag: str) -> None:
+        if self._script is not None and tag.lower() == "script":
+            self.jsonld.append("".join(self._script))
+            self._script = None
+        super().end(tag)
+        while self._captures and len(self._stack) < self._captures[-1][0]:
+            _, kind, parts = self._captures.pop()
+            text = " ".join("".join(parts).split())
+            if kind == "cta":
+                self._add_cta(text)
+            elif text:
+                self.microdata.setdefault(kind.split(":", 1)[1], text)
+
+    def data(self, text: str) -> None:
+        if self._script is not None:
+            self._script.append(text)
+            return
+        super().data(text)
+        if not self._skip:
+            for _, _, parts in self._captures:
+                parts.append(text)
+
+    def _add_cta(self, text: str) -> None:
+        text = " ".join(text.split())
+        if text and len(text) <= 80 and text not in self.ctas and len(self.ctas) < MAX_CTAS:
+            self.ctas.append(text)
+
+
+def parse_amount(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if not isinstance(value, str):
+        return None
+    cleaned = re.sub(r"[\s\u00a0\u202f]", "", value).replace(",", ".")
+    match = re.search(r"\d+(?:\.\d+)?", cleaned)
+    return float(match.group()) if match else None
+
+
+def _types(node: Dict[str, Any]) -> List[str]:
+    value = node.get("@type") or []
+    return [value] if isinstance(value, str) else [item for item in value if isinstance(item, str)]
+
+
+def _nodes(value: Any) -> Iterator[Dict[str, Any]]:
+    if isinstance(value, dict):
+        yield value
+    elif isinstance(value, list):
+        for item in value:
+            yield from _nodes(item)
+
+
+def _short(value: Any) -> str:
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@id") or ""
+    return str(value or "").rsplit("/", 1)[-1]
+
+
+def _offer_from(node: Dict[str, Any], name: str) -> Offer:
+    price = node.get("price")
+    if price is None:
+        price = node.get("lowPrice")
+    if price is None and isinstance(node.get("priceSpecification"), dict):
+        price = node["priceSpecification"].get("price")
+    return Offer(
+        name=name,
+        price=parse_amount(price),
+        currency=str(node.get("priceCurrency") or ""),
+        availability=_short(node.get("availability")),
+        source="jsonld",
+    )
+
+
+def jsonld_offers(documents: List[str]) -> Tuple[List[Offer], List[str]]:
+    offers: List[Offer] = []
+    types: List[str] = []
+    pending: List[Dict[str, Any]] = []
+    for raw in documents:
+        try:
+            pending.extend(_nodes(json.loads(raw, strict=False)))
+        except ValueError:
+            continue
+    while pending:
+        node = pending.pop(0)
+        node_types = _types(node)
+        types.extend(item for item in node_types if item not in types)
+        if "Offer" in node_types or "AggregateOffer" in node_types:
+            offers.append(_offer_from(node, _short(node.get("itemOffered")) or str(node.get("name") or "")))
+            continue
+        name = str(node.get("name") or "")
+        for key, value in node.items():
+            if key == "offers":
+                offers.extend(_offer_from(offer, name) for offer in _nodes(value))
+            elif isinstance(value, (dict, list)):
+                pending.extend(_nodes(value))
+    return offers, types
+
+
+def text_offers(page: ExtractedPage) -> List[Offer]:
+    offers: List[Offer] = []
+    for block in page.blocks:
+        if block.boilerplate or block.tag == "title":
+            continue
+        for match in PRICE_RE.finditer(block.text):
+            symbol = (match.group("pre") or match.group("post") or "").lower()
+            offers.append(
+                Offer(
+                    name=PRICE_RE.sub("…", block.text)[:160],
+                    price=parse_amount(match.group("a1") or match.group("a2")),
+                    currency=CURRENCIES.get(symbol, symbol.upper()),
+                )
+            )
+            if len(offers) >= MAX_PRICES:
+                return offers
+    return offers
+
+
+def extract(html: str, collector: Optional[FactsCollector] = None) -> Tuple[ExtractedPage, PageFacts]:
+    collector = collector or FactsCollector()
+    page = extract_page(html, target=collector)
+    meta = collector.meta
+
+    offers, schema_types = jsonld_offers(collector.jsonld)
+    og_price = meta.get("product:price:amount") or meta.get("og:price:amount")
+    if og_price:
+        offers.append(
+            Offer(
+                name=meta.get("og:title") or page.title,
+                price=parse_amount(og_price),
+                currency=meta.get("product:price:currency") or meta.get("og:price:currency") or "",
+                source="opengraph",
+            )
+        )
+    if "price" in collector.microdata:
+        offers.append(
+            Offer(
+                name=collector.microdata.get("name") or page.title,
+                price=parse_amount(collector.microdata["price"]),
+                currency=collector.microdata.get("priceCurrency", ""),
+                source="microdata",
+            )
+        )
+    offers.extend(text_offers(page))
+
+    facts = PageFacts(
+        title=meta.get("og:title") or page.title,
+        description=meta.get("og:description") or meta.get("description") or "",
+        headings=[
+            {"level": int(block.tag[1]), "text": block.text}
+            for block in page.blocks
+            if block.tag in HEADING_TAGS and not block.boilerplate
+        ],
+        ctas=collector.ctas,
+        offers=offers,
+        schema_types=schema_types,
+        opengraph={key: value for key, value in meta.items() if key.startswith(("og:", "product:"))},
+    )
+    return page, facts
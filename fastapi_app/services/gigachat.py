@@ -1,20 +1,83 @@
 import base64
+import hashlib
+import json
+import threading
 import time
 import uuid
-from typing import Optional
+from typing import Any, Dict, Iterator, Optional, Tuple
 
-import requests
+from fastapi_app.core import cancellation, config
+from fastapi_app.core.locks import atomic_write_text, file_lock
+from fastapi_app.core.tenants import record_tokens
 
-from fastapi_app.core import config
+
+class _TokenCache:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tokens: Dict[str, Tuple[str, float]] = {}
+
+    @property
+    def _path(self):
+        return config.DATA_DIR / ".gigachat_token.json"
+
+    def get(self, key: str) -> Optional[str]:
+        token, expiry = self._tokens.get(key, ("", 0.0))
+        if token and time.time() < expiry:
+            return token
+        return None
+
+    def get_or_refresh(self, key: str, refresh) -> str:
+        token = self.get(key)
+        if token:
+            return token
+        with self._lock, file_lock(self._path.with_name(self._path.name + ".lock")):
+            token = self.get(key) or self._load(key)
+            if token:
+                return token
+            token, expiry = refresh()
+            self._tokens[key] = (token, expiry)
+            self._store(key, token, expiry)
+            return token
+
+    def _load(self, key: str) -> Optional[str]:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        entry = data.get(key) if isinstance(data, dict) else None
+        if not isinstance(entry, dict):
+            return None
+        token, expiry = entry.get("access_token"), float(entry.get("expires_at", 0))
+        if not token or time.time() >= expiry:
+            return None
+        self._tokens[key] = (token, expiry)
+        return token
+
+    def _store(self, key: str, token: str, expiry: float) -> None:
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            data = {}
+        if not isinstance(data, dict):
+            data = {}
+        now = time.time()
+        data = {k: v for k, v in data.items() if isinstance(v, dict) and v.get("expires_at", 0) > now}
+        data[key] = {"access_token": token, "expires_at": expiry}
+        atomic_write_text(self._path, json.dumps(data), mode=0o600)
+
+
+_token_cache = _TokenCache()
 
 
 class GigaChatClient:
-    def __init__(self) -> None:
+    def __init__(self, model: Optional[str] = None) -> None:
+        self.model = model or config.GIGACHAT_MODEL
+        # tokens billed for the last completion
+        self.tokens = 0
         self._client_id = config.GIGACHAT_CLIENT_ID
         self._client_secret = config.GIGACHAT_CLIENT_SECRET
-        self._access_token: Optional[str] = None
-        self._token_expiry = 0.0
-        self._base_url = "https://gigachat.devices.sberbank.ru/api/v1"
+        self._cache_key = hashlib.sha256(f"{self._client_id}:{config.GIGACHAT_AUTH_URL}".encode()).hexdigest()
+        self._base_url = config.GIGACHAT_API_URL
 
     def _get_verify(self):
         if config.GIGACHAT_CA_CERT:
@@ -26,8 +89,10 @@ class GigaChatClient:
             return str(default_cert)
         return True
 
-    def _refresh_token(self) -> str:
-        url = "https://ngw.devices.sberbank.ru:9443/api/v2/oauth"
+    def _refresh_token(self) -> Tuple[str, float]:
+        import requests
+
+        url = config.GIGACHAT_AUTH_URL
         auth_payload = f"{self._client_id}:{self._client_secret}".encode("utf-8")
         headers = {
             "Authorization": f"Basic {base64.b64encode(auth_payload).decode('utf-8')}",
@@ -38,36 +103,96 @@ class GigaChatClient:
             url,
             data="scope=GIGACHAT_API_PERS",
             headers=headers,
-            timeout=30,
+            timeout=cancellation.timeout(30),
             verify=self._get_verify(),
         )
         response.raise_for_status()
         payload = response.json()
-        self._access_token = payload["access_token"]
         expires_in = payload.get("expires_in", 1800)
-        self._token_expiry = time.time() + expires_in - 30
-        return self._access_token
+        return payload["access_token"], time.time() + expires_in - 30
 
     def _get_token(self) -> str:
-        if not self._access_token or time.time() >= self._token_expiry:
-            return self._refresh_token()
-        return self._access_token
+        return _token_cache.get_or_refresh(self._cache_key, self._refresh_token)
 
-    def chat(self, prompt: str, temperature: float = 0.2) -> str:
-        url = f"{self._base_url}/chat/completions"
-        headers = {"Authorization": f"Bearer {self._get_token()}"}
+    def _payload(self, prompt: str, temperature: float, stream: bool = False) -> Dict[str, Any]:
         payload = {
-            "model": config.GIGACHAT_MODEL,
+            "model": self.model,
             "messages": [{"role": "user", "content": prompt}],
             "temperature": temperature,
         }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def _record_usage(self, usage: Dict[str, Any], prompt: str, content: str) -> None:
+        self.tokens = (
+            int(usage.get("total_tokens") or 0)
+            or int(usage.get("prompt_tokens") or 0) + int(usage.get("completion_tokens") or 0)
+            or (len(prompt) + len(content)) // 4
+        )
+        record_tokens(self.tokens)
+
+    def chat(self, prompt: str, temperature: float = 0.2) -> str:
+        import requests
+
+        url = f"{self._base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self._get_token()}"}
         response = requests.post(
             url,
-            json=payload,
+            json=self._payload(prompt, temperature),
             headers=headers,
-            timeout=60,
+            timeout=cancellation.timeout(60),
             verify=self._get_verify(),
         )
         response.raise_for_status()
         data = response.json()
-        return data["choices"][0]["message"]["content"]
+        content = data["choices"][0]["message"]["content"]
+        self._record_usage(data.get("usage") or {}, prompt, content)
+        return content
+
+    def chat_stream(self, prompt: str, temperature: float = 0.2) -> Iterator[str]:
+        import requests
+
+        url = f"{self._base_url}/chat/completions"
+        headers = {"Authorization": f"Bearer {self._get_token()}", "Accept": "text/event-stream"}
+        response = requests.post(
+            url,
+            json=self._payload(prompt, temperature, stream=True),
+            headers=headers,
+            timeout=cancellation.timeout(60),
+            verify=self._get_verify(),
+            stream=True,
+        )
+        parts = []
+        usage: Dict[str, Any] = {}
+        try:
+            response.raise_for_status()
+            if not response.headers.get("Content-Type", "").startswith("text/event-stream"):
+                data = response.json()
+                usage = data.get("usage") or {}
+                parts.append(data["choices"][0]["message"]["content"])
+                yield parts[-1]
+                return
+            if "charset" not in response.headers.get("Content-Type", ""):
+                response.encoding = "utf-8"
+            with cancellation.on_cancel(lambda: cancellation.shutdown_socket(response)):
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    body = line[5:].strip()
+                    if body == "[DONE]":
+                        break
+                    event = json.loads(body)
+                    usage = event.get("usage") or usage
+                    for choice in event.get("choices", []):
+                        delta = (choice.get("delta") or {}).get("content")
+                        if delta:
+                            parts.append(delta)
+                            yield delta
+        except (requests.RequestException, OSError):
+            # a socket shut down on cancellation surfaces as a connection error
+            cancellation.check()
+            raise
+        finally:
+            response.close()
+            self._record_usage(usage, prompt, "".join(parts))
@@ -0,0 +1,212 @@
+import importlib.util
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+BLOCK_TAGS = {
+    "address", "article", "aside", "blockquote", "caption", "dd", "div", "dl", "dt", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6", "header", "li",
+    "main", "nav", "ol", "p", "pre", "section", "table", "td", "th", "tr", "ul", "title",
+}
+SKIP_TAGS = {"script", "style", "noscript", "template"}
+VOID_TAGS = {
+    "area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta", "param", "source",
+    "track", "wbr",
+}
+BOILERPLATE_TAGS = {"nav", "header", "footer", "aside", "form"}
+BOILERPLATE_ROLES = {"navigation", "banner", "contentinfo", "complementary", "dialog", "alertdialog"}
+MAIN_TAGS = {"main", "article"}
+BOILERPLATE_RE = re.compile(
+    r"cookie|consent|gdpr|banner|navbar|menu|breadcrumb|footer|header|sidebar|subscribe|newsletter|"
+    r"popup|modal|social|share",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Block:
+    text: str
+    tag: str
+    boilerplate: bool = False
+    main: bool = False
+
+
+@dataclass
+class ExtractedPage:
+    title: str
+    blocks: List[Block] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return " ".join(block.text for block in self.blocks)
+
+
+def is_boilerplate_element(tag: str, attrs: Dict[str, str]) -> bool:
+    if tag in BOILERPLATE_TAGS:
+        return True
+    if (attrs.get("role") or "").lower() in BOILERPLATE_ROLES:
+        return True
+    if attrs.get("aria-hidden") == "true":
+        return True
+    marker = f"{attrs.get('id') or ''} {attrs.get('class') or ''}"
+    return bool(marker.strip()) and bool(BOILERPLATE_RE.search(marker))
+
+
+def is_main_element(tag: str, attrs: Dict[str, str]) -> bool:
+    return (
+        tag in MAIN_TAGS
+        or (attrs.get("role") or "").lower() == "main"
+        or attrs.get("itemprop") == "articleBody"
+    )
+
+
+class BlockCollector:
+    # lxml parser target (start/end/data/comment/close); the stdlib fallback feeds it the same events.
+    def __init__(self) -> None:
+        # (tag, block id, boilerplate, main) for every open element
+        self._stack: List[Tuple[str, int, bool, bool]] = []
+        self._next_block = 0
+        self._skip = 0
+        self._pending: List[str] = []
+        self._parts: List[str] = []
+        self._current: Optional[Tuple[int, str, bool, bool]] = None
+        self._title: Optional[List[str]] = None
+        self._title_done = False
+        self.blocks: List[Block] = []
+
+    def start(self, tag: str, attrs: Dict[str, str]) -> None:
+        tag = tag.lower()
+        if self._skip:
+            if tag in SKIP_TAGS:
+                self._skip += 1
+            return
+        self._flush_text()
+        if tag in SKIP_TAGS:
+            self._skip = 1
+            return
+        if tag == "title" and self._title is None:
+            self._title = []
+        elif self._title is not None and not self._title_done:
+            self._title.append("\0")
+        if tag in VOID_TAGS:
+            return
+        parent_block, parent_boilerplate, parent_main = (
+            self._stack[-1][1:] if self._stack else (-1, False, False)
+        )
+        block = parent_block
+        if tag in BLOCK_TAGS:
+            self._next_block += 1
+            block = self._next_block
+        self._stack.append(
+            (
+                tag,
+                block,
+                parent_boilerplate or is_boilerplate_element(tag, attrs),
+                parent_main or is_main_element(tag, attrs),
+            )
+        )
+
+    def end(self, tag: str) -> None:
+        tag = tag.lower()
+        if self._skip:
+            if tag in SKIP_TAGS:
+                self._skip -= 1
+            return
+        self._flush_text()
+        if tag == "title" and self._title is not None:
+            self._title_done = True
+        elif self._title is not None and not self._title_done:
+            self._title.append("\0")
+        for index in range(len(self._stack) - 1, -1, -1):
+            if self._stack[index][0] == tag:
+                del self._stack[index:]
+                break
+
+    def data(self, text: str) -> None:
+        if not self._skip:
+            self._pending.append(text)
+
+    def comment(self, text: str) -> None:
+        if not self._skip:
+            self._flush_text()
+
+    def close(self) -> ExtractedPage:
+        self._flush_text()
+        self._flush_block()
+        title = ""
+        if self._title and "\0" not in self._title:
+            title = "".join(self._title).strip()
+        return ExtractedPage(title=title or "Untitled", blocks=self.blocks)
+
+    def _flush_text(self) -> None:
+        if not self._pending:
+            return
+        text = "".join(self._pending)
+        self._pending = []
+        if self._title is not None and not self._title_done:
+            self._title.append(text)
+        _, block, boilerplate, main = self._stack[-1] if self._stack else ("", -1, False, False)
+        if self._current is None or self._current[0] != block:
+            self._flush_block()
+            tag = "body"
+            if block >= 0:
+                tag = next(entry[0] for entry in self._stack if entry[1] == block)
+            self._current = (block, tag, boilerplate, main)
+        else:
+            self._current = (block, self._current[1], boilerplate, main)
+        self._parts.append(text)
+
+    def _flush_block(self) -> None:
+        if self._current is None:
+            return
+        text = " ".join(" ".join(self._parts).split())
+        self._parts = []
+        _, tag, boilerplate, main = self._current
+        self._current = None
+        if text:
+            self.blocks.append(Block(text=text, tag=tag, boilerplate=boilerplate, main=main))
+
+
+def _parse_lxml(html: str, target: BlockCollector) -> ExtractedPage:
+    from lxml import etree
+
+    parser = etree.HTMLParser(target=target, remove_comments=False, huge_tree=True)
+    parser.feed(html)
+    return parser.close()
+
+
+def _parse_stdlib(html: str, target: BlockCollector) -> ExtractedPage:
+    from html.parser import HTMLParser
+
+    class _Adapter(HTMLParser):
+        def handle_starttag(self, tag, attrs):
+            target.start(tag, {name: value or "" for name, value in attrs})
+
+        def handle_startendtag(self, tag, attrs):
+            target.start(tag, {name: value or "" for name, value in attrs})
+            if tag not in VOID_TAGS:
+                target.end(tag)
+
+        def handle_endtag(self, tag):
+            target.end(tag)
+
+        def handle_data(self, data):
+            target.data(data)
+
+        def handle_comment(self, data):
+            target.comment(data)
+
+    adapter = _Adapter(convert_charrefs=True)
+    adapter.feed(html)
+    adapter.close()
+    return target.close()
+
+
+_HAS_LXML = importlib.util.find_spec("lxml") is not None
+
+
+def extract_page(html: str, engine: str = "auto", target: Optional[BlockCollector] = None) -> ExtractedPage:
+    target = target or BlockCollector()
+    if engine == "lxml" or (engine == "auto" and _HAS_LXML):
+        return _parse_lxml(html, target)
+    return _parse_stdlib(html, target)
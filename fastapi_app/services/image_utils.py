@@ -1,10 +1,23 @@
+import logging
+import math
 from io import BytesIO
-from typing import Dict
+from typing import Any, Dict
 
-from PIL import Image
+from fastapi_app.core import config
+
+logger = logging.getLogger(__name__)
+
+# formats that usually hold screenshots and flat graphics, where lossless PNG can beat JPEG
+_LOSSLESS_SOURCES = {"PNG", "GIF", "BMP", "TIFF", "WEBP"}
+# resampling a flat image blurs glyph edges and makes PNG compress worse, so lossless sources
+# are downscaled only when they exceed OCR_MAX_MEGAPIXELS by this factor
+_LOSSLESS_CAP_FACTOR = 2.0
+_EXIF_ORIENTATION = 0x0112
 
 
 def summarize_image(image_bytes: bytes) -> Dict[str, str]:
+    from PIL import Image
+
     image = Image.open(BytesIO(image_bytes))
     original_format = image.format
     image = image.convert("RGB")
@@ -26,3 +39,85 @@ def summarize_image(image_bytes: bytes) -> Dict[str, str]:
         "format": original_format or "unknown",
         "mode": image.mode,
     }
+
+
+def _flatten(image: Any) -> Any:
+    from PIL import Image
+
+    if image.mode in {"RGBA", "LA"} or (image.mode == "P" and "transparency" in image.info):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    if image.mode not in {"RGB", "L"}:
+        return image.convert("RGB")
+    return image
+
+
+def _encode(image: Any, fmt: str) -> bytes:
+    buffer = BytesIO()
+    if fmt == "png":
+        image.save(buffer, format="PNG")
+    else:
+        image.save(buffer, format="JPEG", quality=config.OCR_JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def prepare_for_ocr(image_bytes: bytes) -> bytes:
+    if not config.OCR_PREPROCESS:
+        return bytes(image_bytes)
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        return bytes(image_bytes)
+
+    try:
+        image = Image.open(BytesIO(image_bytes))
+        source_format = image.format or ""
+        rotated = image.getexif().get(_EXIF_ORIENTATION, 1) not in (0, 1)
+        image = _flatten(ImageOps.exif_transpose(image))
+
+        # OCR needs legible glyphs, not camera resolution: cap the pixel count
+        max_pixels = config.OCR_MAX_MEGAPIXELS * 1_000_000
+        if source_format in _LOSSLESS_SOURCES:
+            max_pixels *= _LOSSLESS_CAP_FACTOR
+        width, height = image.size
+        resized = max_pixels > 0 and width * height > max_pixels
+        if source_format == "PNG" and image.mode == "L" and not resized and not rotated and config.OCR_FORMAT != "jpeg":
+            # already a grayscale PNG within the cap: re-encoding cannot make it meaningfully smaller
+            return bytes(image_bytes)
+        if resized:
+            scale = math.sqrt(max_pixels / (width * height))
+            image = image.resize((max(1, int(width * scale)), max(1, int(height * scale))), Image.LANCZOS)
+        if config.OCR_GRAYSCALE and image.mode != "L":
+            image = image.convert("L")
+
+        if config.OCR_FORMAT in {"jpeg", "png"}:
+            encoded = _encode(image, config.OCR_FORMAT)
+        else:
+            encoded = _encode(image, "jpeg")
+            if source_format in _LOSSLESS_SOURCES:
+                encoded = min(encoded, _encode(image, "png"), key=len)
+    except Exception as exc:
+        # let Vision report unreadable images instead of failing before the request
+        logger.warning("OCR pre-processing skipped: %s", exc)
+        return bytes(image_bytes)
+
+    # downscaled flat screenshots can compress worse than the original; upright originals win then
+    if len(encoded) >= len(image_bytes) and not rotated:
+        return bytes(image_bytes)
+    logger.info("OCR image %s bytes -> %s bytes (%sx%s)", len(image_bytes), len(encoded), *image.size)
+    return encoded
+
+
+def webp_thumbnail(image_bytes: bytes, width: int) -> bytes:
+    from PIL import Image
+
+    image = _flatten(Image.open(BytesIO(image_bytes)))
+    # full-page screenshots are very tall; the thumbnail keeps the top of the page only
+    image = image.crop((0, 0, image.width, min(image.height, image.width * 2)))
+    if image.width > width:
+        image = image.resize((width, max(1, image.height * width // image.width)), Image.LANCZOS)
+    buffer = BytesIO()
+    image.save(buffer, format="WEBP", quality=config.SCREENSHOT_QUALITY, method=4)
+    return buffer.getvalue()
@@ -0,0 +1,182 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, ValidationError
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?")
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_OPENERS = {"{": "}", "[": "]"}
+_STRUCTURAL = re.compile(r"[\"'{}\[\]]")
+_IN_STRING = {'"': re.compile(r'["\\\\]'), "'": re.compile(r"['\\\\]")}
+
+
+class JSONStreamExtractor:
+    def __init__(self) -> None:
+        self._text = ""
+        self._pos = 0
+        self._start = -1
+        self._stack: List[str] = []
+        self._quote = ""
+        self._escape = False
+        self._result: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self._result is not None
+
+    def feed(self, chunk: str) -> bool:
+        if self._result is not None:
+            return True
+        self._text += chunk
+        text = self._text
+        length = len(text)
+        index = self._pos
+        while index < length:
+            if self._start < 0:
+                index = text.find("{", index)
+                if index < 0:
+                    break
+                self._start = index
+                self._stack.append("}")
+                index += 1
+                continue
+            if self._escape:
+                self._escape = False
+                index += 1
+                continue
+            pattern = _IN_STRING[self._quote] if self._quote else _STRUCTURAL
+            match = pattern.search(text, index)
+            if not match:
+                break
+            index = match.start()
+            char = text[index]
+            if self._quote:
+                if char == "\\":
+                    self._escape = True
+                else:
+                    self._quote = ""
+            elif char in "\"'":
+                self._quote = char
+            elif char in _OPENERS:
+                self._stack.append(_OPENERS[char])
+            elif self._stack:
+                self._stack.pop()
+                if not self._stack:
+                    self._result = text[self._start : index + 1]
+                    self._pos = index + 1
+                    return True
+            index += 1
+        self._pos = length
+        return False
+
+    def candidate(self) -> str:
+        if self._result is not None:
+            return self._result
+        if self._start < 0:
+            return ""
+        return self._text[self._start :]
+
+    def text(self) -> str:
+        return self._text
+
+
+def repair_json(text: str) -> str:
+    text = _FENCE_RE.sub("", text).strip()
+    out: List[str] = []
+    stack: List[str] = []
+    quote = ""
+    escape = False
+    index = 0
+    length = len(text)
+    while index < length:
+        char = text[index]
+        if quote:
+            if escape:
+                escape = False
+                out.append("'" if char == "'" else "\\" + char)
+            elif char == "\\":
+                escape = True
+            elif char == quote:
+                quote = ""
+                out.append('"')
+            elif char == '"':
+                out.append('\\"')
+            elif char == "\n":
+                out.append("\\n")
+            else:
+                out.append(char)
+            index += 1
+            continue
+        if char in "\"'":
+            quote = char
+            out.append('"')
+        elif char in _OPENERS:
+            stack.append(_OPENERS[char])
+            out.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            out.append(char)
+        elif char == ",":
+            lookahead = index + 1
+            while lookahead < length and text[lookahead].isspace():
+                lookahead += 1
+            if lookahead < length and text[lookahead] in "}]":
+                index += 1
+                continue
+            out.append(char)
+        else:
+            for literal, replacement in _LITERALS.items():
+                end = index + len(literal)
+                if text.startswith(literal, index) and not text[end : end + 1].isalnum():
+                    out.append(replacement)
+                    index += len(literal)
+                    break
+            else:
+                out.append(char)
+                index += 1
+            continue
+        index += 1
+    if quote:
+        out.append('"')
+    repaired = "".join(out).rstrip().rstrip(",")
+    return repaired + "".join(reversed(stack))
+
+
+def parse_json(text: str) -> Dict[str, Any]:
+    try:
+        data = json.loads(text)
+        return data if isinstance(data, dict) else {}
+    except json.JSONDecodeError:
+        pass
+    start, end = text.find("{"), text.rfind("}")
+    if 0 <= start < end:
+        try:
+            data = json.loads(text[start : end + 1])
+            if isinstance(data, dict):
+                return data
+        except json.JSONDecodeError:
+            pass
+    extractor = JSONStreamExtractor()
+    extractor.feed(text)
+    candidate = extractor.candidate()
+    if not candidate:
+        return {}
+    for attempt in (candidate, repair_json(candidate)):
+        try:
+            data = json.loads(attempt)
+        except json.JSONDecodeError:
+            continue
+        return data if isinstance(data, dict) else {}
+    return {}
+
+
+def validate(model: Type[BaseModel], data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    if not data:
+        return None, list(model.model_fields)
+    try:
+        return model.model_validate(data).model_dump(), []
+    except ValidationError as exc:
+        problems = sorted({str(error["loc"][0]) for error in exc.errors() if error.get("loc")})
+        return None, problems or list(model.model_fields)
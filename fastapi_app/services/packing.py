@@ -0,0 +1,83 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Optional, Type
+
+from pydantic import BaseModel
+
+from fastapi_app.core import cancellation
+from fastapi_app.schemas import ImageAnalysis, TextAnalysis
+
+# what each schema asks for when several items share one prompt
+PACK_TASKS = {
+    TextAnalysis: (
+        "Сделай структурированный анализ каждого из текстов конкурентов ниже, по отдельности. "
+        "Для каждого текста верни объект с ключами strengths, weaknesses, unique_offers, recommendations; "
+        "каждое поле — список строк."
+    ),
+    ImageAnalysis: (
+        "На основе каждого из описаний изображений ниже дай отдельный анализ. "
+        "Для каждого описания верни объект с ключами description, insights, style_score; "
+        "description — строка, insights — список строк, style_score — число от 1 до 10."
+    ),
+}
+
+# how long a caller waits for the call that carries its item, on top of the gathering window
+WAIT_TIMEOUT = 120.0
+
+
+class _Batch:
+    __slots__ = ("items", "results", "full", "done")
+
+    def __init__(self) -> None:
+        self.items: List[Any] = []
+        self.results: Optional[List[Any]] = None
+        self.full = threading.Event()
+        self.done = threading.Event()
+
+
+class MicroBatcher:
+    # calls with the same key that arrive within `window` seconds are run together by the first caller
+    # (the leader); the others block until it hands them their result. A None result tells the caller
+    # to do the work on its own, which is also what happens when the batch is a single item.
+    def __init__(self, run: Callable[[Hashable, List[Any]], List[Optional[Any]]]) -> None:
+        self._run = run
+        self._lock = threading.Lock()
+        self._open: Dict[Hashable, _Batch] = {}
+
+    def submit(self, key: Hashable, item: Any, window: float, max_items: int) -> Optional[Any]:
+        with self._lock:
+            batch = self._open.get(key)
+            leader = batch is None
+            if batch is None:
+                batch = self._open[key] = _Batch()
+            index = len(batch.items)
+            batch.items.append(item)
+            if len(batch.items) >= max_items:
+                del self._open[key]
+                batch.full.set()
+        if not leader:
+            if not batch.done.wait(cancellation.timeout(window + WAIT_TIMEOUT)):
+                cancellation.check()
+                return None
+            return batch.results[index] if batch.results else None
+
+        batch.full.wait(window)
+        with self._lock:
+            if self._open.get(key) is batch:
+                del self._open[key]
+        try:
+            if len(batch.items) > 1:
+                batch.results = self._run(key, batch.items)
+        finally:
+            # followers fall back to their own calls if the leader failed or was cancelled
+            batch.done.set()
+        return batch.results[0] if batch.results else None
+
+
+def pack_prompt(schema: Type[BaseModel], bodies: List[str]) -> str:
+    items = "\n\n".join(f"[id={index}]\n{body}" for index, body in enumerate(bodies, start=1))
+    return (
+        "Ты маркетинговый аналитик. "
+        f"{PACK_TASKS[schema]} "
+        "Верни ответ строго в JSON: объект, где ключ — id элемента (строка), значение — его анализ. "
+        f"Всего элементов: {len(bodies)}.\n\n{items}"
+    )
@@ -1,15 +1,26 @@
-from typing import Tuple
+import base64
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, List, Optional, Tuple
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.common.exceptions import WebDriverException
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
+from fastapi_app.core import cancellation, config
+from fastapi_app.services import content, extraction
+from fastapi_app.services.extraction import PageFacts
 
-from fastapi_app.core import config
+if TYPE_CHECKING:
+    from selenium import webdriver
 
+logger = logging.getLogger(__name__)
+
+# Selenium's own default; a request deadline lowers it
+PAGE_LOAD_TIMEOUT = 300
+
+
+def create_driver() -> "webdriver.Chrome":
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
 
-def _create_driver() -> webdriver.Chrome:
     options = Options()
     options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
@@ -22,21 +33,112 @@ def _create_driver() -> webdriver.Chrome:
     return webdriver.Chrome(options=options)
 
 
-def fetch_page_text(url: str) -> Tuple[str, str]:
-    driver = None
+def _kill_driver(driver: "webdriver.Chrome") -> None:
+    # quit() would wait behind the pending command; stopping chromedriver takes its browser down with it
+    try:
+        driver.service.stop()
+    except Exception as exc:
+        logger.warning("Failed to stop chromedriver: %s", exc)
+
+
+def quit_driver(driver: "webdriver.Chrome") -> None:
+    try:
+        driver.quit()
+    except Exception as exc:
+        # already gone if the request was cancelled
+        logger.info("Driver quit failed: %s", exc)
+
+
+@dataclass
+class Screenshot:
+    image: bytes
+    above_fold: bytes
+    width: int
+    height: int
+
+
+def _capture_screenshot(driver: Any) -> Screenshot:
+    # the viewport shot is PNG for OCR; the full page comes straight from Chrome as WebP
+    above_fold = driver.get_screenshot_as_png()
+    metrics = driver.execute_cdp_cmd("Page.getLayoutMetrics", {})
+    size = metrics.get("cssContentSize") or metrics["contentSize"]
+    width = int(size["width"])
+    height = min(int(size["height"]), config.SCREENSHOT_MAX_HEIGHT)
+    result = driver.execute_cdp_cmd(
+        "Page.captureScreenshot",
+        {
+            "format": "webp",
+            "quality": config.SCREENSHOT_QUALITY,
+            "captureBeyondViewport": True,
+            "clip": {"x": 0, "y": 0, "width": width, "height": height, "scale": 1},
+        },
+    )
+    return Screenshot(base64.b64decode(result["data"]), above_fold, width, height)
+
+
+def fetch_html(
+    url: str, screenshot: bool = False, driver: Optional["webdriver.Chrome"] = None
+) -> Tuple[str, Optional[Screenshot]]:
+    from selenium.common.exceptions import WebDriverException
+
+    # a caller-provided driver (crawler workers) is reused and stays open
+    owned = driver is None
     try:
-        driver = _create_driver()
-        driver.get(url)
-        html = driver.page_source
-    except WebDriverException as exc:
-        raise RuntimeError("Failed to fetch page with Selenium") from exc
+        if owned:
+            driver = create_driver()
+        driver.set_page_load_timeout(cancellation.timeout(PAGE_LOAD_TIMEOUT))
+        with cancellation.on_cancel(lambda: _kill_driver(driver)):
+            driver.get(url)
+            html = driver.page_source
+            return html, _capture_screenshot(driver) if screenshot else None
+    except Exception as exc:
+        # a browser killed on cancellation fails with whatever the transport raises
+        cancellation.check()
+        if isinstance(exc, WebDriverException):
+            raise RuntimeError("Failed to fetch page with Selenium") from exc
+        raise
     finally:
-        if driver:
-            driver.quit()
-
-    soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
-    text = " ".join(soup.get_text(separator=" ").split())
-    title = soup.title.string.strip() if soup.title and soup.title.string else "Untitled"
-    return title, text[:4000]
+        if owned and driver:
+            quit_driver(driver)
+
+
+@dataclass
+class PageContent:
+    url: str
+    html: str
+    title: str
+    text: str
+    full_text: str
+    facts: PageFacts
+    screenshot: Optional[Screenshot] = None
+    links: List[str] = field(default_factory=list)
+    canonical: str = ""
+    robots: str = ""
+
+
+def parse_page(html: str, url: str = "", screenshot: Optional[Screenshot] = None) -> PageContent:
+    collector = extraction.FactsCollector()
+    page, facts = extraction.extract(html, collector)
+    text = content.select_content(page, url or None)
+    return PageContent(
+        url=url,
+        html=html,
+        title=page.title,
+        text=content.fit_to_budget(text, config.PROMPT_TOKEN_BUDGET),
+        full_text="\n".join(block.text for block in page.blocks),
+        facts=facts,
+        screenshot=screenshot,
+        links=collector.links,
+        canonical=collector.canonical,
+        robots=collector.meta.get("robots", "").lower(),
+    )
+
+
+def fetch_page(url: str, screenshot: bool = False) -> PageContent:
+    html, image = fetch_html(url, screenshot)
+    return parse_page(html, url, image)
+
+
+def fetch_page_text(url: str) -> Tuple[str, str]:
+    page = fetch_page(url)
+    return page.title, page.text
@@ -0,0 +1,224 @@
+from dataclasses import asdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from fastapi_app.core import facts as facts_store
+from fastapi_app.core import competitors, config, documents, search, snapshots
+from fastapi_app.core.history import save_history
+from fastapi_app.core.ocr_layout import OcrPage, join_text
+from fastapi_app.services import crawler
+from fastapi_app.services.analysis import analyze_image, analyze_text
+from fastapi_app.services.image_utils import summarize_image, webp_thumbnail
+from fastapi_app.services.content import domain_of
+from fastapi_app.services.parse_demo import PageContent, Screenshot, fetch_page
+from fastapi_app.services.urls import normalize_url
+from fastapi_app.services.yandex_vision import recognize_image_pages, recognize_image_text, recognize_pdf_pages
+
+Buffer = bytes | bytearray | memoryview
+
+
+def _require_image(content_type: Optional[str], data: Buffer) -> None:
+    if not content_type or not content_type.startswith("image/"):
+        raise HTTPException(status_code=400, detail="Image file is required")
+    if not len(data):
+        raise HTTPException(status_code=400, detail="Empty file")
+
+
+def _competitor(value: Optional[str]) -> Optional[str]:
+    if not value or not value.strip():
+        return None
+    domain = competitors.normalize_domain(value)
+    if not domain:
+        raise HTTPException(status_code=400, detail="Неверный домен конкурента")
+    return domain
+
+
+def run_text_analysis(text: str, url: Optional[str] = None) -> Dict[str, Any]:
+    text = text.strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="Text is required")
+    domain = _competitor(url)
+
+    analysis = analyze_text(text)
+    save_history({"type": "text", "input": {"text": text[:500]}, "output": analysis})
+    search.index_document("text", url or "", text.split("\n", 1)[0][:120], text, analysis)
+    if domain:
+        competitors.record_analysis(domain, "text", analysis)
+    return {"analysis": analysis}
+
+
+def run_image_analysis(
+    image_bytes: Buffer, filename: Optional[str], content_type: Optional[str], competitor: Optional[str] = None
+) -> Dict[str, Any]:
+    _require_image(content_type, image_bytes)
+    domain = _competitor(competitor)
+
+    metadata = summarize_image(image_bytes)
+    summary = (
+        f"Формат: {metadata['format']}, размер {metadata['width']}x{metadata['height']}, "
+        f"соотношение {metadata['aspect_ratio']}, доминирующий цвет {metadata['dominant_color']}."
+    )
+    analysis = analyze_image(summary)
+    save_history(
+        {
+            "type": "image",
+            "input": {"filename": filename, "content_type": content_type},
+            "output": {"metadata": metadata, "analysis": analysis},
+        }
+    )
+    search.index_document("image", filename or "", filename or "", summary, analysis)
+    if domain:
+        competitors.record_analysis(domain, "image", analysis)
+    return {"metadata": metadata, "analysis": analysis}
+
+
+def _store_ocr(
+    kind: str, pages: Optional[List[OcrPage]], filename: Optional[str], content_type: Optional[str], include_text: bool
+) -> Dict[str, Any]:
+    text = join_text(pages, include_page_headers=kind == "ocr_pdf") if pages else None
+    if not text:
+        raise HTTPException(status_code=400, detail="OCR failed")
+    # the layout is stored once; history keeps a preview and the document reference
+    document_id = documents.save_document(kind, filename or "", pages, len(text))
+    save_history(
+        {
+            "type": kind,
+            "input": {"filename": filename, "content_type": content_type},
+            "output": {
+                "document_id": document_id,
+                "pages": len(pages),
+                "text": text[:2000],
+                "truncated": len(text) > 2000,
+            },
+        }
+    )
+    search.index_document(kind, filename or "", filename or "", text)
+    return {
+        "document_id": document_id,
+        "pages": len(pages),
+        "chars": len(text),
+        "text": text if include_text else None,
+    }
+
+
+def run_image_ocr(
+    image_bytes: Buffer, filename: Optional[str], content_type: Optional[str], include_text: bool = True
+) -> Dict[str, Any]:
+    _require_image(content_type, image_bytes)
+    return _store_ocr("ocr_image", recognize_image_pages(image_bytes), filename, content_type, include_text)
+
+
+def run_pdf_ocr(
+    pdf_bytes: Buffer, filename: Optional[str], content_type: Optional[str], include_text: bool = True
+) -> Dict[str, Any]:
+    is_pdf = content_type == "application/pdf"
+    if not is_pdf and filename:
+        is_pdf = filename.lower().endswith(".pdf")
+    if not is_pdf:
+        raise HTTPException(status_code=400, detail="PDF file is required")
+    if not len(pdf_bytes):
+        raise HTTPException(status_code=400, detail="Empty file")
+    return _store_ocr("ocr_pdf", recognize_pdf_pages(pdf_bytes), filename, content_type, include_text)
+
+
+def _store_screenshot(url: str, version: int, screenshot: Screenshot) -> Dict[str, Any]:
+    thumbnail = webp_thumbnail(screenshot.image, config.SCREENSHOT_THUMB_WIDTH)
+    snapshots.save_screenshot(url, version, screenshot.image, thumbnail, screenshot.width, screenshot.height)
+    return {
+        "version": version,
+        "width": screenshot.width,
+        "height": screenshot.height,
+        "size": len(screenshot.image),
+        "metadata": summarize_image(screenshot.image),
+        "above_fold_text": recognize_image_text(screenshot.above_fold),
+    }
+
+
+def _store_page(url: str, domain: str, page: PageContent) -> Tuple[Dict[str, Any], int]:
+    facts = asdict(page.facts)
+    facts_store.save_facts(url, domain, facts)
+    competitors.record_offers(domain, url, facts["offers"])
+    snapshot = snapshots.save_snapshot(url, page.title, page.html, page.full_text)
+    return facts, snapshot["version"]
+
+
+def run_parse_demo(url: str, screenshot: bool = False) -> Dict[str, Any]:
+    normalized_url = normalize_url(url)
+    if not normalized_url:
+        raise HTTPException(status_code=400, detail="Неверный формат URL. Пример: https://example.com")
+    page = fetch_page(normalized_url, screenshot)
+    # an empty page is rejected before anything is stored or sent to OCR
+    if not page.text:
+        raise HTTPException(status_code=400, detail="Empty page content")
+    domain = domain_of(normalized_url)
+    facts, version = _store_page(normalized_url, domain, page)
+    visual = _store_screenshot(normalized_url, version, page.screenshot) if page.screenshot else None
+    analysis = analyze_text(page.text)
+    save_history({"type": "parse_demo", "input": {"url": normalized_url}, "output": analysis})
+    search.index_document("parse_demo", normalized_url, page.title, page.full_text, analysis)
+    competitors.record_analysis(domain, "parse_demo", analysis)
+    return {"title": page.title, "analysis": analysis, "facts": facts, "screenshot": visual}
+
+
+def run_crawl(url: str, max_pages: Optional[int] = None, max_depth: Optional[int] = None) -> Dict[str, Any]:
+    normalized_url = normalize_url(url)
+    if not normalized_url:
+        raise HTTPException(status_code=400, detail="Неверный формат URL. Пример: https://example.com")
+    try:
+        result = crawler.crawl(
+            normalized_url,
+            max_pages or config.CRAWL_MAX_PAGES,
+            config.CRAWL_MAX_DEPTH if max_depth is None else max_depth,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    domain = domain_of(result.start_url)
+    pages = []
+    for item in result.pages:
+        facts, _ = _store_page(item.url, domain, item.page)
+        pages.append({"url": item.url, "title": item.page.title, "depth": item.depth, "offers": len(facts["offers"])})
+    # one analysis for the whole site instead of one per page
+    text = crawler.site_text(result, config.PROMPT_TOKEN_BUDGET)
+    if not text:
+        raise HTTPException(status_code=400, detail="Empty site content")
+    analysis = analyze_text(text, task="site")
+    save_history({"type": "crawl", "input": {"url": result.start_url, "pages": len(pages)}, "output": analysis})
+    search.index_document("crawl", result.start_url, domain, text, analysis)
+    competitors.record_analysis(domain, "crawl", analysis)
+    return {
+        "url": result.start_url,
+        "analysis": analysis,
+        "pages": pages,
+        "skipped": result.skipped,
+        "errors": result.errors,
+    }
+
+
+def _snapshot_url(url: str) -> str:
+    normalized_url = normalize_url(url)
+    if not normalized_url:
+        raise HTTPException(status_code=400, detail="Неверный формат URL. Пример: https://example.com")
+    return normalized_url
+
+
+def list_snapshots(url: str) -> Dict[str, Any]:
+    normalized_url = _snapshot_url(url)
+    return {"url": normalized_url, "items": snapshots.list_versions(normalized_url)}
+
+
+def get_snapshot(url: str, version: int, include_html: bool = False) -> Dict[str, Any]:
+    return snapshots.get_version(_snapshot_url(url), version, include_html)
+
+
+def get_snapshot_screenshot(url: str, version: int, full: bool = False) -> Tuple[bytes, str]:
+    return snapshots.get_screenshot(_snapshot_url(url), version, full)
+
+
+def diff_snapshots(url: str, old: int, new: int, field: str = "text") -> Dict[str, Any]:
+    return snapshots.diff_versions(_snapshot_url(url), old, new, field)
+
+
+def run_search(query: str, kind: Optional[str] = None, mode: str = "fts", limit: int = 20) -> Dict[str, Any]:
+    return {"query": query, "mode": mode, "items": search.search(query, kind, mode, limit)}
@@ -0,0 +1,311 @@
+import importlib.util
+import logging
+import math
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel
+
+from fastapi_app.core import cancellation, config
+from fastapi_app.core.competitors import finding_tokens, jaccard
+from fastapi_app.schemas import ImageAnalysis
+from fastapi_app.services.content import estimate_tokens
+from fastapi_app.services.llm_json import parse_json, validate
+from fastapi_app.services.packing import MicroBatcher, pack_prompt
+
+logger = logging.getLogger(__name__)
+
+# (source text, prompt): the keyword extractor reads the text, a model reads the prompt
+Item = Tuple[str, str]
+
+MAX_ITEMS = 5
+MAX_SENTENCE_CHARS = 200
+_HAS_LLAMA = importlib.util.find_spec("llama_cpp") is not None
+_SENTENCE_RE = re.compile(r"[^.!?…\n]+[.!?…]*")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+_PERCENT_RE = re.compile(r"\d+\s*%")
+_STRENGTH_PREFIXES = (
+    "бесплат", "гарант", "быстр", "качеств", "опыт", "сертифи", "надёжн", "надежн", "поддержк", "круглосуточ",
+    "профессион", "лидер", "проверен", "безопас", "удобн", "эксперт", "официальн", "собствен",
+    "free", "guarant", "fast", "quality", "support", "certif", "reliab", "expert", "secure", "official",
+)
+_OFFER_PREFIXES = (
+    "скидк", "акци", "подар", "бонус", "промокод", "кешбэк", "кэшбэк", "распродаж", "выгод", "эксклюзив",
+    "спецпредлож", "sale", "discount", "bonus", "promo", "gift", "exclusive", "cashback",
+)
+# what a landing text usually needs: (pattern that shows it is there, weakness if not, recommendation)
+_GAPS = (
+    (
+        re.compile(r"₽|руб|\$|€|цен|стоимост|тариф|price|pricing", re.IGNORECASE),
+        "Не указаны цены или стоимость.",
+        "Указать цены или диапазон стоимости.",
+    ),
+    (
+        re.compile(r"отзыв|кейс|клиент|рейтинг|review|testimonial|case", re.IGNORECASE),
+        "Нет отзывов, кейсов или других подтверждений.",
+        "Добавить отзывы клиентов и кейсы с результатами.",
+    ),
+    (
+        re.compile(r"купи|заказ|оформ|позвон|остав|запиш|записат|подпис|попроб|buy|order|call|sign up|try", re.IGNORECASE),
+        "Нет явного призыва к действию.",
+        "Добавить заметный призыв к действию.",
+    ),
+    (
+        re.compile(r"\+7|телефон|e-?mail|@|адрес|whatsapp|telegram", re.IGNORECASE),
+        "Не указаны контакты.",
+        "Указать телефон, почту или мессенджеры.",
+    ),
+    (
+        re.compile(r"гарант|возврат|guarantee|refund", re.IGNORECASE),
+        "Не упомянуты гарантии или условия возврата.",
+        "Описать гарантии и условия возврата.",
+    ),
+    (
+        re.compile(r"\d"),
+        "Мало конкретики: нет цифр и фактов.",
+        "Подкрепить преимущества цифрами: сроки, цены, количество клиентов.",
+    ),
+)
+_IMAGE_SIZE_RE = re.compile(r"(\d+)x(\d+)")
+_IMAGE_RATIO_RE = re.compile(r"соотношение ([\d.]+)")
+_IMAGE_COLOR_RE = re.compile(r"#([0-9a-fA-F]{6})")
+# common ad formats: square, 4:5 feed, 9:16 stories, 16:9 and 1.91:1 banners
+_AD_RATIOS = (1.0, 0.8, 0.56, 1.78, 1.91)
+
+
+def _has_prefix(words: List[str], prefixes: Tuple[str, ...]) -> bool:
+    return any(word.startswith(prefixes) for word in words)
+
+
+class KeywordProvider:
+    # classical extraction without a model: sentences ranked by TF-IDF within the text, sorted into the
+    # schema by marker words, plus checks for what the text is missing
+    name = "keywords"
+    # extraction is a quick CPU pass per text; waiting for company would only add latency
+    batched = False
+
+    def analyze(self, schema: Type[BaseModel], items: List[Item]) -> List[Optional[Dict[str, Any]]]:
+        if schema is ImageAnalysis:
+            return [self.analyze_image(text) for text, _ in items]
+        return [self.analyze_text(text) for text, _ in items]
+
+    @staticmethod
+    def _ranked(text: str) -> List[Tuple[str, List[str]]]:
+        sentences = []
+        for match in _SENTENCE_RE.finditer(text):
+            sentence = " ".join(match.group(0).split())
+            if len(sentence) >= 12:
+                sentences.append(sentence)
+        stems = [finding_tokens(sentence) for sentence in sentences]
+        frequency = Counter(stem for sentence_stems in stems for stem in sentence_stems)
+        total = len(sentences)
+
+        def score(index: int) -> float:
+            idf = sum(math.log((1 + total) / (1 + frequency[stem])) + 1 for stem in stems[index])
+            return idf / math.sqrt(len(stems[index]) or 1)
+
+        order = sorted(range(total), key=score, reverse=True)
+        return [(sentences[index], _WORD_RE.findall(sentences[index].lower())) for index in order]
+
+    @staticmethod
+    def _pick(sentences: List[str]) -> List[str]:
+        picked: List[str] = []
+        seen: List[Any] = []
+        for sentence in sentences:
+            tokens = finding_tokens(sentence)
+            if any(jaccard(tokens, other) >= 0.6 for other in seen):
+                continue
+            seen.append(tokens)
+            picked.append(sentence if len(sentence) <= MAX_SENTENCE_CHARS else sentence[:MAX_SENTENCE_CHARS] + "…")
+            if len(picked) == MAX_ITEMS:
+                break
+        return picked
+
+    def analyze_text(self, text: str) -> Dict[str, Any]:
+        ranked = self._ranked(text)
+        offers = self._pick(
+            [sentence for sentence, words in ranked if _has_prefix(words, _OFFER_PREFIXES) or _PERCENT_RE.search(sentence)]
+        )
+        strengths = self._pick(
+            [sentence for sentence, words in ranked if _has_prefix(words, _STRENGTH_PREFIXES) and sentence not in offers]
+        )
+        if not strengths:
+            # without explicit benefits the most distinctive sentences are the main message
+            strengths = self._pick([sentence for sentence, _ in ranked if sentence not in offers])[:2]
+        gaps = [(weakness, advice) for pattern, weakness, advice in _GAPS if not pattern.search(text)]
+        recommendations = [advice for _, advice in gaps]
+        if not offers:
+            recommendations.append("Сформулировать уникальное предложение: скидку, бонус или особое условие.")
+        if len(strengths) < 2:
+            recommendations.append("Вынести ключевые преимущества в начало текста.")
+        if not recommendations:
+            recommendations.append("Протестировать варианты заголовка и призыва к действию.")
+        return {
+            "strengths": strengths,
+            "weaknesses": [weakness for weakness, _ in gaps],
+            "unique_offers": offers,
+            "recommendations": recommendations[:MAX_ITEMS],
+        }
+
+    def analyze_image(self, summary: str) -> Dict[str, Any]:
+        insights = []
+        score = 6
+        size = _IMAGE_SIZE_RE.search(summary)
+        if size:
+            width, height = int(size.group(1)), int(size.group(2))
+            if min(width, height) < 600:
+                insights.append("Низкое разрешение: на экранах с высокой плотностью изображение будет размытым.")
+                score -= 1
+            elif max(width, height) >= 1080:
+                score += 1
+        ratio = _IMAGE_RATIO_RE.search(summary)
+        if ratio:
+            value = float(ratio.group(1).rstrip("."))
+            if any(abs(value - common) <= 0.05 for common in _AD_RATIOS):
+                insights.append("Пропорции соответствуют стандартному рекламному формату.")
+                score += 1
+            else:
+                insights.append("Нестандартные пропорции: при размещении изображение могут обрезать.")
+            if value > 1.5:
+                insights.append("Широкий формат подходит для баннеров и обложек.")
+            elif value < 0.8:
+                insights.append("Вертикальный формат подходит для сторис и мобильной ленты.")
+        color = _IMAGE_COLOR_RE.search(summary)
+        if color:
+            red, green, blue = (int(color.group(1)[index : index + 2], 16) for index in (0, 2, 4))
+            luminance = 0.2126 * red + 0.7152 * green + 0.0722 * blue
+            saturation = (max(red, green, blue) - min(red, green, blue)) / 255
+            if luminance > 200:
+                insights.append("Светлая палитра: важно обеспечить контраст текста и кнопок.")
+            elif luminance < 60:
+                insights.append("Тёмная палитра: акцентные элементы стоит выделить ярким цветом.")
+            if saturation > 0.5:
+                insights.append("Насыщенный основной цвет привлекает внимание.")
+                score += 1
+        insights.append("Проверьте, соответствует ли визуальный стиль бренду.")
+        return {
+            "description": f"Изображение с характеристиками: {summary.rstrip('.')}.",
+            "insights": insights,
+            "style_score": max(1, min(10, score)),
+        }
+
+
+class LlamaProvider:
+    # a quantized GGUF model run on the CPU by llama.cpp; loaded once and kept warm between requests
+    name = "llama"
+    batched = True
+
+    def __init__(self) -> None:
+        self._model: Any = None
+        self._lock = threading.Lock()
+        self._fallback = KeywordProvider()
+
+    def load(self) -> Any:
+        with self._lock:
+            if self._model is None:
+                from llama_cpp import Llama
+
+                self._model = Llama(
+                    model_path=config.LOCAL_MODEL_PATH,
+                    n_ctx=config.LOCAL_MODEL_CTX,
+                    n_threads=config.LOCAL_MODEL_THREADS or None,
+                    verbose=False,
+                )
+            return self._model
+
+    def _complete(self, model: Any, prompt: str, max_tokens: int) -> Any:
+        cancellation.check()
+        response = model.create_chat_completion(
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.2,
+            max_tokens=max_tokens,
+            response_format={"type": "json_object"},
+        )
+        return parse_json(response["choices"][0]["message"]["content"] or "")
+
+    def analyze(self, schema: Type[BaseModel], items: List[Item]) -> List[Optional[Dict[str, Any]]]:
+        model = self.load()
+        results: List[Optional[Dict[str, Any]]] = [None] * len(items)
+        # one llama.cpp context is not safe to share between threads; concurrent batches queue on the lock
+        with self._lock:
+            if len(items) > 1:
+                # the whole batch is one evaluation: the items share a prompt and come back keyed by id
+                try:
+                    data = self._complete(
+                        model,
+                        pack_prompt(schema, [text for text, _ in items]),
+                        min(config.LOCAL_MODEL_MAX_TOKENS * len(items), config.LOCAL_MODEL_CTX // 2),
+                    )
+                except cancellation.Cancelled:
+                    raise
+                except Exception as exc:
+                    logger.warning("Batched llama call failed, items run one by one: %s", exc)
+                    data = {}
+                for index in range(len(items)):
+                    entry = data.get(str(index + 1)) if isinstance(data, dict) else None
+                    if isinstance(entry, dict):
+                        results[index], _ = validate(schema, entry)
+            for index, (_, prompt) in enumerate(items):
+                if results[index] is None:
+                    results[index], _ = validate(schema, self._complete(model, prompt, config.LOCAL_MODEL_MAX_TOKENS))
+        # answers that do not fit the schema are replaced by the keyword analysis
+        return [result or self._fallback.analyze(schema, [item])[0] for result, item in zip(results, items)]
+
+
+PROVIDERS = {"keywords": KeywordProvider, "llama": LlamaProvider}
+_instances: Dict[str, Any] = {}
+_instances_lock = threading.Lock()
+
+
+def provider_name() -> str:
+    name = config.ANALYSIS_PROVIDER
+    llama_ready = _HAS_LLAMA and bool(config.LOCAL_MODEL_PATH)
+    if name == "auto":
+        if config.GIGACHAT_CLIENT_ID and config.GIGACHAT_CLIENT_SECRET:
+            return "gigachat"
+        return "llama" if llama_ready else "keywords"
+    if name == "llama" and not llama_ready:
+        logger.warning("ANALYSIS_PROVIDER=llama needs llama-cpp-python and LOCAL_MODEL_PATH; using keywords")
+        return "keywords"
+    if name != "gigachat" and name not in PROVIDERS:
+        logger.warning("Unknown ANALYSIS_PROVIDER %r; using keywords", name)
+        return "keywords"
+    return name
+
+
+def get(name: str) -> Any:
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = PROVIDERS[name]()
+        return _instances[name]
+
+
+def _run_batch(key: Tuple[str, Type[BaseModel]], items: List[Item]) -> List[Optional[Dict[str, Any]]]:
+    name, schema = key
+    return get(name).analyze(schema, items)
+
+
+_batcher = MicroBatcher(_run_batch)
+
+
+def analyze(name: str, schema: Type[BaseModel], text: str, prompt: str) -> Dict[str, Any]:
+    provider = get(name)
+    if (
+        provider.batched
+        and config.PACK_WINDOW_MS > 0
+        and config.PACK_MAX_ITEMS > 1
+        and estimate_tokens(text) <= config.PACK_MAX_ITEM_TOKENS
+    ):
+        # short requests arriving together are answered by one evaluation of the warm model
+        result = _batcher.submit((name, schema), (text, prompt), config.PACK_WINDOW_MS / 1000, config.PACK_MAX_ITEMS)
+        if result is not None:
+            return result
+    return provider.analyze(schema, [(text, prompt)])[0]
+
+
+def warm_up() -> None:
+    name = provider_name()
+    if name in PROVIDERS and hasattr(get(name), "load"):
+        get(name).load()
@@ -0,0 +1,67 @@
+import re
+from typing import Optional
+from urllib.parse import parse_qsl, quote, unquote, urlencode, urljoin, urlparse, urlsplit, urlunsplit
+
+TRACKING_PARAMS = {"gclid", "yclid", "fbclid", "_openstat", "from", "ref", "roistat", "etext", "ysclid"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_MULTISLASH_RE = re.compile(r"/{2,}")
+_PATH_SAFE = "/%:@!$&'()*+,;=-._~"
+_SCHEME_RE = re.compile(r"^([a-zA-Z][a-zA-Z0-9+.-]*):(?!\d)")
+
+
+def normalize_url(value: str) -> Optional[str]:
+    trimmed = value.strip()
+    if not trimmed:
+        return None
+    if not trimmed.startswith(("http://", "https://")):
+        trimmed = f"https://{trimmed}"
+    parsed = urlparse(trimmed)
+    if parsed.scheme not in {"http", "https"} or not parsed.netloc:
+        return None
+    return trimmed
+
+
+def _remove_dot_segments(path: str) -> str:
+    output: list = []
+    for segment in path.split("/"):
+        if segment == "..":
+            if len(output) > 1:
+                output.pop()
+        elif segment != ".":
+            output.append(segment)
+    if path.endswith(("/.", "/..")):
+        output.append("")
+    return "/".join(output) or "/"
+
+
+def canonicalize_url(value: str, base: Optional[str] = None) -> Optional[str]:
+    # one spelling per page: lowercase host, no default port, fragment or tracking parameters
+    value = value.strip()
+    if base:
+        value = urljoin(base, value)
+    scheme = _SCHEME_RE.match(value)
+    if scheme:
+        # mailto:, tel:, javascript: and friends are not pages
+        if scheme.group(1).lower() not in _DEFAULT_PORTS:
+            return None
+        value = scheme.group(1).lower() + value[scheme.end(1):]
+    normalized = normalize_url(value)
+    if not normalized:
+        return None
+    parts = urlsplit(normalized)
+    try:
+        port = parts.port
+    except ValueError:
+        return None
+    host = (parts.hostname or "").rstrip(".")
+    if not host:
+        return None
+    netloc = host if port in (None, _DEFAULT_PORTS[parts.scheme]) else f"{host}:{port}"
+    path = _remove_dot_segments(_MULTISLASH_RE.sub("/", parts.path or "/"))
+    path = quote(unquote(path), safe=_PATH_SAFE)
+    query = sorted(
+        (key, item)
+        for key, item in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((parts.scheme, netloc, path, urlencode(query), ""))
@@ -1,92 +1,111 @@
 import base64
+import importlib.util
+import json
 import logging
-from typing import Optional
+from typing import Any, Dict, Iterator, List, Optional
 
-import requests
-
-from fastapi_app.core import config
+from fastapi_app.core import cancellation, config
+from fastapi_app.services.image_utils import prepare_for_ocr
+from fastapi_app.core.ocr_layout import OcrPage, join_text, page_from_vision
 
 logger = logging.getLogger(__name__)
 
-VISION_URL = "https://vision.api.cloud.yandex.net/vision/v1/batchAnalyze"
+Buffer = bytes | bytearray | memoryview
+_HAS_IJSON = importlib.util.find_spec("ijson") is not None
+_PAGES_PATH = "results.item.results.item.textDetection.pages.item"
 
 
-def _build_payload(content_base64: str, mime_type: Optional[str] = None) -> dict:
-    spec = {
-        "content": content_base64,
+def _build_body(content: Buffer, mime_type: Optional[str] = None) -> bytes:
+    # the base64 content is spliced into the JSON as bytes: no str copy of a multi-megabyte PDF and
+    # no second copy from json.dumps
+    spec: Dict[str, Any] = {
         "features": [
             {"type": "TEXT_DETECTION", "text_detection_config": {"language_codes": ["*"]}}
         ],
     }
     if mime_type:
         spec["mime_type"] = mime_type
-    return {"folderId": config.YC_FOLDER_ID, "analyze_specs": [spec]}
+    head = json.dumps({"folderId": config.YC_FOLDER_ID, "analyze_specs": [spec]})
+    # head ends with "}]}": the content field goes in front of the spec's closing brace
+    return b"".join((head[:-3].encode("utf-8"), b', "content": "', base64.b64encode(content), b'"}]}'))
+
+
+def _pages_of(data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    for result in data.get("results", []):
+        for sub_res in result.get("results", []):
+            yield from (sub_res.get("textDetection") or {}).get("pages", [])
+
+
+def _iter_pages(response: Any) -> Iterator[Dict[str, Any]]:
+    if _HAS_IJSON:
+        import ijson
 
+        # pages are parsed one at a time straight from the socket, so the full response never sits
+        # in memory as nested dicts
+        response.raw.decode_content = True
+        yield from ijson.items(response.raw, _PAGES_PATH, use_float=True)
+        return
+    yield from _pages_of(response.json())
 
-def _request_vision(payload: dict) -> Optional[dict]:
+
+def _request_vision(body: bytes) -> Optional[List[OcrPage]]:
     if not (config.YC_API_KEY and config.YC_FOLDER_ID):
         return None
 
+    import requests
+
     headers = {"Authorization": f"Api-Key {config.YC_API_KEY}", "Content-Type": "application/json"}
     response = requests.post(
-        VISION_URL,
+        config.YC_VISION_URL,
         headers=headers,
-        json=payload,
+        data=body,
         verify=not config.YC_SKIP_VERIFY,
-        timeout=30,
+        timeout=cancellation.timeout(30),
+        stream=True,
     )
-    if response.status_code != 200:
-        logger.error("Vision OCR error %s: %s", response.status_code, response.text[:200])
+    try:
+        if response.status_code != 200:
+            logger.error("Vision OCR error %s: %s", response.status_code, response.text[:200])
+            return None
+        return [page_from_vision(page, number) for number, page in enumerate(_iter_pages(response), start=1)]
+    except (requests.RequestException, OSError):
+        cancellation.check()
+        raise
+    except Exception as exc:
+        logger.error("Vision OCR parse error: %s", exc)
         return None
-    return response.json()
+    finally:
+        response.close()
 
 
 def _parse_text_detection(data: dict, include_page_headers: bool = False) -> Optional[str]:
-    result_text = ""
     try:
-        for result in data.get("results", []):
-            for sub_res in result.get("results", []):
-                text_detection = sub_res.get("textDetection")
-                if not text_detection:
-                    continue
-                for page_index, page in enumerate(text_detection.get("pages", []), start=1):
-                    if include_page_headers:
-                        result_text += f"\n--- Page {page_index} ---\n"
-                    for block in page.get("blocks", []):
-                        for line in block.get("lines", []):
-                            line_text = " ".join(
-                                word.get("text", "") for word in line.get("words", [])
-                            ).strip()
-                            if line_text:
-                                result_text += line_text + "\n"
-                        result_text += "\n"
+        pages = [page_from_vision(page, number) for number, page in enumerate(_pages_of(data), start=1)]
     except Exception as exc:
         logger.error("Vision OCR parse error: %s", exc)
         return None
-
-    result_text = result_text.strip()
-    return result_text if result_text else None
+    return join_text(pages, include_page_headers)
 
 
-def recognize_image_text(image_bytes: bytes) -> Optional[str]:
+def recognize_image_pages(image_bytes: Buffer) -> Optional[List[OcrPage]]:
     if not image_bytes:
         return None
-    content_base64 = base64.b64encode(image_bytes).decode("utf-8")
-    payload = _build_payload(content_base64)
     logger.info("Vision OCR image request")
-    data = _request_vision(payload)
-    if not data:
-        return None
-    return _parse_text_detection(data)
+    return _request_vision(_build_body(prepare_for_ocr(image_bytes)))
 
 
-def recognize_pdf_text(pdf_bytes: bytes) -> Optional[str]:
+def recognize_pdf_pages(pdf_bytes: Buffer) -> Optional[List[OcrPage]]:
     if not pdf_bytes:
         return None
-    content_base64 = base64.b64encode(pdf_bytes).decode("utf-8")
-    payload = _build_payload(content_base64, mime_type="application/pdf")
     logger.info("Vision OCR pdf request")
-    data = _request_vision(payload)
-    if not data:
-        return None
-    return _parse_text_detection(data, include_page_headers=True)
+    return _request_vision(_build_body(pdf_bytes, mime_type="application/pdf"))
+
+
+def recognize_image_text(image_bytes: Buffer) -> Optional[str]:
+    pages = recognize_image_pages(image_bytes)
+    return join_text(pages) if pages else None
+
+
+def recognize_pdf_text(pdf_bytes: Buffer) -> Optional[str]:
+    pages = recognize_pdf_pages(pdf_bytes)
+    return join_text(pages, include_page_headers=True) if pages else None
@@ -1,9 +1,8 @@
 import sys
 from pathlib import Path
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
-import requests
 from PyQt6 import QtCore, QtGui, QtWidgets
 
 APP_ROOT = Path(__file__).resolve().parent
@@ -26,6 +25,16 @@ def _sanitize_sys_path() -> None:
 _sanitize_sys_path()
 
 from desktop_app.backend import BackendServer
+from desktop_app.batch import BatchPanel, Task
+from desktop_app.client import BackendClient, HttpBackendClient, InProcessBackendClient
+from desktop_app.results import ResultsPanel
+from fastapi_app.core import config
+
+
+# how long closing the window waits for cancelled work to wind down
+CLOSE_TIMEOUT_MS = 5000
+# threads for runs started from the main tab; batches have a pool of their own
+INTERACTIVE_THREADS = 2
 
 
 @dataclass
@@ -35,108 +44,18 @@ class AnalyzeSelection:
     pdf: bool
 
 
-class AnalyzeWorker(QtCore.QObject):
-    finished = QtCore.pyqtSignal(dict)
-    error = QtCore.pyqtSignal(str)
-
-    def __init__(
-        self,
-        base_url: str,
-        selection: AnalyzeSelection,
-        text: str,
-        image_path: Optional[str],
-        pdf_path: Optional[str],
-    ) -> None:
-        super().__init__()
-        self._base_url = base_url
-        self._selection = selection
-        self._text = text
-        self._image_path = image_path
-        self._pdf_path = pdf_path
-
-    def run(self) -> None:
-        responses: Dict[str, Any] = {}
-        try:
-            if self._selection.text:
-                responses["text"] = self._analyze_text(self._text)
-            if self._selection.image:
-                responses["image"] = self._analyze_image(self._image_path)
-            if self._selection.pdf:
-                responses["pdf"] = self._ocr_pdf(self._pdf_path)
-            self.finished.emit(responses)
-        except Exception as exc:
-            self.error.emit(str(exc))
-
-    def _analyze_text(self, text: str) -> Dict[str, Any]:
-        resp = requests.post(
-            f"{self._base_url}/analyze_text",
-            json={"text": text},
-            timeout=60,
-        )
-        data = resp.json()
-        if not resp.ok:
-            raise RuntimeError(data.get("detail") or "Ошибка анализа текста")
-        return data
-
-    def _analyze_image(self, path: Optional[str]) -> Dict[str, Any]:
-        if not path:
-            raise RuntimeError("Не выбрано изображение")
-        with open(path, "rb") as handle:
-            resp = requests.post(
-                f"{self._base_url}/analyze_image",
-                files={"file": handle},
-                timeout=120,
-            )
-        data = resp.json()
-        if not resp.ok:
-            raise RuntimeError(data.get("detail") or "Ошибка анализа изображения")
-        return data
-
-    def _ocr_pdf(self, path: Optional[str]) -> Dict[str, Any]:
-        if not path:
-            raise RuntimeError("Не выбран PDF")
-        with open(path, "rb") as handle:
-            resp = requests.post(
-                f"{self._base_url}/ocr_pdf",
-                files={"file": handle},
-                timeout=120,
-            )
-        data = resp.json()
-        if not resp.ok:
-            raise RuntimeError(data.get("detail") or "Ошибка OCR PDF")
-        return data
-
-
-class ParseWorker(QtCore.QObject):
-    finished = QtCore.pyqtSignal(dict)
-    error = QtCore.pyqtSignal(str)
-
-    def __init__(self, base_url: str, url: str) -> None:
-        super().__init__()
-        self._base_url = base_url
-        self._url = url
-
-    def run(self) -> None:
-        try:
-            resp = requests.post(
-                f"{self._base_url}/parse_demo",
-                json={"url": self._url},
-                timeout=120,
-            )
-            data = resp.json()
-            if not resp.ok:
-                raise RuntimeError(data.get("detail") or "Ошибка парсинга")
-            self.finished.emit({"parse_demo": data})
-        except Exception as exc:
-            self.error.emit(str(exc))
-
-
 class MainWindow(QtWidgets.QMainWindow):
-    def __init__(self, backend: BackendServer) -> None:
+    def __init__(self, client: BackendClient, backend: Optional[BackendServer] = None) -> None:
         super().__init__()
+        self._client = client
         self._backend = backend
-        self._threads: List[QtCore.QThread] = []
-        self._workers: List[QtCore.QObject] = []
+        # single runs from the main tab; tasks hold references until their signals arrive
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(INTERACTIVE_THREADS)
+        # tasks are kept until their last signal; _running holds the latest run per kind,
+        # and starting a new one cancels it
+        self._tasks: List[Task] = []
+        self._running: Dict[str, Task] = {}
         self.setWindowTitle("Competitor Monitoring Assistant")
         self.setMinimumSize(960, 720)
         self._init_ui()
@@ -154,11 +73,24 @@ class MainWindow(QtWidgets.QMainWindow):
         root_layout.addWidget(header)
         root_layout.addWidget(subtitle)
 
-        selection_panel = self._build_selection_panel()
-        root_layout.addWidget(selection_panel)
-
-        parse_panel = self._build_parse_panel()
-        root_layout.addWidget(parse_panel)
+        single = QtWidgets.QWidget()
+        single_layout = QtWidgets.QVBoxLayout(single)
+        single_layout.setContentsMargins(0, 0, 0, 0)
+        single_layout.setSpacing(16)
+        single_layout.addWidget(self._build_selection_panel())
+        single_layout.addWidget(self._build_parse_panel())
+
+        self.batch = BatchPanel(self._client)
+        self.batch.result_ready.connect(self._show_batch_result)
+        batch_card = self._card_container()
+        batch_layout = QtWidgets.QVBoxLayout(batch_card)
+        batch_layout.setContentsMargins(16, 16, 16, 16)
+        batch_layout.addWidget(self.batch)
+
+        tabs = QtWidgets.QTabWidget()
+        tabs.addTab(single, "Анализ")
+        tabs.addTab(batch_card, "Пакетная обработка")
+        root_layout.addWidget(tabs)
 
         result_panel = self._build_result_panel()
         root_layout.addWidget(result_panel, 1)
@@ -258,14 +190,8 @@ class MainWindow(QtWidgets.QMainWindow):
         title.setObjectName("SectionTitle")
         layout.addWidget(title)
 
-        self.result_scroll = QtWidgets.QScrollArea()
-        self.result_scroll.setWidgetResizable(True)
-        self.result_container = QtWidgets.QWidget()
-        self.result_layout = QtWidgets.QVBoxLayout(self.result_container)
-        self.result_layout.setSpacing(12)
-        self.result_layout.addWidget(QtWidgets.QLabel("Ожидаю запрос..."))
-        self.result_scroll.setWidget(self.result_container)
-        layout.addWidget(self.result_scroll, 1)
+        self.results = ResultsPanel()
+        layout.addWidget(self.results, 1)
         return panel
 
     def _card_container(self) -> QtWidgets.QFrame:
@@ -280,7 +206,7 @@ class MainWindow(QtWidgets.QMainWindow):
             QWidget { font-size: 13px; color: #e9edf5; }
             QMainWindow { background: #0f1115; }
             #Card { background: #171b22; border: 1px solid #262b36; border-radius: 16px; }
-            QLineEdit, QTextEdit {
+            QLineEdit, QTextEdit, QPlainTextEdit, QTreeView {
                 background: #0f131b; border: 1px solid #2d3442; border-radius: 10px; padding: 8px;
             }
             QPushButton { background: #4f6ef7; border-radius: 10px; padding: 8px 16px; }
@@ -288,9 +214,8 @@ class MainWindow(QtWidgets.QMainWindow):
             #HeaderTitle { font-size: 24px; font-weight: 600; }
             #HeaderSubtitle { color: #9aa4b2; margin-bottom: 8px; }
             #SectionTitle { font-size: 16px; font-weight: 600; }
-            #ResultTitle { font-size: 15px; font-weight: 600; }
-            #ResultSectionTitle { font-size: 13px; font-weight: 600; color: #c7cfdb; }
-            #ResultBlock { background: #151a22; border: 1px solid #242a36; border-radius: 12px; padding: 10px; }
+            QTreeView::item { padding: 4px 0; }
+            QTreeView::item:selected { background: #2a3552; }
             """
         )
 
@@ -313,16 +238,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if path:
             self.pdf_path.setText(path)
 
-    def _clear_results(self) -> None:
-        while self.result_layout.count():
-            item = self.result_layout.takeAt(0)
-            widget = item.widget()
-            if widget:
-                widget.deleteLater()
-
     def _set_status(self, message: str) -> None:
-        self._clear_results()
-        self.result_layout.addWidget(QtWidgets.QLabel(message))
+        self.results.set_status(message)
 
     def _start_analysis(self) -> None:
         selection = AnalyzeSelection(
@@ -348,209 +265,105 @@ class MainWindow(QtWidgets.QMainWindow):
             self._show_error("Загрузите PDF.")
             return
 
-        self.analyze_btn.setDisabled(True)
         self._set_status("Выполняю анализ...")
+        self._run("analyze", lambda: self._analyze(selection, text, image_path, pdf_path), self._show_analysis_result)
 
-        worker = AnalyzeWorker(
-            self._backend.base_url,
-            selection,
-            text,
-            image_path,
-            pdf_path,
-        )
-        thread = QtCore.QThread()
-        worker.moveToThread(thread)
-        thread.started.connect(worker.run)
-        worker.finished.connect(self._show_analysis_result)
-        worker.error.connect(self._show_error)
-        worker.finished.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        worker.finished.connect(lambda: self._forget_worker(worker))
-        worker.error.connect(thread.quit)
-        worker.error.connect(worker.deleteLater)
-        worker.error.connect(lambda: self._forget_worker(worker))
-        thread.finished.connect(thread.deleteLater)
-        thread.finished.connect(lambda: self.analyze_btn.setDisabled(False))
-        thread.finished.connect(lambda: self._forget_thread(thread))
-        self._workers.append(worker)
-        self._threads.append(thread)
-        thread.start()
+    def _analyze(
+        self, selection: AnalyzeSelection, text: str, image_path: Optional[str], pdf_path: Optional[str]
+    ) -> Dict[str, Any]:
+        responses: Dict[str, Any] = {}
+        if selection.text:
+            responses["text"] = self._client.analyze_text(text)
+        if selection.image:
+            if not image_path:
+                raise RuntimeError("Не выбрано изображение")
+            responses["image"] = self._client.analyze_image(image_path)
+        if selection.pdf:
+            if not pdf_path:
+                raise RuntimeError("Не выбран PDF")
+            responses["pdf"] = self._client.ocr_pdf(pdf_path)
+        return responses
 
     def _start_parse(self) -> None:
         url = self.url_input.text().strip()
         if not url:
             self._show_error("Введите URL.")
             return
-        self.parse_btn.setDisabled(True)
         self._set_status("Собираю данные...")
-
-        worker = ParseWorker(self._backend.base_url, url)
-        thread = QtCore.QThread()
-        worker.moveToThread(thread)
-        thread.started.connect(worker.run)
-        worker.finished.connect(self._show_parse_result)
-        worker.error.connect(self._show_error)
-        worker.finished.connect(thread.quit)
-        worker.finished.connect(worker.deleteLater)
-        worker.finished.connect(lambda: self._forget_worker(worker))
-        worker.error.connect(thread.quit)
-        worker.error.connect(worker.deleteLater)
-        worker.error.connect(lambda: self._forget_worker(worker))
-        thread.finished.connect(thread.deleteLater)
-        thread.finished.connect(lambda: self.parse_btn.setDisabled(False))
-        thread.finished.connect(lambda: self._forget_thread(thread))
-        self._workers.append(worker)
-        self._threads.append(thread)
-        thread.start()
-
-    def _forget_thread(self, thread: QtCore.QThread) -> None:
-        if thread in self._threads:
-            self._threads.remove(thread)
-
-    def _forget_worker(self, worker: QtCore.QObject) -> None:
-        if worker in self._workers:
-            self._workers.remove(worker)
+        self._run("parse", lambda: {"parse_demo": self._client.parse_demo(url)}, self._show_parse_result)
+
+    def _run(self, kind: str, func: Callable[[], Any], on_result: Callable[[Any], None]) -> None:
+        previous = self._running.get(kind)
+        if previous is not None:
+            previous.token.cancel()
+        task = Task(func)
+        task.signals.finished.connect(on_result)
+        task.signals.error.connect(self._show_error)
+        for signal in (task.signals.finished, task.signals.error, task.signals.cancelled):
+            signal.connect(lambda *_: self._forget(kind, task))
+        self._running[kind] = task
+        self._tasks.append(task)
+        self._pool.start(task)
+
+    def _forget(self, kind: str, task: Task) -> None:
+        self._tasks.remove(task)
+        if self._running.get(kind) is task:
+            del self._running[kind]
 
     def _show_error(self, message: str) -> None:
-        self.analyze_btn.setDisabled(False)
-        self.parse_btn.setDisabled(False)
         self._set_status(f"Ошибка: {message}")
 
     def _show_analysis_result(self, data: Dict[str, Any]) -> None:
-        self._clear_results()
-
+        self._set_status("Готово.")
         if "text" in data:
-            analysis = data["text"].get("analysis", {})
-            self.result_layout.addWidget(self._build_category_group("Анализ текста", analysis))
+            self.results.add_result("Анализ текста", "text", data["text"])
         if "image" in data:
-            analysis = data["image"].get("analysis", {})
-            self.result_layout.addWidget(self._build_image_group("Анализ изображения", analysis))
+            self.results.add_result("Анализ изображения", "image", data["image"])
         if "pdf" in data:
-            text = data["pdf"].get("text", "")
-            self.result_layout.addWidget(self._build_ocr_group("OCR PDF", text))
+            self.results.add_result("OCR PDF", "pdf", data["pdf"])
 
-        self.result_layout.addStretch(1)
+    def _show_batch_result(self, title: str, kind: str, data: Dict[str, Any]) -> None:
+        self._set_status(self.batch.progress.text())
+        self.results.add_result(title, kind, data)
 
     def _show_parse_result(self, data: Dict[str, Any]) -> None:
-        self._clear_results()
+        self._set_status("Готово.")
         parse = data.get("parse_demo", {})
-        title = parse.get("title") or "Без названия"
-        analysis = parse.get("analysis", {})
-        group = self._build_category_group(title, analysis)
-        self.result_layout.addWidget(group)
-        self.result_layout.addStretch(1)
-
-    def _build_category_group(self, title: str, analysis: Dict[str, Any]) -> QtWidgets.QWidget:
-        wrapper = QtWidgets.QFrame()
-        wrapper.setObjectName("ResultGroup")
-        layout = QtWidgets.QVBoxLayout(wrapper)
-        title_label = QtWidgets.QLabel(title)
-        title_label.setObjectName("ResultTitle")
-        layout.addWidget(title_label)
-
-        grid = QtWidgets.QGridLayout()
-        grid.setHorizontalSpacing(12)
-        grid.setVerticalSpacing(12)
-        layout.addLayout(grid)
-
-        categories = [
-            ("strengths", "Сильные стороны"),
-            ("weaknesses", "Слабые стороны"),
-            ("unique_offers", "Уникальные предложения"),
-            ("recommendations", "Рекомендации"),
-        ]
-        row = 0
-        col = 0
-        for key, label in categories:
-            items = analysis.get(key) if isinstance(analysis, dict) else None
-            if not isinstance(items, list) or not items:
-                continue
-            block = self._build_list_block(label, items)
-            grid.addWidget(block, row, col)
-            col += 1
-            if col > 1:
-                col = 0
-                row += 1
-        return wrapper
-
-    def _build_image_group(self, title: str, analysis: Dict[str, Any]) -> QtWidgets.QWidget:
-        wrapper = QtWidgets.QFrame()
-        wrapper.setObjectName("ResultGroup")
-        layout = QtWidgets.QVBoxLayout(wrapper)
-        title_label = QtWidgets.QLabel(title)
-        title_label.setObjectName("ResultTitle")
-        layout.addWidget(title_label)
-
-        grid = QtWidgets.QGridLayout()
-        grid.setHorizontalSpacing(12)
-        grid.setVerticalSpacing(12)
-        layout.addLayout(grid)
-
-        if isinstance(analysis, dict):
-            if analysis.get("description"):
-                grid.addWidget(
-                    self._build_text_block("Описание", analysis["description"]), 0, 0
-                )
-            if analysis.get("insights"):
-                grid.addWidget(
-                    self._build_list_block("Инсайты", analysis["insights"]), 0, 1
-                )
-            if analysis.get("style_score") is not None:
-                grid.addWidget(
-                    self._build_text_block("Оценка стиля", str(analysis["style_score"])), 1, 0
-                )
-        return wrapper
-
-    def _build_ocr_group(self, title: str, text: str) -> QtWidgets.QWidget:
-        wrapper = QtWidgets.QFrame()
-        wrapper.setObjectName("ResultGroup")
-        layout = QtWidgets.QVBoxLayout(wrapper)
-        title_label = QtWidgets.QLabel(title)
-        title_label.setObjectName("ResultTitle")
-        layout.addWidget(title_label)
-        text_edit = QtWidgets.QTextEdit()
-        text_edit.setReadOnly(True)
-        text_edit.setPlainText(text)
-        text_edit.setMinimumHeight(160)
-        layout.addWidget(text_edit)
-        return wrapper
-
-    def _build_list_block(self, title: str, items: List[str]) -> QtWidgets.QWidget:
-        block = QtWidgets.QFrame()
-        block.setObjectName("ResultBlock")
-        layout = QtWidgets.QVBoxLayout(block)
-        label = QtWidgets.QLabel(title)
-        label.setObjectName("ResultSectionTitle")
-        layout.addWidget(label)
-        for item in items:
-            item_label = QtWidgets.QLabel(f"• {item}")
-            item_label.setWordWrap(True)
-            layout.addWidget(item_label)
-        return block
-
-    def _build_text_block(self, title: str, text: str) -> QtWidgets.QWidget:
-        block = QtWidgets.QFrame()
-        block.setObjectName("ResultBlock")
-        layout = QtWidgets.QVBoxLayout(block)
-        label = QtWidgets.QLabel(title)
-        label.setObjectName("ResultSectionTitle")
-        layout.addWidget(label)
-        text_label = QtWidgets.QLabel(text)
-        text_label.setWordWrap(True)
-        layout.addWidget(text_label)
-        return block
+        self.results.add_result(parse.get("title") or "Без названия", "parse_demo", parse)
 
     def closeEvent(self, event: QtGui.QCloseEvent) -> None:
-        self._backend.stop()
+        # abort everything in flight so that the backend, browser and sockets are released right away
+        for task in self._tasks:
+            task.token.cancel()
+        self.batch.runner.cancel()
+        self._pool.waitForDone(CLOSE_TIMEOUT_MS)
+        self.batch.runner.pool.waitForDone(CLOSE_TIMEOUT_MS)
+        self._client.close()
+        if self._backend:
+            self._backend.stop()
         super().closeEvent(event)
 
 
-def main() -> None:
+def _create_client() -> Tuple[BackendClient, Optional[BackendServer]]:
+    if config.BACKEND_MODE != "http":
+        return InProcessBackendClient(), None
+    pool_size = config.BATCH_CONCURRENCY + INTERACTIVE_THREADS
+    if config.BACKEND_URL:
+        return HttpBackendClient(config.BACKEND_URL, config.BACKEND_API_KEY, pool_size), None
     backend = BackendServer()
     backend.start()
+    return HttpBackendClient(backend.base_url, config.BACKEND_API_KEY, pool_size), backend
+
 
+def main() -> None:
     app = QtWidgets.QApplication(sys.argv)
-    window = MainWindow(backend)
+    try:
+        client, backend = _create_client()
+    except RuntimeError as exc:
+        QtWidgets.QMessageBox.critical(None, "Competitor Monitoring Assistant", str(exc))
+        sys.exit(1)
+
+    window = MainWindow(client, backend)
     window.show()
     sys.exit(app.exec())
 
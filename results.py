@@ -0,0 +1,219 @@
+from typing import Any, Dict, List, Optional
+
+from PyQt6 import QtCore, QtGui, QtWidgets
+
+CATEGORIES = [
+    ("strengths", "Сильные стороны"),
+    ("weaknesses", "Слабые стороны"),
+    ("unique_offers", "Уникальные предложения"),
+    ("recommendations", "Рекомендации"),
+    ("insights", "Инсайты"),
+]
+# rows show a single line; the full text goes to the tooltip and the detail view
+ROW_PREVIEW_CHARS = 200
+# the detail view is filled in slices so that megabytes of OCR text never block the UI thread
+TEXT_CHUNK_CHARS = 32_768
+
+NodeRole = QtCore.Qt.ItemDataRole.UserRole + 1
+
+
+class ResultNode:
+    __slots__ = ("title", "text", "parent", "children", "row")
+
+    def __init__(self, title: str, text: str = "", parent: Optional["ResultNode"] = None) -> None:
+        self.title = title
+        self.text = text
+        self.parent = parent
+        self.children: List["ResultNode"] = []
+        self.row = 0
+
+    def add(self, title: str, text: str = "") -> "ResultNode":
+        child = ResultNode(title, text, self)
+        child.row = len(self.children)
+        self.children.append(child)
+        return child
+
+
+def _add_analysis(node: ResultNode, analysis: Any) -> None:
+    if not isinstance(analysis, dict):
+        return
+    if analysis.get("description"):
+        node.add("Описание", str(analysis["description"]))
+    if analysis.get("style_score") is not None:
+        node.add(f"Оценка стиля: {analysis['style_score']}")
+    for key, label in CATEGORIES:
+        items = analysis.get(key)
+        if not isinstance(items, list) or not items:
+            continue
+        section = node.add(f"{label} ({len(items)})")
+        for item in items:
+            section.add(str(item), str(item))
+
+
+def build_result(title: str, kind: str, data: Dict[str, Any]) -> ResultNode:
+    root = ResultNode(title)
+    if kind in {"ocr_image", "pdf"}:
+        text = data.get("text") or ""
+        root.add(f"Распознанный текст ({len(text)} символов)", text)
+        return root
+    if kind == "error":
+        root.add(str(data.get("error", "")), str(data.get("error", "")))
+        return root
+    _add_analysis(root, data.get("analysis"))
+    facts = data.get("facts") or {}
+    offers = facts.get("offers") or []
+    if offers:
+        section = root.add(f"Предложения ({len(offers)})")
+        for offer in offers:
+            price = offer.get("price")
+            label = f"{offer.get('name', '')} — {price:g} {offer.get('currency', '')}" if price else offer.get("name", "")
+            section.add(label.strip(), label.strip())
+    return root
+
+
+class ResultsModel(QtCore.QAbstractItemModel):
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._root = ResultNode("")
+
+    def _node(self, index: QtCore.QModelIndex) -> ResultNode:
+        return index.internalPointer() if index.isValid() else self._root
+
+    def index(self, row: int, column: int, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:
+        node = self._node(parent)
+        if column != 0 or not 0 <= row < len(node.children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, 0, node.children[row])
+
+    def parent(self, index: QtCore.QModelIndex = QtCore.QModelIndex()) -> QtCore.QModelIndex:  # type: ignore[override]
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent = index.internalPointer().parent
+        if parent is None or parent is self._root:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent.row, 0, parent)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._node(parent).children)
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return 1
+
+    def data(self, index: QtCore.QModelIndex, role: int = QtCore.Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        node: ResultNode = index.internalPointer()
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            title = node.title.replace("\n", " ")
+            return title if len(title) <= ROW_PREVIEW_CHARS else title[:ROW_PREVIEW_CHARS] + "…"
+        if role == QtCore.Qt.ItemDataRole.ToolTipRole and node.text and len(node.text) <= 2000:
+            return node.text
+        if role == QtCore.Qt.ItemDataRole.FontRole and node.parent is self._root:
+            font = QtGui.QFont()
+            font.setBold(True)
+            return font
+        if role == NodeRole:
+            return node
+        return None
+
+    def append(self, node: ResultNode) -> QtCore.QModelIndex:
+        row = len(self._root.children)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        node.parent, node.row = self._root, row
+        self._root.children.append(node)
+        self.endInsertRows()
+        return self.index(row, 0)
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._root.children = []
+        self.endResetModel()
+
+
+class LazyTextView(QtWidgets.QPlainTextEdit):
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self._text = ""
+        self._offset = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._feed)
+
+    def show_text(self, text: str) -> None:
+        self._timer.stop()
+        self.clear()
+        self._text, self._offset = text, 0
+        if text:
+            self._feed()
+            if self._offset < len(text):
+                self._timer.start()
+
+    def _feed(self) -> None:
+        chunk = self._text[self._offset : self._offset + TEXT_CHUNK_CHARS]
+        self._offset += len(chunk)
+        cursor = QtGui.QTextCursor(self.document())
+        cursor.movePosition(QtGui.QTextCursor.MoveOperation.End)
+        cursor.insertText(chunk)
+        if self._offset >= len(self._text):
+            self._timer.stop()
+
+
+class ResultsPanel(QtWidgets.QWidget):
+    def __init__(self, parent: Optional[QtWidgets.QWidget] = None) -> None:
+        super().__init__(parent)
+        layout = QtWidgets.QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.status = QtWidgets.QLabel("Ожидаю запрос...")
+        self.status.setWordWrap(True)
+        layout.addWidget(self.status)
+
+        self.model = ResultsModel(self)
+        self.tree = QtWidgets.QTreeView()
+        self.tree.setModel(self.model)
+        self.tree.setHeaderHidden(True)
+        # uniform rows let the view lay out and scroll any number of rows in constant time
+        self.tree.setUniformRowHeights(True)
+        self.tree.setTextElideMode(QtCore.Qt.TextElideMode.ElideRight)
+        self.tree.selectionModel().currentChanged.connect(self._show_node)
+
+        self.detail = LazyTextView()
+        self.detail.setPlaceholderText("Выберите строку, чтобы увидеть полный текст")
+
+        splitter = QtWidgets.QSplitter(QtCore.Qt.Orientation.Vertical)
+        splitter.addWidget(self.tree)
+        splitter.addWidget(self.detail)
+        splitter.setStretchFactor(0, 3)
+        splitter.setStretchFactor(1, 2)
+        layout.addWidget(splitter, 1)
+
+    def set_status(self, message: str) -> None:
+        self.status.setText(message)
+
+    def add_result(self, title: str, kind: str, data: Dict[str, Any]) -> None:
+        index = self.model.append(build_result(title, kind, data))
+        self.tree.expand(index)
+        for row in range(self.model.rowCount(index)):
+            child = self.model.index(row, 0, index)
+            # long sections stay collapsed; expanding is the user's call
+            if self.model.rowCount(child) <= 50:
+                self.tree.expand(child)
+        self.tree.scrollTo(index, QtWidgets.QAbstractItemView.ScrollHint.PositionAtTop)
+        if not self.tree.currentIndex().isValid():
+            self.tree.setCurrentIndex(self.model.index(0, 0, index))
+
+    def clear(self) -> None:
+        self.model.clear()
+        self.detail.show_text("")
+
+    def _show_node(self, current: QtCore.QModelIndex, _previous: QtCore.QModelIndex) -> None:
+        node = current.data(NodeRole) if current.isValid() else None
+        if node is None:
+            self.detail.show_text("")
+        elif node.text:
+            self.detail.show_text(node.text)
+        else:
+            self.detail.show_text("\n".join(f"• {child.text or child.title}" for child in node.children))
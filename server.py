@@ -0,0 +1,42 @@
+import argparse
+import importlib.util
+import sys
+from pathlib import Path
+
+import uvicorn
+
+APP_ROOT = Path(__file__).resolve().parent
+if str(APP_ROOT) not in sys.path:
+    sys.path.insert(0, str(APP_ROOT))
+
+from fastapi_app.core import config
+
+
+def _pick_impl(module: str, fallback: str) -> str:
+    return module if importlib.util.find_spec(module) else fallback
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Headless Competitor Monitoring API server")
+    parser.add_argument("--host", default=config.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=config.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=config.SERVER_WORKERS)
+    parser.add_argument("--graceful-timeout", type=int, default=config.SERVER_GRACEFUL_TIMEOUT)
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    uvicorn.run(
+        "fastapi_app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=max(1, args.workers),
+        loop=_pick_impl("uvloop", "asyncio"),
+        http=_pick_impl("httptools", "h11"),
+        timeout_graceful_shutdown=args.graceful_timeout,
+        proxy_headers=True,
+        log_level=args.log_level,
+    )
+
+
+if __name__ == "__main__":
+    main()